@@ -0,0 +1,135 @@
+"""
+Agregados incrementais (contagens e somas por dimensão) mantidos por triggers
+"""
+
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Chave gravada no lugar de NULL (NULL não conflita na chave primária)
+NULL_KEY = ''
+
+
+class StatsTable:
+    """Tabela de resumo (dimension, key) -> contagem, quantidade de scores e
+    soma dos scores, atualizada por triggers a cada INSERT, DELETE ou
+    UPDATE na tabela de origem.
+
+    dimensions mapeia o nome da dimensão para uma expressão SQL sobre a
+    linha, usando {row} no lugar do alias (new/old nos triggers), por
+    exemplo {'site': '{row}.site_source', 'day': 'date({row}.scraped_at)'}.
+    columns lista as colunas usadas nessas expressões: só UPDATEs que as
+    alteram (ou alteram o score) disparam a atualização.
+    """
+
+    def __init__(self, name: str, source: str, dimensions: Dict[str, str],
+                 columns: Iterable[str], score_column: str):
+        self.name = name
+        self.source = source
+        self.dimensions = dimensions
+        self.columns = list(columns)
+        self.score_column = score_column
+
+    def install(self, cursor: sqlite3.Cursor) -> bool:
+        """Cria a tabela e os triggers; retorna True se a tabela foi criada agora
+        (e precisa ser preenchida com rebuild).
+
+        Se as dimensões mudaram desde a criação, tabela e triggers são recriados.
+        """
+        insert_body = self._apply('new', 1)
+
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (f'{self.name}_ai',))
+        row = cursor.fetchone()
+        if row and insert_body not in row[0]:
+            self.drop(cursor)
+
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (self.name,))
+        created = cursor.fetchone() is None
+
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {self.name} (
+                dimension TEXT NOT NULL,
+                key TEXT NOT NULL,
+                complaint_count INTEGER NOT NULL DEFAULT 0,
+                score_count INTEGER NOT NULL DEFAULT 0,
+                score_sum REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (dimension, key)
+            )
+        ''')
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{self.name}_count ON {self.name}(dimension, complaint_count)')
+
+        watched = ', '.join(dict.fromkeys(self.columns + [self.score_column]))
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {self.name}_ai AFTER INSERT ON {self.source} BEGIN
+                {insert_body}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {self.name}_ad AFTER DELETE ON {self.source} BEGIN
+                {self._apply('old', -1)}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {self.name}_au AFTER UPDATE OF {watched} ON {self.source} BEGIN
+                {self._apply('old', -1)}
+                {self._apply('new', 1)}
+            END
+        ''')
+
+        return created
+
+    def drop(self, cursor: sqlite3.Cursor):
+        """Remove a tabela de resumo e seus triggers"""
+        for suffix in ('ai', 'ad', 'au'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS {self.name}_{suffix}')
+        cursor.execute(f'DROP TABLE IF EXISTS {self.name}')
+
+    def _apply(self, row: str, sign: int) -> str:
+        score = f'{row}.{self.score_column}'
+        return '\n'.join(f'''
+            INSERT INTO {self.name} (dimension, key, complaint_count, score_count, score_sum)
+            VALUES ('{dimension}', COALESCE({expression.format(row=row)}, '{NULL_KEY}'),
+                    {sign}, {sign} * ({score} IS NOT NULL), {sign} * COALESCE({score}, 0))
+            ON CONFLICT(dimension, key) DO UPDATE SET
+                complaint_count = complaint_count + excluded.complaint_count,
+                score_count = score_count + excluded.score_count,
+                score_sum = score_sum + excluded.score_sum;'''
+            for dimension, expression in self.dimensions.items())
+
+    def rebuild(self, cursor: sqlite3.Cursor):
+        """Recalcula a tabela de resumo a partir da tabela de origem"""
+        cursor.execute(f'DELETE FROM {self.name}')
+        for dimension, expression in self.dimensions.items():
+            cursor.execute(f'''
+                INSERT INTO {self.name} (dimension, key, complaint_count, score_count, score_sum)
+                SELECT ?, COALESCE({expression.format(row=self.source)}, '{NULL_KEY}') AS key,
+                       COUNT(*), COUNT({self.score_column}), COALESCE(SUM({self.score_column}), 0)
+                FROM {self.source}
+                GROUP BY key
+            ''', (dimension,))
+
+    def read(self, cursor: sqlite3.Cursor, dimension: str,
+             limit: Optional[int] = None) -> List[Tuple[Optional[str], int, int, float]]:
+        """Retorna (key, contagem, quantidade de scores, soma dos scores) da
+        dimensão, da maior para a menor contagem"""
+        cursor.execute(f'''
+            SELECT key, complaint_count, score_count, score_sum FROM {self.name}
+            WHERE dimension = ? AND complaint_count > 0
+            ORDER BY complaint_count DESC
+            {'LIMIT ?' if limit else ''}
+        ''', (dimension, limit) if limit else (dimension,))
+
+        return [(None if key == NULL_KEY else key, count, score_count, score_sum)
+                for key, count, score_count, score_sum in cursor.fetchall()]
+
+    def counts(self, cursor: sqlite3.Cursor, dimension: str, limit: Optional[int] = None) -> Dict[Optional[str], int]:
+        """Contagem por chave da dimensão"""
+        return {key: count for key, count, _, _ in self.read(cursor, dimension, limit)}
+
+    def total(self, cursor: sqlite3.Cursor) -> Tuple[int, Optional[float]]:
+        """Total de linhas e média dos scores (dimensão 'total')"""
+        rows = self.read(cursor, 'total')
+        if not rows:
+            return 0, None
+
+        _, count, score_count, score_sum = rows[0]
+        return count, (score_sum / score_count if score_count else None)
@@ -0,0 +1,240 @@
+"""
+Linha de comando única do scraper: crawl, export, stats, search e rescore
+
+Cada subcomando importa só o que usa: stats e search abrem o banco sem
+carregar numpy, requests, BeautifulSoup ou Selenium.
+
+    python cli.py crawl [--engine main|organized|simple|legacy] [--site SITE ...]
+    python cli.py schedule [--site SITE ...] [--once]
+    python cli.py export [--format csv|parquet|arrow] [--output CAMINHO] [--full]
+    python cli.py stats [--json]
+    python cli.py search "sistema fora do ar" [--site SITE] [--since AAAA-MM-DD]
+    python cli.py rescore [relevance] [dates] [classifier]
+"""
+
+import argparse
+import json
+import logging
+import sys
+
+from config import DATABASE_CONFIG, LOGGING_CONFIG
+
+RESCORE_TARGETS = ('relevance', 'dates', 'classifier')
+
+
+def _open_database():
+    from database import DatabaseManager
+    return DatabaseManager(DATABASE_CONFIG['db_path'])
+
+
+def cmd_crawl(args) -> int:
+    if args.engine == 'organized':
+        from organized_scraper import main as run
+        run()
+    elif args.engine == 'simple':
+        from simple_scraper import main as run
+        run()
+    elif args.engine == 'legacy':
+        from scraper import main as run
+        run()
+    else:
+        from main import main as run
+        run(args.site)
+    return 0
+
+
+def cmd_schedule(args) -> int:
+    from db_writer import install_shutdown_handler
+    from scheduler import CrawlScheduler, SchedulerLock
+
+    lock = SchedulerLock()
+    if not lock.acquire():
+        print(f"Outro agendador já está rodando ({lock.path})")
+        return 1
+
+    install_shutdown_handler()
+    try:
+        CrawlScheduler(args.site).run(once=args.once)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        lock.release()
+    return 0
+
+
+def cmd_export(args) -> int:
+    db_manager = _open_database()
+    try:
+        if args.format == 'csv':
+            incremental = DATABASE_CONFIG['csv_incremental'] if args.incremental is None else args.incremental
+            exported = db_manager.export_to_csv(args.output or DATABASE_CONFIG['csv_path'], incremental=incremental)
+            return 0 if exported else 1
+
+        from columnar_export import ColumnarExporter
+
+        exporter = ColumnarExporter(db_manager, output_dir=args.output or DATABASE_CONFIG['columnar']['path'],
+                                    file_format=args.format)
+        exported = exporter.export(incremental=True if args.incremental is None else args.incremental)
+        print(f"{exported} reclamações exportadas para {exporter.output_dir}")
+        return 0
+    finally:
+        db_manager.close()
+
+
+def cmd_stats(args) -> int:
+    db_manager = _open_database()
+    try:
+        stats = db_manager.get_stats()
+        stats['by_day'] = db_manager.get_daily_counts(limit=args.days)
+        stats['crawl_yield'] = db_manager.get_crawl_yields()
+    finally:
+        db_manager.close()
+
+    if args.json:
+        print(json.dumps(stats, ensure_ascii=False, indent=2, default=str))
+        return 0
+
+    print(f"Total de reclamações: {stats.get('total_complaints', 0)}")
+    print(f"Score médio de relevância: {stats.get('avg_relevance_score', 0)}")
+
+    print("\n=== POR SITE ===")
+    for site, count in stats.get('by_site', {}).items():
+        print(f"{site}: {count}")
+
+    print("\n=== POR SEVERIDADE ===")
+    for severity, count in stats.get('by_severity', {}).items():
+        print(f"{severity or 'sem severidade'}: {count}")
+
+    print("\n=== TOP EMPRESAS ===")
+    for company, count in stats.get('top_companies', {}).items():
+        print(f"{company or 'Não identificada'}: {count}")
+
+    print(f"\n=== ÚLTIMOS {args.days} DIAS COM COLETA ===")
+    for day, count in stats['by_day'].items():
+        print(f"{day}: {count}")
+
+    if stats['crawl_yield']:
+        print("\n=== RENDIMENTO DA COLETA (reclamações novas por requisição) ===")
+        for site, site_yield in stats['crawl_yield'].items():
+            rate = '-' if site_yield['yield'] is None else f"{site_yield['yield']:.2f}"
+            print(f"{site}: {rate} ({site_yield['stored']:g} em {site_yield['fetches']:g} requisições)")
+    return 0
+
+
+def cmd_search(args) -> int:
+    db_manager = _open_database()
+    try:
+        page = db_manager.search(args.query, site=args.site, company=args.company, since=args.since,
+                                 limit=args.limit, cursor=args.cursor)
+    finally:
+        db_manager.close()
+
+    if args.json:
+        print(json.dumps(page, ensure_ascii=False, indent=2, default=str))
+        return 0
+
+    for result in page['results']:
+        print(f"[{result['id']}] {result['site_source']} | {result['company_name'] or '-'} | "
+              f"{result['complaint_date'] or '-'} | {result['title']}")
+        print(f"    {result['snippet']}")
+        if result['url']:
+            print(f"    {result['url']}")
+
+    if page['next_cursor']:
+        print(f"\nPróxima página: --cursor {page['next_cursor']}")
+    return 0
+
+
+def cmd_rescore(args) -> int:
+    targets = args.targets or ['relevance']
+    db_manager = _open_database()
+    try:
+        if 'relevance' in targets:
+            from utils import TextProcessor
+            db_manager.rescore_complaints(TextProcessor(corpus_stats=db_manager.corpus_stats))
+
+        if 'dates' in targets:
+            db_manager.renormalize_dates()
+
+        if 'classifier' in targets:
+            from config import TI_CLASSIFIER_CONFIG
+            from ti_classifier import load_ti_classifier
+
+            classifier = load_ti_classifier(TI_CLASSIFIER_CONFIG['model_path'])
+            if classifier is None:
+                return 1
+            db_manager.update_ti_probabilities(classifier)
+    finally:
+        db_manager.close()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='cli.py', description='Scraper de reclamações de TI')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    crawl = subparsers.add_parser('crawl', help='coleta reclamações dos sites')
+    crawl.add_argument('--engine', choices=('main', 'organized', 'simple', 'legacy'), default='main',
+                       help='main (requests/Selenium), organized, simple ou legacy (scraper.py)')
+    crawl.add_argument('--site', action='append', help='coleta só este site (pode repetir; engine main)')
+    crawl.set_defaults(handler=cmd_crawl)
+
+    schedule = subparsers.add_parser('schedule', help='coleta contínua, cada site no seu crawl_interval')
+    schedule.add_argument('--site', action='append', help='agenda só este site (pode repetir)')
+    schedule.add_argument('--once', action='store_true', help='coleta os sites vencidos e sai')
+    schedule.set_defaults(handler=cmd_schedule)
+
+    export = subparsers.add_parser('export', help='exporta o banco para CSV, Parquet ou Arrow')
+    export.add_argument('--format', choices=('csv', 'parquet', 'arrow'), default='csv')
+    export.add_argument('--output', help='arquivo CSV (.gz para gzip) ou pasta das partições')
+    mode = export.add_mutually_exclusive_group()
+    mode.add_argument('--incremental', dest='incremental', action='store_true', default=None,
+                      help='só as reclamações novas desde a última exportação')
+    mode.add_argument('--full', dest='incremental', action='store_false', help='exporta tudo de novo')
+    export.set_defaults(handler=cmd_export)
+
+    stats = subparsers.add_parser('stats', help='resumo do banco')
+    stats.add_argument('--days', type=int, default=7, help='dias mostrados na contagem diária')
+    stats.add_argument('--json', action='store_true')
+    stats.set_defaults(handler=cmd_stats)
+
+    search = subparsers.add_parser('search', help='busca textual nas reclamações')
+    search.add_argument('query')
+    search.add_argument('--site')
+    search.add_argument('--company', help='qualquer variação do nome (Vivo, VIVO S.A.)')
+    search.add_argument('--since', help='data mínima (AAAA-MM-DD)')
+    search.add_argument('--limit', type=int, default=20)
+    search.add_argument('--cursor', help='next_cursor da página anterior')
+    search.add_argument('--json', action='store_true')
+    search.set_defaults(handler=cmd_search)
+
+    rescore = subparsers.add_parser('rescore', help='recalcula dados derivados das reclamações')
+    rescore.add_argument('targets', nargs='*', metavar='{relevance,dates,classifier}',
+                         help='relevance (padrão), dates e/ou classifier')
+    rescore.set_defaults(handler=cmd_rescore)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == 'search' and args.cursor:
+        from database import parse_search_cursor
+        if parse_search_cursor(args.cursor) is None:
+            parser.error(f"cursor inválido: {args.cursor} (use o next_cursor mostrado na página anterior)")
+    if args.command == 'rescore':
+        unknown = [target for target in args.targets if target not in RESCORE_TARGETS]
+        if unknown:
+            parser.error(f"alvo inválido para rescore: {', '.join(unknown)} (use {', '.join(RESCORE_TARGETS)})")
+
+    # Comandos de consulta só mostram avisos; crawl e schedule configuram o próprio log (main.py)
+    level = LOGGING_CONFIG['level'] if args.command in ('export', 'rescore') else 'WARNING'
+    if args.command not in ('crawl', 'schedule'):
+        logging.basicConfig(level=level, format=LOGGING_CONFIG['format'])
+
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Dimensão de empresas: nomes canônicos, apelidos e ids inteiros
+"""
+
+import re
+import sqlite3
+from typing import Dict, Optional
+
+from keyword_matcher import fold_accents
+
+# Sufixos societários ignorados na comparação ("Itaú Unibanco S.A." = "itau unibanco")
+LEGAL_SUFFIXES = frozenset(('ltda', 'sa', 'me', 'epp', 'eireli', 'inc', 'llc', 'ltd', 'corp', 'co', 'plc', 'gmbh'))
+
+# Valores que os extratores usam quando não encontram a empresa
+PLACEHOLDER_KEYS = frozenset((
+    '', 'empresa nao identificada', 'nao identificado', 'nao identificada', 'nao informado',
+    'company not identified', 'desconhecida', 'desconhecido', 'unknown', 'na', 'none',
+))
+
+NON_WORD_PATTERN = re.compile(r'[\W_]+')
+
+
+def company_key(name: Optional[str]) -> str:
+    """Chave de comparação: minúsculas, sem acentos, pontuação nem sufixo societário"""
+    tokens = NON_WORD_PATTERN.sub(' ', fold_accents(name or '')).split()
+    # "S.A." vira "s a": junta letras soltas antes de remover o sufixo
+    while len(tokens) >= 2 and len(tokens[-1]) == 1 and len(tokens[-2]) == 1:
+        tokens[-2:] = [tokens[-2] + tokens[-1]]
+    while len(tokens) > 1 and tokens[-1] in LEGAL_SUFFIXES:
+        tokens.pop()
+    return ' '.join(tokens)
+
+
+def canonical_company_name(name: Optional[str]) -> Optional[str]:
+    """Nome de exibição (espaços normalizados) ou None para valores genéricos"""
+    if not name or company_key(name) in PLACEHOLDER_KEYS:
+        return None
+    return ' '.join(name.split())
+
+
+class CompanyResolver:
+    """Resolve nomes de empresa para ids da tabela companies.
+
+    Variações do mesmo nome (maiúsculas, acentos, espaços, "S.A.") caem na
+    mesma chave de company_aliases; apelidos diferentes ("itau" e "Itaú
+    Unibanco") podem ser ligados com add_alias. O cache em memória evita
+    consultas ao banco para nomes já vistos; em caso de rollback, chame
+    clear() para descartar ids que não foram gravados.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._names: Dict[int, str] = {}
+
+    @staticmethod
+    def install(cursor: sqlite3.Cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS companies (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS company_aliases (
+                alias TEXT PRIMARY KEY,
+                company_id INTEGER NOT NULL REFERENCES companies(id)
+            ) WITHOUT ROWID
+        ''')
+
+    def load(self, cursor: sqlite3.Cursor):
+        """Carrega todos os apelidos e nomes para o cache"""
+        cursor.execute('SELECT alias, company_id FROM company_aliases')
+        self._ids = dict(cursor.fetchall())
+        cursor.execute('SELECT id, name FROM companies')
+        self._names = dict(cursor.fetchall())
+
+    def clear(self):
+        self._ids = {}
+        self._names = {}
+
+    def resolve(self, cursor: sqlite3.Cursor, name: Optional[str]) -> Optional[int]:
+        """Id da empresa (criada se ainda não existir); None para nomes genéricos"""
+        display_name = canonical_company_name(name)
+        if display_name is None:
+            return None
+
+        key = company_key(display_name)
+        company_id = self._ids.get(key)
+        if company_id is not None:
+            return company_id
+
+        cursor.execute('SELECT company_id FROM company_aliases WHERE alias = ?', (key,))
+        row = cursor.fetchone()
+        if row:
+            company_id = row[0]
+        else:
+            cursor.execute('INSERT INTO companies (name) VALUES (?)', (display_name,))
+            company_id = cursor.lastrowid
+            cursor.execute('INSERT INTO company_aliases (alias, company_id) VALUES (?, ?)', (key, company_id))
+            self._names[company_id] = display_name
+
+        self._ids[key] = company_id
+        return company_id
+
+    def add_alias(self, cursor: sqlite3.Cursor, alias: str, company_id: int):
+        """Liga outro nome (ou variação) a uma empresa existente"""
+        key = company_key(alias)
+        cursor.execute('''
+            INSERT INTO company_aliases (alias, company_id) VALUES (?, ?)
+            ON CONFLICT(alias) DO UPDATE SET company_id = excluded.company_id
+        ''', (key, company_id))
+        self._ids[key] = company_id
+
+    def name(self, cursor: sqlite3.Cursor, company_id: Optional[int]) -> Optional[str]:
+        """Nome canônico da empresa"""
+        if company_id is None:
+            return None
+        if company_id not in self._names:
+            cursor.execute('SELECT name FROM companies WHERE id = ?', (company_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            self._names[company_id] = row[0]
+        return self._names[company_id]
+
+    def backfill(self, cursor: sqlite3.Cursor, table: str = 'complaints'):
+        """Preenche company_id das linhas que ainda não têm, um UPDATE por nome distinto"""
+        cursor.execute(f'SELECT DISTINCT company_name FROM {table} WHERE company_id IS NULL AND company_name IS NOT NULL')
+        names = [row[0] for row in cursor.fetchall()]
+
+        updates = []
+        for name in names:
+            company_id = self.resolve(cursor, name)
+            if company_id is not None:
+                updates.append((company_id, name))
+
+        cursor.executemany(f'UPDATE {table} SET company_id = ? WHERE company_name = ? AND company_id IS NULL', updates)
@@ -25,15 +25,79 @@ SCRAPING_CONFIG = {
     'max_retries': 3,
     'timeout': 30,
     'user_agent_rotation': True,
+    'user_agent_cache': 'user_agents.json',  # pool de user agents salvo em disco
+    'user_agent_cache_days': 7,   # idade máxima do pool antes de gerar outro
+    'user_agent_pool_size': 50,
     'respect_robots_txt': True,
     'max_pages_per_site': 10,     # limite de páginas por site
+    'in_browser_extraction': True,  # extrai campos via execute_script nos sites com Selenium
+    'stream_batch_size': 100,     # reclamações por bloco de filtro/gravação no modo streaming
+    'search_terms_per_site': 5,   # termos de TI_KEYWORDS buscados por coleta nos sites com busca
+    # Requisições divididas entre os sites pelo rendimento observado (crawl_budget.py)
+    'crawl_budget': {
+        'enabled': True,          # False: max_pages_per_site para todos os sites
+        'total_requests': None,   # requisições por coleta, somando os sites (None: as mesmas de
+                                  # max_pages_per_site em cada site)
+        'min_pages': 1,           # mínimo de páginas por site (exploração)
+        'policy': 'thompson',     # 'thompson' ou 'ucb'
+        'exploration': 1.0,       # peso do bônus de exploração (ucb)
+        'decay': 0.95,            # peso das contagens anteriores a cada coleta
+    },
+}
+
+
+RELEVANCE_CONFIG = {
+    'scorer': 'keyword',          # 'keyword' (contagem) ou 'bm25'
+    'stemming': True,             # compara radicais (travou/travando, falha/falhas, erros/erro)
+    'bm25': {
+        'k1': 1.2,
+        'b': 0.75,
+        'saturation': 6.0,        # score bruto que corresponde a 50 pontos
+    },
+}
+
+# Classificador treinado aplicado depois do filtro por palavras-chave (ti_classifier.py)
+TI_CLASSIFIER_CONFIG = {
+    'enabled': False,             # descarta reclamações com probabilidade abaixo do limiar
+    'model_path': 'ti_classifier.npz',
+    'threshold': 0.5,
+    'n_features': 2 ** 18,        # buckets de hash dos n-gramas
+    'ngram_range': (1, 2),
 }
 
 
+
 DATABASE_CONFIG = {
     'db_path': 'ti_complaints.db',
     'backup_csv': True,
-    'csv_path': 'ti_complaints_backup.csv'
+    'csv_path': 'ti_complaints_backup.csv',
+    'csv_incremental': False,   # acrescenta só as reclamações novas desde a última exportação
+    'export_chunk_size': 5000,  # linhas lidas do banco por vez na exportação
+    'columnar': {
+        'enabled': False,          # exportação Parquet/Arrow para análises (requer pyarrow)
+        'path': 'analytics',
+        'format': 'parquet',       # 'parquet' ou 'arrow'
+        'compression': 'zstd',
+        'chunk_size': 100000,
+    },
+    'persistent_connection': True,  # uma conexão por DatabaseManager em vez de uma por operação
+    'pragmas': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',  # com WAL, fsync só nos checkpoints
+        'cache_size': -65536,     # 64 MB
+    },
+    'near_duplicates': {
+        'num_perm': 128,          # tamanho da assinatura MinHash
+        'bands': 16,              # faixas do LSH (16 x 8 valores)
+        'shingle_size': 3,        # palavras por shingle
+        'threshold': 0.7,         # Jaccard estimado mínimo para ligar duas reclamações
+    },
+    'background_writer': True,  # grava em uma thread própria, sem travar o scraping
+    'writer': {
+        'queue_size': 1000,       # fila cheia bloqueia os scrapers (backpressure)
+        'batch_size': 200,        # commit a cada N reclamações...
+        'flush_interval': 2.0,    # ...ou a cada N segundos
+    },
 }
 
 
@@ -43,40 +107,64 @@ SITES_CONFIG = {
         'search_url': 'https://www.reclameaqui.com.br/busca',
         'enabled': True,
         'use_selenium': True,  # Site carrega conteúdo dinamicamente
+        'language': 'pt',
+        'crawl_interval': 900,    # segundos entre coletas no modo agendado (cli.py schedule)
     },
     'consumidor_gov': {
         'base_url': 'https://www.consumidor.gov.br',
         'search_url': 'https://www.consumidor.gov.br/pages/indicador/pesquisar',
         'enabled': True,
         'use_selenium': False,
+        'language': 'pt',
+        'crawl_interval': 3600,
     },
     'ebit': {
         'base_url': 'https://www.ebit.com.br',
         'search_url': 'https://www.ebit.com.br/reclamacoes',
         'enabled': True,
         'use_selenium': False,
+        'language': 'pt',
+        'crawl_interval': 3600,
     },
     'trustpilot': {
         'base_url': 'https://www.trustpilot.com',
         'search_url': 'https://www.trustpilot.com/categories/technology',
         'enabled': True,
         'use_selenium': True,
+        'language': 'en',
+        'crawl_interval': 1800,
     },
     'complaints_board': {
         'base_url': 'https://www.complaintsboard.com',
         'search_url': 'https://www.complaintsboard.com/categories/technology',
         'enabled': True,
         'use_selenium': False,
+        'language': 'en',
+        'crawl_interval': 3600,
     },
     'sitejabber': {
         'base_url': 'https://www.sitejabber.com',
         'search_url': 'https://www.sitejabber.com/categories/technology',
         'enabled': True,
         'use_selenium': False,
+        'language': 'en',
+        'crawl_interval': 3600,
     }
 }
 
 
+# Modo agendado: coleta contínua, cada site no seu crawl_interval
+SCHEDULER_CONFIG = {
+    'state_path': 'schedule_state.json',  # próxima execução e resultado da última, por site
+    'lock_path': 'scheduler.lock',        # impede dois agendadores no mesmo banco
+    'lock_stale_after': 300,      # segundos sem heartbeat para considerar o lock abandonado
+    'default_interval': 3600,     # sites sem crawl_interval
+    'jitter': 0.1,                # +-10% no intervalo, para não bater sempre no mesmo horário
+    'tick': 30,                   # segundos máximos entre verificações
+    'max_pages': 3,               # páginas por coleta agendada (as reclamações novas ficam no início)
+}
+
+
 LOGGING_CONFIG = {
     'level': 'INFO',
     'file': 'scraper.log',
@@ -0,0 +1,113 @@
+"""
+Orçamento de coleta adaptativo: mais requisições para sites e termos que rendem reclamações
+"""
+
+import math
+import random
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+# Termo gravado quando o rendimento é medido só por site
+SITE_TERM = ''
+
+
+class CrawlBudget:
+    """Bandit sobre o rendimento (reclamações gravadas por requisição) de
+    cada site e de cada termo de busca, guardado na tabela crawl_yield.
+
+    Com policy='thompson' a prioridade é uma amostra da taxa de rendimento
+    (posterior Gamma-Poisson); com 'ucb' é a taxa média mais um bônus de
+    exploração que diminui com o número de requisições. Os dois partem de
+    uma taxa a priori (prior_rate, com peso de prior_fetches requisições),
+    então fontes nunca coletadas ainda recebem orçamento. A cada registro as
+    contagens antigas são multiplicadas por decay: o rendimento recente pesa
+    mais, e uma fonte que secou perde orçamento.
+    """
+
+    def __init__(self, policy: str = 'thompson', exploration: float = 1.0, decay: float = 0.95,
+                 prior_rate: float = 1.0, prior_fetches: float = 2.0, rng: Optional[random.Random] = None):
+        if policy not in ('thompson', 'ucb'):
+            raise ValueError(f"Política de orçamento desconhecida: {policy}")
+        self.policy = policy
+        self.exploration = exploration
+        self.decay = decay
+        self.prior_rate = prior_rate
+        self.prior_fetches = prior_fetches
+        self.rng = rng or random.Random()
+
+    @staticmethod
+    def install(cursor: sqlite3.Cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_yield (
+                site_source TEXT NOT NULL,
+                term TEXT NOT NULL DEFAULT '',
+                fetches REAL NOT NULL DEFAULT 0,
+                stored REAL NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (site_source, term)
+            ) WITHOUT ROWID
+        ''')
+
+    def record(self, cursor: sqlite3.Cursor, entries: Iterable[Tuple[str, str, float, float]]):
+        """Soma (site, termo, requisições, reclamações gravadas), com decaimento das contagens anteriores"""
+        cursor.executemany('''
+            INSERT INTO crawl_yield (site_source, term, fetches, stored) VALUES (?, ?, ?, ?)
+            ON CONFLICT(site_source, term) DO UPDATE SET
+                fetches = fetches * ? + excluded.fetches,
+                stored = stored * ? + excluded.stored,
+                updated_at = CURRENT_TIMESTAMP
+        ''', [(site, term, fetches, stored, self.decay, self.decay) for site, term, fetches, stored in entries])
+
+    @staticmethod
+    def term_yields(cursor: sqlite3.Cursor, site: str) -> Dict[str, Tuple[float, float]]:
+        """termo -> (requisições, reclamações gravadas) do site"""
+        cursor.execute('SELECT term, fetches, stored FROM crawl_yield WHERE site_source = ?', (site,))
+        return {term: (fetches, stored) for term, fetches, stored in cursor.fetchall()}
+
+    @staticmethod
+    def site_yields(cursor: sqlite3.Cursor) -> Dict[str, Tuple[float, float]]:
+        """site -> (requisições, reclamações gravadas), somando todos os termos"""
+        cursor.execute('SELECT site_source, SUM(fetches), SUM(stored) FROM crawl_yield GROUP BY site_source')
+        return {site: (fetches, stored) for site, fetches, stored in cursor.fetchall()}
+
+    def priority(self, fetches: float, stored: float, total_fetches: float) -> float:
+        """Taxa de rendimento amostrada (thompson) ou otimista (ucb)"""
+        shape = stored + self.prior_rate * self.prior_fetches
+        observations = fetches + self.prior_fetches
+        if self.policy == 'thompson':
+            return self.rng.gammavariate(shape, 1.0 / observations)
+        return shape / observations + self.exploration * math.sqrt(math.log(total_fetches + 1) / observations)
+
+    def _priorities(self, yields: Dict[str, Tuple[float, float]], keys: List[str]) -> Dict[str, float]:
+        total_fetches = sum(fetches for fetches, _ in yields.values())
+        return {key: self.priority(*yields.get(key, (0.0, 0.0)), total_fetches) for key in keys}
+
+    def choose_terms(self, cursor: sqlite3.Cursor, site: str, terms: Iterable[str], budget: int) -> List[str]:
+        """Os budget termos de maior prioridade no site (em vez dos primeiros da lista)"""
+        terms = list(dict.fromkeys(terms))
+        priorities = self._priorities(self.term_yields(cursor, site), terms)
+        return sorted(terms, key=priorities.get, reverse=True)[:budget]
+
+    def allocate(self, cursor: sqlite3.Cursor, sites: Iterable[str], total: int,
+                 minimum: Union[int, Dict[str, int]] = 1) -> Dict[str, int]:
+        """Divide total requisições entre os sites, proporcional à prioridade de
+        cada um, garantindo minimum por site (um valor para todos ou por site)"""
+        sites = list(dict.fromkeys(sites))
+        if not sites:
+            return {}
+
+        priorities = self._priorities(self.site_yields(cursor), sites)
+        allocation = {site: minimum[site] if isinstance(minimum, dict) else minimum for site in sites}
+        remaining = max(total - sum(allocation.values()), 0)
+
+        weight_sum = sum(priorities.values())
+        if remaining and weight_sum > 0:
+            shares = {site: remaining * priorities[site] / weight_sum for site in sites}
+            for site in sites:
+                allocation[site] += int(shares[site])
+            # Maiores restos recebem as unidades que sobraram do arredondamento
+            leftover = remaining - sum(int(share) for share in shares.values())
+            for site in sorted(sites, key=lambda site: shares[site] - int(shares[site]), reverse=True)[:leftover]:
+                allocation[site] += 1
+
+        return allocation
@@ -1,25 +1,163 @@
 
 
-import sqlite3
-import pandas as pd
+import csv
+import gzip
 import logging
+import math
+import os
+import re
+import sqlite3
 from datetime import datetime
-from typing import Dict, List, Optional
-from config import DATABASE_CONFIG
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from aggregates import StatsTable
+from companies import CompanyResolver, company_key
+from config import DATABASE_CONFIG, RELEVANCE_CONFIG, SCRAPING_CONFIG, SITES_CONFIG, TI_KEYWORDS
+from crawl_budget import SITE_TERM, CrawlBudget
+from db_writer import DatabaseWriter
+from keyword_index import KeywordIndex
+from keyword_matcher import get_matcher
+from models import Complaint, content_fingerprint, reset_outdated_fingerprints
+from near_duplicates import NearDuplicateIndex
+from normalization import normalize_dates
+from relevance import CorpusStats
+from severity import classify_severity
 
 logger = logging.getLogger(__name__)
 
+# Reclamação repetida (mesmo content_hash) só atualiza os campos que mudam com o tempo
+UPSERT_COMPLAINT_SQL = f'''
+    INSERT INTO complaints ({', '.join(Complaint.DB_COLUMNS)})
+    VALUES ({', '.join('?' * len(Complaint.DB_COLUMNS))})
+    ON CONFLICT(content_hash) DO UPDATE SET
+        status = COALESCE(NULLIF(excluded.status, ''), status),
+        company_response = COALESCE(NULLIF(excluded.company_response, ''), company_response)
+'''
+
+# Resumo de get_stats: total, por site, por empresa (company_id), por severidade e por dia de coleta
+COMPLAINT_STATS = StatsTable(
+    'complaint_stats', 'complaints',
+    dimensions={
+        'total': "'all'",
+        'site': '{row}.site_source',
+        'company': '{row}.company_id',
+        'severity': '{row}.severity_level',
+        'day': 'date({row}.scraped_at)',
+    },
+    columns=('site_source', 'company_id', 'severity_level', 'scraped_at'),
+    score_column='relevance_score',
+)
+
+# Palavras-chave por reclamação; períodos pela data da reclamação (ou da coleta)
+KEYWORD_INDEX = KeywordIndex(date_expression='COALESCE(c.complaint_date, date(c.scraped_at))')
+
+# Quase duplicatas (MinHash/LSH sobre a descrição), inclusive entre sites
+NEAR_DUPLICATES = NearDuplicateIndex(**DATABASE_CONFIG['near_duplicates'])
+
+# Rendimento (reclamações gravadas por requisição) de cada site, para dividir as páginas
+CRAWL_BUDGET = CrawlBudget(
+    policy=SCRAPING_CONFIG['crawl_budget']['policy'],
+    exploration=SCRAPING_CONFIG['crawl_budget']['exploration'],
+    decay=SCRAPING_CONFIG['crawl_budget']['decay'],
+)
+
+# Colunas indexadas pela busca textual e seus pesos no BM25 (título pesa mais)
+FTS_COLUMNS = ('title', 'description', 'company_response')
+FTS_WEIGHTS = (4.0, 1.0, 0.5)
+
+FTS_PHRASE_PATTERN = re.compile(r'"([^"]+)"|(\w+)')
+
+
+def parse_search_cursor(cursor: str) -> Optional[Tuple[float, int]]:
+    """(score, id) de um next_cursor de search; None se o cursor for inválido"""
+    last_score, separator, last_id = (cursor or '').partition(':')
+    try:
+        score, complaint_id = float(last_score), int(last_id)
+    except ValueError:
+        return None
+    if not separator or not math.isfinite(score):
+        return None
+    return score, complaint_id
+
+
+def _fts_query(text: str) -> str:
+    """Converte o texto digitado em uma consulta FTS5 segura.
+
+    Cada palavra vira um termo entre aspas (todos obrigatórios) e trechos
+    entre aspas viram frases; pontuação e operadores do FTS5 são ignorados.
+    """
+    terms = []
+    for phrase, word in FTS_PHRASE_PATTERN.findall(text or ''):
+        term = ' '.join(re.findall(r'\w+', phrase)) if phrase else word
+        if term:
+            terms.append(f'"{term}"')
+    return ' '.join(terms)
+
+
 class DatabaseManager:
     """Gerencia o banco de dados SQLite para armazenar reclamações"""
 
-    def __init__(self, db_path: str = DATABASE_CONFIG['db_path']):
+    def __init__(self, db_path: str = DATABASE_CONFIG['db_path'],
+                 persistent: bool = DATABASE_CONFIG['persistent_connection']):
         self.db_path = db_path
+        self.persistent = persistent
+        self._conn = None
+        self.company_resolver = CompanyResolver()
         self.init_database()
+        self.corpus_stats = self.load_corpus_stats()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Retorna a conexão persistente (criada uma vez) ou uma nova conexão"""
+        if not self.persistent:
+            return sqlite3.connect(self.db_path)
+
+        if self._conn is None:
+            self._conn = self._open_connection()
+
+        return self._conn
+
+    def _open_connection(self) -> sqlite3.Connection:
+        """Abre uma conexão com os pragmas configurados"""
+        conn = sqlite3.connect(self.db_path)
+        for pragma, value in DATABASE_CONFIG['pragmas'].items():
+            conn.execute(f'PRAGMA {pragma} = {value}')
+        return conn
+
+    def _release(self, conn: sqlite3.Connection):
+        """Fecha a conexão, exceto a persistente"""
+        if conn is not self._conn:
+            conn.close()
+
+    def create_writer(self, **options) -> DatabaseWriter:
+        """Cria a thread de gravação em segundo plano, com conexão própria.
+
+        Cada bloco retirado da fila é gravado por save_complaints_batch em
+        uma transação; options sobrescreve queue_size, batch_size e
+        flush_interval de DATABASE_CONFIG['writer'].
+        """
+        settings = {**DATABASE_CONFIG['writer'], **options}
+        # Cache de empresas próprio da thread (o da instância é usado pela thread principal)
+        company_resolver = CompanyResolver()
+        return DatabaseWriter(
+            connect=self._open_connection,
+            write_batch=lambda conn, complaints: self.save_complaints_batch(
+                complaints, conn=conn, company_resolver=company_resolver
+            ),
+            on_close=lambda conn: conn.execute('PRAGMA wal_checkpoint(TRUNCATE)'),
+            queue_size=settings['queue_size'],
+            batch_size=settings['batch_size'],
+            flush_interval=settings['flush_interval'],
+        )
+
+    def close(self):
+        """Fecha a conexão persistente"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
 
     def init_database(self):
 
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
 
 
@@ -29,6 +167,7 @@ class DatabaseManager:
                     site_source TEXT NOT NULL,
                     company_name TEXT,
                     complaint_date DATE,
+                    complaint_date_raw TEXT,
                     title TEXT,
                     description TEXT,
                     category TEXT,
@@ -38,18 +177,105 @@ class DatabaseManager:
                     url TEXT,
                     scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     ti_keywords TEXT,
-                    relevance_score REAL
+                    relevance_score REAL,
+                    ti_probability REAL,
+                    severity_level TEXT,
+                    ti_label INTEGER,
+                    content_hash TEXT,
+                    company_id INTEGER REFERENCES companies(id)
                 )
             ''')
 
+            # Bancos criados antes da chave de deduplicação por conteúdo, da tabela de empresas,
+            # do classificador de TI, da data bruta e da severidade
+            cursor.execute('PRAGMA table_info(complaints)')
+            existing_columns = {column[1] for column in cursor.fetchall()}
+            if 'content_hash' not in existing_columns:
+                cursor.execute('ALTER TABLE complaints ADD COLUMN content_hash TEXT')
+            if 'company_id' not in existing_columns:
+                cursor.execute('ALTER TABLE complaints ADD COLUMN company_id INTEGER REFERENCES companies(id)')
+            if 'ti_probability' not in existing_columns:
+                cursor.execute('ALTER TABLE complaints ADD COLUMN ti_probability REAL')
+                # Rótulo manual (1 = TI, 0 = não é TI) usado no treino do classificador
+                cursor.execute('ALTER TABLE complaints ADD COLUMN ti_label INTEGER')
+            if 'severity_level' not in existing_columns:
+                cursor.execute('ALTER TABLE complaints ADD COLUMN severity_level TEXT')
+                self._backfill_severity(cursor)
+            if 'complaint_date_raw' not in existing_columns:
+                # complaint_date guardava o texto da página (ou nada): vira o valor bruto a renormalizar
+                cursor.execute('ALTER TABLE complaints ADD COLUMN complaint_date_raw TEXT')
+                cursor.execute('UPDATE complaints SET complaint_date_raw = complaint_date WHERE complaint_date IS NOT NULL')
+
+            reset_outdated_fingerprints(cursor)
+            cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_content_hash ON complaints(content_hash)')
+            conn.commit()
+            self._backfill_content_hash(conn)
+
+            self.company_resolver.install(cursor)
+            self.company_resolver.load(cursor)
+            if 'company_id' not in existing_columns:
+                self.company_resolver.backfill(cursor)
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_company_id ON complaints(company_id)')
+            conn.commit()
+
 
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_site_source ON complaints(site_source)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_company_name ON complaints(company_name)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_complaint_date ON complaints(complaint_date)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_scraped_at ON complaints(scraped_at)')
 
+            # Estatísticas do corpus para o scorer BM25, atualizadas a cada reclamação salva
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS corpus_stats (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    doc_count INTEGER NOT NULL DEFAULT 0,
+                    total_length INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS keyword_doc_freq (
+                    keyword TEXT PRIMARY KEY,
+                    doc_count INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            cursor.execute('INSERT OR IGNORE INTO corpus_stats (id, doc_count, total_length) VALUES (1, 0, 0)')
+
+            # Última reclamação exportada por destino (exportações incrementais)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS export_state (
+                    target TEXT PRIMARY KEY,
+                    last_id INTEGER NOT NULL,
+                    exported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            self.fts_enabled = self._init_fts(cursor)
+
+            keyword_index_created = KEYWORD_INDEX.install(cursor)
+            near_duplicates_created = NEAR_DUPLICATES.install(cursor)
+            CRAWL_BUDGET.install(cursor)
+
+            # Contagens por site, empresa, severidade e dia, mantidas por triggers
+            if COMPLAINT_STATS.install(cursor):
+                COMPLAINT_STATS.rebuild(cursor)
+
             conn.commit()
-            conn.close()
+
+            if keyword_index_created:
+                self._backfill_keyword_index(conn)
+            if near_duplicates_created:
+                self._backfill_near_duplicates(conn)
+
+            cursor.execute('SELECT doc_count FROM corpus_stats WHERE id = 1')
+            corpus_docs = cursor.fetchone()[0]
+            cursor.execute('SELECT COUNT(*) FROM complaints')
+            total_complaints = cursor.fetchone()[0]
+            self._release(conn)
+
+            if corpus_docs != total_complaints:
+                self.rebuild_corpus_stats()
+            if 'complaint_date_raw' not in existing_columns:
+                self.renormalize_dates()
 
             logger.info(f"Banco de dados inicializado: {self.db_path}")
 
@@ -57,60 +283,321 @@ class DatabaseManager:
             logger.error(f"Erro ao inicializar banco de dados: {e}")
             raise
 
-    def save_complaint(self, complaint_data: Dict) -> bool:
+    @staticmethod
+    def _init_fts(cursor: sqlite3.Cursor) -> bool:
+        """Cria o índice FTS5 (title, description, company_response) e os
+        triggers que o mantêm sincronizado com complaints.
+
+        Retorna False se o SQLite não tiver suporte a FTS5.
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'complaints_fts'")
+        exists = cursor.fetchone() is not None
 
         try:
-            conn = sqlite3.connect(self.db_path)
+            cursor.execute(f'''
+                CREATE VIRTUAL TABLE IF NOT EXISTS complaints_fts USING fts5(
+                    {', '.join(FTS_COLUMNS)},
+                    content = 'complaints',
+                    content_rowid = 'id',
+                    tokenize = 'unicode61 remove_diacritics 2'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Busca textual indisponível (FTS5): {e}")
+            return False
+
+        new_values = ', '.join(f'new.{column}' for column in FTS_COLUMNS)
+        old_values = ', '.join(f'old.{column}' for column in FTS_COLUMNS)
+
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS complaints_fts_ai AFTER INSERT ON complaints BEGIN
+                INSERT INTO complaints_fts (rowid, {', '.join(FTS_COLUMNS)}) VALUES (new.id, {new_values});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS complaints_fts_ad AFTER DELETE ON complaints BEGIN
+                INSERT INTO complaints_fts (complaints_fts, rowid, {', '.join(FTS_COLUMNS)})
+                VALUES ('delete', old.id, {old_values});
+            END
+        ''')
+        # Só reindexa quando muda o texto (não no rescore, por exemplo)
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS complaints_fts_au AFTER UPDATE OF {', '.join(FTS_COLUMNS)} ON complaints BEGIN
+                INSERT INTO complaints_fts (complaints_fts, rowid, {', '.join(FTS_COLUMNS)})
+                VALUES ('delete', old.id, {old_values});
+                INSERT INTO complaints_fts (rowid, {', '.join(FTS_COLUMNS)}) VALUES (new.id, {new_values});
+            END
+        ''')
+
+        # Índice recém-criado em um banco que já tinha reclamações
+        if not exists:
+            cursor.execute("INSERT INTO complaints_fts (complaints_fts) VALUES ('rebuild')")
+
+        return True
+
+    def save_complaint(self, complaint_data: Union[Complaint, Dict]) -> bool:
+
+        return self.save_complaints_batch([complaint_data]) == 1
+
+    def save_complaints_batch(self, complaints: Iterable[Union[Complaint, Dict]],
+                              conn: Optional[sqlite3.Connection] = None,
+                              company_resolver: Optional[CompanyResolver] = None) -> int:
+        """Salva várias reclamações em uma única transação e retorna quantas eram novas
+
+        conn permite gravar por outra conexão (a da thread de gravação), com
+        o cache de empresas company_resolver. Nesse caso um erro desfaz a
+        transação e é propagado, para que o writer conte as reclamações perdidas.
+        """
+        owns_connection = conn is None
+        company_resolver = company_resolver or self.company_resolver
+        try:
+            complaints = [Complaint.coerce(complaint) for complaint in complaints]
+            if not complaints:
+                return 0
+
+            if owns_connection:
+                conn = self._connect()
             cursor = conn.cursor()
 
-            
+            # Trava de escrita antes de ler MAX(id): até o commit nenhuma outra
+            # conexão (thread de gravação ou outro processo) insere, então os ids
+            # acima de last_id são todos deste bloco
+            if not conn.in_transaction:
+                cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('SELECT COALESCE(MAX(id), 0) FROM complaints')
+            last_id = cursor.fetchone()[0]
+
+            for complaint in complaints:
+                complaint.company_id = company_resolver.resolve(cursor, complaint.company_name)
+                if complaint.severity_level is None:
+                    complaint.severity_level = classify_severity(f'{complaint.title or ""} {complaint.description or ""}')
+
+            # Insere as novas; as já existentes (mesmo content_hash) só têm status e resposta atualizados
+            cursor.executemany(UPSERT_COMPLAINT_SQL, [complaint.to_row() for complaint in complaints])
+
+            cursor.execute('''
+                SELECT id, site_source, title, description, ti_keywords FROM complaints WHERE id > ?
+            ''', (last_id,))
+            new_rows = cursor.fetchall()
+            new_entries = [
+                self._corpus_entry({'title': title, 'description': description, 'ti_keywords': ti_keywords})
+                for _, _, title, description, ti_keywords in new_rows
+            ]
+
+            self._update_corpus_stats(cursor, new_entries)
+            KEYWORD_INDEX.add(cursor, [(row[0], self._keyword_counts(*row[1:])) for row in new_rows])
+            near_duplicates = NEAR_DUPLICATES.add_many(
+                cursor, [(complaint_id, description or title) for complaint_id, _, title, description, _ in new_rows]
+            )
+
+            conn.commit()
+            if owns_connection:
+                self._release(conn)
+
+            self.corpus_stats.add_documents(new_entries)
+
+            logger.info(f"{len(new_entries)} reclamações salvas ({len(complaints) - len(new_entries)} já existiam, "
+                        f"{near_duplicates} quase duplicadas de outras)")
+            return len(new_entries)
+
+        except Exception as e:
+            if conn is not None:
+                conn.rollback()
+            # Empresas criadas nesta transação foram desfeitas
+            company_resolver.clear()
+            if not owns_connection:
+                raise
+            logger.error(f"Erro ao salvar reclamações: {e}")
+            return 0
+
+    @staticmethod
+    def _backfill_severity(cursor: sqlite3.Cursor, batch_size: int = 10000):
+        """Calcula severity_level (regras de severity_rules.txt) das reclamações antigas"""
+        last_id = 0
+        while True:
             cursor.execute('''
-                SELECT id FROM complaints
-                WHERE site_source = ? AND title = ? AND company_name = ?
-            ''', (complaint_data.get('site_source'),
-                  complaint_data.get('title'),
-                  complaint_data.get('company_name')))
-
-            if cursor.fetchone():
-                logger.debug(f"Reclamação já existe: {complaint_data.get('title')}")
-                conn.close()
-                return False
-
-            # Insere nova reclamação
+                SELECT id, title, description FROM complaints WHERE id > ? ORDER BY id LIMIT ?
+            ''', (last_id, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            cursor.executemany('UPDATE complaints SET severity_level = ? WHERE id = ?', [
+                (classify_severity(f'{title or ""} {description or ""}'), complaint_id)
+                for complaint_id, title, description in rows
+            ])
+            last_id = rows[-1][0]
+
+    @staticmethod
+    def _backfill_content_hash(conn: sqlite3.Connection, batch_size: int = 10000):
+        """Preenche content_hash das reclamações antigas.
+
+        Duplicatas já gravadas ficam com content_hash NULL (UPDATE OR IGNORE),
+        mantendo apenas a primeira ocorrência na chave única.
+        """
+        cursor = conn.cursor()
+        last_id = 0
+
+        while True:
             cursor.execute('''
-                INSERT INTO complaints (
-                    site_source, company_name, complaint_date, title, description,
-                    category, rating, status, company_response, url, ti_keywords, relevance_score
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                complaint_data.get('site_source'),
-                complaint_data.get('company_name'),
-                complaint_data.get('complaint_date'),
-                complaint_data.get('title'),
-                complaint_data.get('description'),
-                complaint_data.get('category'),
-                complaint_data.get('rating'),
-                complaint_data.get('status'),
-                complaint_data.get('company_response'),
-                complaint_data.get('url'),
-                complaint_data.get('ti_keywords'),
-                complaint_data.get('relevance_score')
-            ))
+                SELECT id, site_source, title, company_name, description FROM complaints
+                WHERE content_hash IS NULL AND id > ?
+                ORDER BY id
+                LIMIT ?
+            ''', (last_id, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
 
+            cursor.executemany('UPDATE OR IGNORE complaints SET content_hash = ? WHERE id = ?', [
+                (content_fingerprint(site_source, title, company_name, description), complaint_id)
+                for complaint_id, site_source, title, company_name, description in rows
+            ])
             conn.commit()
-            conn.close()
+            last_id = rows[-1][0]
+
+    @staticmethod
+    def _update_corpus_stats(cursor, entries: List):
+        """Soma novas reclamações às estatísticas do corpus persistidas"""
+        if not entries:
+            return
+
+        keyword_counts: Dict[str, int] = {}
+        for keywords, _ in entries:
+            for keyword in keywords:
+                keyword_counts[keyword] = keyword_counts.get(keyword, 0) + 1
+
+        cursor.execute('UPDATE corpus_stats SET doc_count = doc_count + ?, total_length = total_length + ? WHERE id = 1',
+                       (len(entries), sum(length for _, length in entries)))
+        cursor.executemany('''
+            INSERT INTO keyword_doc_freq (keyword, doc_count) VALUES (?, ?)
+            ON CONFLICT(keyword) DO UPDATE SET doc_count = doc_count + excluded.doc_count
+        ''', keyword_counts.items())
+
+    @staticmethod
+    def _keyword_counts(site_source: Optional[str], title: Optional[str], description: Optional[str],
+                        ti_keywords: Optional[str]) -> Dict[str, int]:
+        """Ocorrências de cada palavra-chave de ti_keywords no título e na descrição"""
+        keywords = [keyword for keyword in (ti_keywords or '').split(',') if keyword]
+        if not keywords:
+            return {}
+
+        language = SITES_CONFIG.get(site_source, {}).get('language', 'pt')
+        matcher = get_matcher(tuple(keyword.lower() for keyword in TI_KEYWORDS),
+                              language=language if RELEVANCE_CONFIG['stemming'] else None)
+        counts = matcher.count(f"{title or ''} {description or ''}")
+
+        # Palavras-chave que o matcher atual não encontra (ex.: de um scorer antigo) contam uma vez
+        return {keyword: counts.get(keyword, 1) for keyword in keywords}
+
+    def _backfill_keyword_index(self, conn: sqlite3.Connection, batch_size: int = 10000):
+        """Indexa as palavras-chave das reclamações gravadas antes do índice existir"""
+        cursor = conn.cursor()
+        last_id = 0
+
+        while True:
+            cursor.execute('''
+                SELECT id, site_source, title, description, ti_keywords FROM complaints
+                WHERE id > ?
+                ORDER BY id
+                LIMIT ?
+            ''', (last_id, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            KEYWORD_INDEX.add(cursor, [(row[0], self._keyword_counts(*row[1:])) for row in rows])
+            conn.commit()
+            last_id = rows[-1][0]
+
+    @staticmethod
+    def _backfill_near_duplicates(conn: sqlite3.Connection, batch_size: int = 10000):
+        """Calcula as assinaturas MinHash (e liga as quase duplicatas) das reclamações antigas"""
+        cursor = conn.cursor()
+        last_id = 0
+
+        while True:
+            cursor.execute('''
+                SELECT id, title, description FROM complaints
+                WHERE id > ?
+                ORDER BY id
+                LIMIT ?
+            ''', (last_id, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            NEAR_DUPLICATES.add_many(cursor, [(complaint_id, description or title) for complaint_id, title, description in rows])
+            conn.commit()
+            last_id = rows[-1][0]
+
+    @staticmethod
+    def _corpus_entry(complaint_data: Union[Complaint, Dict]):
+        """Palavras-chave (únicas) e tamanho em tokens de uma reclamação para o corpus"""
+        keywords = set(keyword for keyword in (complaint_data.get('ti_keywords') or '').split(',') if keyword)
+        text = f"{complaint_data.get('title') or ''} {complaint_data.get('description') or ''}"
+        return keywords, len(text.split())
+
+    def load_corpus_stats(self) -> CorpusStats:
+        """Carrega as estatísticas do corpus usadas pelo scorer BM25"""
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+
+            cursor.execute('SELECT doc_count, total_length FROM corpus_stats WHERE id = 1')
+            doc_count, total_length = cursor.fetchone()
+
+            cursor.execute('SELECT keyword, doc_count FROM keyword_doc_freq')
+            doc_freq = dict(cursor.fetchall())
 
-            logger.info(f"Reclamação salva: {complaint_data.get('title')}")
+            self._release(conn)
+            return CorpusStats(doc_count, total_length, doc_freq)
+
+        except Exception as e:
+            logger.error(f"Erro ao carregar estatísticas do corpus: {e}")
+            return CorpusStats()
+
+    def rebuild_corpus_stats(self, batch_size: int = 10000) -> bool:
+        """Recalcula as estatísticas do corpus a partir de todas as reclamações"""
+        try:
+            conn = self._connect()
+            read_cursor = conn.cursor()
+            stats = CorpusStats()
+
+            read_cursor.execute('SELECT title, description, ti_keywords FROM complaints')
+            while True:
+                rows = read_cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for title, description, ti_keywords in rows:
+                    stats.add_document(*self._corpus_entry({
+                        'title': title, 'description': description, 'ti_keywords': ti_keywords
+                    }))
+
+            cursor = conn.cursor()
+            cursor.execute('UPDATE corpus_stats SET doc_count = ?, total_length = ? WHERE id = 1',
+                           (stats.doc_count, stats.total_length))
+            cursor.execute('DELETE FROM keyword_doc_freq')
+            cursor.executemany('INSERT INTO keyword_doc_freq (keyword, doc_count) VALUES (?, ?)',
+                               stats.doc_freq.items())
+
+            conn.commit()
+            self._release(conn)
+
+            if hasattr(self, 'corpus_stats'):
+                self.corpus_stats.replace(stats)
+
+            logger.info(f"Estatísticas do corpus recalculadas: {stats.doc_count} documentos")
             return True
 
         except Exception as e:
-            logger.error(f"Erro ao salvar reclamação: {e}")
+            logger.error(f"Erro ao recalcular estatísticas do corpus: {e}")
             return False
 
     def get_complaints_count(self, site_source: Optional[str] = None) -> int:
         """Retorna o número total de reclamações"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
 
             if site_source:
@@ -119,7 +606,7 @@ class DatabaseManager:
                 cursor.execute('SELECT COUNT(*) FROM complaints')
 
             count = cursor.fetchone()[0]
-            conn.close()
+            self._release(conn)
 
             return count
 
@@ -127,15 +614,96 @@ class DatabaseManager:
             logger.error(f"Erro ao contar reclamações: {e}")
             return 0
 
-    def export_to_csv(self, csv_path: str = DATABASE_CONFIG['csv_path']) -> bool:
-        """Exporta todas as reclamações para um arquivo CSV"""
+    def get_complaint_columns(self) -> List[str]:
+        """Colunas da tabela complaints, na ordem de SELECT *"""
+        conn = self._connect()
+        cursor = conn.execute('PRAGMA table_info(complaints)')
+        columns = [column[1] for column in cursor.fetchall()]
+        self._release(conn)
+        return columns
+
+    def get_export_mark(self, target: str) -> int:
+        """Maior id já exportado para o destino (0 se nunca exportado)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            df = pd.read_sql_query('SELECT * FROM complaints ORDER BY scraped_at DESC', conn)
-            conn.close()
+            conn = self._connect()
+            cursor = conn.cursor()
+            cursor.execute('SELECT last_id FROM export_state WHERE target = ?', (target,))
+            row = cursor.fetchone()
+            self._release(conn)
+            return row[0] if row else 0
+
+        except Exception as e:
+            logger.error(f"Erro ao consultar última exportação de {target}: {e}")
+            return 0
 
-            df.to_csv(csv_path, index=False, encoding='utf-8')
-            logger.info(f"Dados exportados para CSV: {csv_path}")
+    def set_export_mark(self, target: str, last_id: int):
+        """Registra o maior id exportado para o destino"""
+        conn = self._connect()
+        conn.execute('''
+            INSERT INTO export_state (target, last_id, exported_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(target) DO UPDATE SET last_id = excluded.last_id, exported_at = excluded.exported_at
+        ''', (target, last_id))
+        conn.commit()
+        self._release(conn)
+
+    def iter_complaint_chunks(self, after_id: int = 0,
+                              chunk_size: int = DATABASE_CONFIG['export_chunk_size']) -> Iterator[Tuple[List[str], List[Tuple]]]:
+        """Percorre as reclamações com id > after_id em ordem de id, em blocos de
+        chunk_size linhas: gera (colunas, linhas) sem carregar a tabela em memória"""
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM complaints WHERE id > ? ORDER BY id', (after_id,))
+            columns = [description[0] for description in cursor.description]
+
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield columns, rows
+        finally:
+            self._release(conn)
+
+    def export_to_csv(self, csv_path: str = DATABASE_CONFIG['csv_path'], incremental: bool = False,
+                      compress: Optional[bool] = None,
+                      chunk_size: int = DATABASE_CONFIG['export_chunk_size']) -> bool:
+        """Exporta as reclamações para CSV em blocos, sem carregar a tabela em memória
+
+        Com incremental=True só as reclamações com id acima da última exportação
+        para o mesmo arquivo são acrescentadas ao final. compress grava em gzip
+        (padrão: quando o caminho termina em .gz).
+        """
+        if compress is None:
+            compress = csv_path.endswith('.gz')
+
+        try:
+            last_id = 0
+            if incremental and os.path.exists(csv_path):
+                last_id = self.get_export_mark(csv_path)
+
+            # Modo completo grava em arquivo temporário e só substitui o anterior no fim
+            append = last_id > 0
+            output_path = csv_path if append else csv_path + '.tmp'
+            opener = gzip.open if compress else open
+            exported = 0
+            max_id = last_id
+
+            with opener(output_path, 'at' if append else 'wt', newline='', encoding='utf-8') as csv_file:
+                writer = csv.writer(csv_file)
+                if not append:
+                    writer.writerow(self.get_complaint_columns())
+
+                for _, rows in self.iter_complaint_chunks(last_id, chunk_size):
+                    writer.writerows(rows)
+                    exported += len(rows)
+                    max_id = rows[-1][0]
+
+            if not append:
+                os.replace(output_path, csv_path)
+
+            self.set_export_mark(csv_path, max_id)
+
+            logger.info(f"{exported} reclamações exportadas para CSV: {csv_path}")
             return True
 
         except Exception as e:
@@ -145,7 +713,7 @@ class DatabaseManager:
     def get_recent_complaints(self, limit: int = 100) -> List[Dict]:
         """Retorna as reclamações mais recentes"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
 
             cursor.execute('''
@@ -160,54 +728,427 @@ class DatabaseManager:
             for row in cursor.fetchall():
                 complaints.append(dict(zip(columns, row)))
 
-            conn.close()
+            self._release(conn)
             return complaints
 
         except Exception as e:
             logger.error(f"Erro ao buscar reclamações recentes: {e}")
             return []
 
-    def get_stats(self) -> Dict:
-        """Retorna estatísticas do banco de dados"""
+    def search(self, query: str, site: Optional[str] = None, company: Optional[str] = None,
+               since: Optional[str] = None, limit: int = 20, cursor: Optional[str] = None) -> Dict:
+        """Busca textual nas reclamações, ordenada por relevância (BM25 do FTS5).
+
+        Termos soltos precisam aparecer todos (sem diferenciar acentos);
+        trechos entre aspas são buscados como frase. since filtra por
+        complaint_date (AAAA-MM-DD). Retorna {'results': [...], 'next_cursor'};
+        passar next_cursor como cursor traz a página seguinte.
+        """
+        if not self.fts_enabled:
+            logger.error("Busca textual indisponível: SQLite sem suporte a FTS5")
+            return {'results': [], 'next_cursor': None}
+
+        match = _fts_query(query)
+        if not match:
+            return {'results': [], 'next_cursor': None}
+
+        filters = []
+        params: List = [match]
+        if site:
+            filters.append('c.site_source = ?')
+            params.append(site)
+        if company:
+            # Pela empresa canônica: qualquer variação do nome encontra todas
+            filters.append('c.company_id = (SELECT company_id FROM company_aliases WHERE alias = ?)')
+            params.append(company_key(company))
+        if since:
+            filters.append('c.complaint_date >= ?')
+            params.append(since)
+        if cursor:
+            # Paginação por chave (score, id): não relê as páginas anteriores
+            position = parse_search_cursor(cursor)
+            if position is None:
+                logger.error(f"Cursor de busca inválido: {cursor!r}")
+                return {'results': [], 'next_cursor': None}
+            filters.append('(hits.score, c.id) > (?, ?)')
+            params.extend(position)
+        params.append(limit)
+
+        try:
+            conn = self._connect()
+            db_cursor = conn.cursor()
+
+            db_cursor.execute(f'''
+                WITH hits AS (
+                    SELECT rowid AS id,
+                           bm25(complaints_fts, {', '.join(str(weight) for weight in FTS_WEIGHTS)}) AS score,
+                           snippet(complaints_fts, -1, '[', ']', '...', 16) AS snippet
+                    FROM complaints_fts
+                    WHERE complaints_fts MATCH ?
+                )
+                SELECT c.id, c.site_source, c.company_name, c.complaint_date, c.title, c.url,
+                       c.relevance_score, hits.snippet, hits.score
+                FROM hits JOIN complaints c ON c.id = hits.id
+                {'WHERE ' + ' AND '.join(filters) if filters else ''}
+                ORDER BY hits.score, c.id
+                LIMIT ?
+            ''', params)
+
+            columns = [description[0] for description in db_cursor.description]
+            results = [dict(zip(columns, row)) for row in db_cursor.fetchall()]
+            self._release(conn)
+
+            next_cursor = None
+            if len(results) == limit:
+                next_cursor = f"{results[-1]['score']!r}:{results[-1]['id']}"
+
+            return {'results': results, 'next_cursor': next_cursor}
+
+        except Exception as e:
+            logger.error(f"Erro na busca por '{query}': {e}")
+            return {'results': [], 'next_cursor': None}
+
+    def rescore_complaints(self, text_processor, batch_size: int = 10000) -> int:
+        """Recalcula relevance_score e ti_keywords de todas as reclamações em lotes"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
 
-            # Contagem total
-            cursor.execute('SELECT COUNT(*) FROM complaints')
-            total_complaints = cursor.fetchone()[0]
+            last_id = 0
+            updated = 0
 
-            # Contagem por site
-            cursor.execute('''
-                SELECT site_source, COUNT(*) as count
-                FROM complaints
-                GROUP BY site_source
-            ''')
-            by_site = dict(cursor.fetchall())
+            while True:
+                cursor.execute('''
+                    SELECT id, title, description FROM complaints
+                    WHERE id > ?
+                    ORDER BY id
+                    LIMIT ?
+                ''', (last_id, batch_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    break
 
-            # Contagem por empresa (top 10)
-            cursor.execute('''
-                SELECT company_name, COUNT(*) as count
-                FROM complaints
-                GROUP BY company_name
-                ORDER BY count DESC
-                LIMIT 10
-            ''')
-            top_companies = dict(cursor.fetchall())
+                batch = text_processor.score_batch(f"{title or ''} {description or ''}" for _, title, description in rows)
 
-            # Média de relevância
-            cursor.execute('SELECT AVG(relevance_score) FROM complaints WHERE relevance_score IS NOT NULL')
-            avg_relevance = cursor.fetchone()[0] or 0
+                cursor.executemany('UPDATE complaints SET relevance_score = ?, ti_keywords = ? WHERE id = ?', [
+                    (int(score), ','.join(text_processor.keywords_from_hits(hits)), row[0])
+                    for row, score, hits in zip(rows, batch['scores'], batch['hits'])
+                ])
+                KEYWORD_INDEX.add(cursor, [
+                    (row[0], text_processor.keyword_counts_from_hits(hits)) for row, hits in zip(rows, batch['hits'])
+                ], replace=True)
+                conn.commit()
 
-            conn.close()
+                updated += len(rows)
+                last_id = rows[-1][0]
+
+            self._release(conn)
+
+            # As palavras-chave mudaram: a frequência por documento precisa ser refeita
+            self.rebuild_corpus_stats(batch_size)
+
+            logger.info(f"Relevância recalculada para {updated} reclamações")
+            return updated
+
+        except Exception as e:
+            logger.error(f"Erro ao recalcular relevância: {e}")
+            return 0
+
+    def get_labeled_texts(self) -> Tuple[List[str], List[int]]:
+        """Textos (título + descrição) e rótulos ti_label das reclamações rotuladas"""
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            cursor.execute('SELECT title, description, ti_label FROM complaints WHERE ti_label IS NOT NULL ORDER BY id')
+            rows = cursor.fetchall()
+            self._release(conn)
+
+            return [f"{title or ''} {description or ''}" for title, description, _ in rows], [int(label) for _, _, label in rows]
+
+        except Exception as e:
+            logger.error(f"Erro ao buscar reclamações rotuladas: {e}")
+            return [], []
+
+    def set_ti_labels(self, labels: Dict[int, Optional[int]]) -> int:
+        """Grava rótulos manuais {id: 1 (TI), 0 (não é TI) ou None (remove)}"""
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            cursor.executemany('UPDATE complaints SET ti_label = ? WHERE id = ?',
+                               [(label, complaint_id) for complaint_id, label in labels.items()])
+            conn.commit()
+            updated = cursor.rowcount
+            self._release(conn)
+            return updated
+
+        except Exception as e:
+            logger.error(f"Erro ao gravar rótulos de TI: {e}")
+            return 0
+
+    def update_ti_probabilities(self, classifier, batch_size: int = 10000) -> int:
+        """Recalcula ti_probability de todas as reclamações com o classificador treinado"""
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+
+            last_id = 0
+            updated = 0
+
+            while True:
+                cursor.execute('''
+                    SELECT id, title, description FROM complaints
+                    WHERE id > ?
+                    ORDER BY id
+                    LIMIT ?
+                ''', (last_id, batch_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+
+                probabilities = classifier.predict_proba([f"{title or ''} {description or ''}" for _, title, description in rows])
+                cursor.executemany('UPDATE complaints SET ti_probability = ? WHERE id = ?', [
+                    (float(probability), row[0]) for row, probability in zip(rows, probabilities)
+                ])
+                conn.commit()
+
+                updated += len(rows)
+                last_id = rows[-1][0]
+
+            self._release(conn)
+
+            logger.info(f"Probabilidade de TI recalculada para {updated} reclamações")
+            return updated
+
+        except Exception as e:
+            logger.error(f"Erro ao recalcular probabilidade de TI: {e}")
+            return 0
+
+    def renormalize_dates(self, batch_size: int = 10000) -> int:
+        """Recalcula complaint_date (AAAA-MM-DD) a partir de complaint_date_raw,
+        com datas relativas contadas a partir de scraped_at"""
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+
+            last_id = 0
+            updated = 0
+
+            while True:
+                cursor.execute('''
+                    SELECT id, complaint_date_raw, scraped_at, complaint_date FROM complaints
+                    WHERE complaint_date_raw IS NOT NULL AND id > ?
+                    ORDER BY id
+                    LIMIT ?
+                ''', (last_id, batch_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+
+                dates = normalize_dates((row[1] for row in rows), (row[2] for row in rows))
+                changes = [(date, row[0]) for row, date in zip(rows, dates) if date != row[3]]
+                cursor.executemany('UPDATE complaints SET complaint_date = ? WHERE id = ?', changes)
+                conn.commit()
+
+                updated += len(changes)
+                last_id = rows[-1][0]
+
+            self._release(conn)
+
+            logger.info(f"Datas renormalizadas para {updated} reclamações")
+            return updated
+
+        except Exception as e:
+            logger.error(f"Erro ao renormalizar datas: {e}")
+            return 0
+
+    def find_by_keyword(self, keyword: str, since: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """Reclamações com a palavra-chave desde a data since (AAAA-MM-DD), mais recentes primeiro"""
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+
+            ids = KEYWORD_INDEX.complaint_ids(cursor, keyword, since, limit)
+            cursor.execute(f"SELECT * FROM complaints WHERE id IN ({', '.join('?' * len(ids))}) ORDER BY id DESC", ids)
+
+            columns = [description[0] for description in cursor.description]
+            complaints = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+            self._release(conn)
+            return complaints
+
+        except Exception as e:
+            logger.error(f"Erro ao buscar reclamações com '{keyword}': {e}")
+            return []
+
+    def get_keyword_trend(self, keyword: str, since: Optional[str] = None, period: str = 'day') -> List[Dict]:
+        """Reclamações e ocorrências da palavra-chave por dia ou mês ('day' ou 'month')"""
+        try:
+            conn = self._connect()
+            rows = KEYWORD_INDEX.trend(conn.cursor(), keyword, since, period)
+            self._release(conn)
+
+            return [{'period': bucket, 'complaints': complaints, 'occurrences': occurrences}
+                    for bucket, complaints, occurrences in rows]
+
+        except Exception as e:
+            logger.error(f"Erro ao calcular tendência de '{keyword}': {e}")
+            return []
+
+    def get_keyword_companies(self, keyword: str, since: Optional[str] = None, limit: int = 10) -> Dict:
+        """Empresas com mais reclamações com a palavra-chave"""
+        try:
+            conn = self._connect()
+            companies = KEYWORD_INDEX.by_company(conn.cursor(), keyword, since, limit)
+            self._release(conn)
+            return companies
+
+        except Exception as e:
+            logger.error(f"Erro ao agrupar '{keyword}' por empresa: {e}")
+            return {}
+
+    def get_near_duplicates(self, complaint_id: int) -> List[Dict]:
+        """Reclamações ligadas como quase duplicatas (de qualquer site), da mais parecida à menos"""
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+
+            links = dict(NEAR_DUPLICATES.linked(cursor, complaint_id))
+            cursor.execute(f'''
+                SELECT id, site_source, company_name, complaint_date, title, url FROM complaints
+                WHERE id IN ({', '.join('?' * len(links))})
+            ''', list(links))
+
+            columns = [description[0] for description in cursor.description]
+            duplicates = [dict(zip(columns, row), similarity=links[row[0]]) for row in cursor.fetchall()]
+
+            self._release(conn)
+            return sorted(duplicates, key=lambda duplicate: duplicate['similarity'], reverse=True)
+
+        except Exception as e:
+            logger.error(f"Erro ao buscar quase duplicatas de {complaint_id}: {e}")
+            return []
+
+    def get_stats(self) -> Dict:
+        """Retorna estatísticas do banco de dados (lidas da tabela de resumo)"""
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+
+            total_complaints, avg_relevance = COMPLAINT_STATS.total(cursor)
+            by_site = COMPLAINT_STATS.counts(cursor, 'site')
+            by_severity = COMPLAINT_STATS.counts(cursor, 'severity')
+            top_companies = {
+                self.company_resolver.name(cursor, int(company_id) if company_id else None): count
+                for company_id, count in COMPLAINT_STATS.counts(cursor, 'company', limit=10).items()
+            }
+
+            self._release(conn)
 
             return {
                 'total_complaints': total_complaints,
                 'by_site': by_site,
+                'by_severity': by_severity,
                 'top_companies': top_companies,
-                'avg_relevance_score': round(avg_relevance, 2)
+                'avg_relevance_score': round(avg_relevance or 0, 2)
             }
 
         except Exception as e:
             logger.error(f"Erro ao gerar estatísticas: {e}")
             return {}
+
+    def get_daily_counts(self, limit: Optional[int] = None) -> Dict[str, int]:
+        """Reclamações coletadas por dia (AAAA-MM-DD), do dia mais recente ao mais antigo"""
+        try:
+            conn = self._connect()
+            counts = COMPLAINT_STATS.counts(conn.cursor(), 'day')
+            self._release(conn)
+
+            days = sorted(counts, key=lambda day: day or '', reverse=True)[:limit]
+            return {day: counts[day] for day in days}
+
+        except Exception as e:
+            logger.error(f"Erro ao buscar contagens diárias: {e}")
+            return {}
+
+    def allocate_crawl_budget(self, sites: Iterable[str], total: int,
+                              minimum: Union[int, Dict[str, int]] = 1) -> Dict[str, int]:
+        """Divide total requisições entre os sites pelo rendimento observado (com
+        exploração); vazio em caso de erro"""
+        sites = list(sites)
+        try:
+            conn = self._connect()
+            allocation = CRAWL_BUDGET.allocate(conn.cursor(), sites, total, minimum)
+            self._release(conn)
+            return allocation
+
+        except Exception as e:
+            logger.error(f"Erro ao dividir o orçamento de coleta: {e}")
+            return {}
+
+    def choose_crawl_terms(self, site: str, terms: Iterable[str], budget: int) -> List[str]:
+        """Os budget termos de busca de maior rendimento no site (com exploração);
+        os primeiros da lista em caso de erro"""
+        terms = list(terms)
+        try:
+            conn = self._connect()
+            chosen = CRAWL_BUDGET.choose_terms(conn.cursor(), site, terms, budget)
+            self._release(conn)
+            return chosen
+
+        except Exception as e:
+            logger.error(f"Erro ao escolher os termos de busca de {site}: {e}")
+            return terms[:budget]
+
+    def record_crawl_yield(self, site: str, fetches: int, stored: float,
+                           term_yields: Optional[Dict[str, Tuple[float, float]]] = None) -> bool:
+        """Registra as requisições feitas e as reclamações novas gravadas em uma coleta
+
+        term_yields (termo -> (requisições, reclamações gravadas)) divide a
+        coleta pelos termos buscados; o que não foi atribuído a nenhum termo
+        fica com o site (SITE_TERM).
+        """
+        term_yields = term_yields or {}
+        entries = [(site, term, term_fetches, term_stored) for term, (term_fetches, term_stored) in term_yields.items()]
+        entries.append((site, SITE_TERM,
+                        max(fetches - sum(term_fetches for term_fetches, _ in term_yields.values()), 0),
+                        max(stored - sum(term_stored for _, term_stored in term_yields.values()), 0)))
+        try:
+            conn = self._connect()
+            CRAWL_BUDGET.record(conn.cursor(), entries)
+            conn.commit()
+            self._release(conn)
+            return True
+
+        except Exception as e:
+            logger.error(f"Erro ao registrar rendimento de {site}: {e}")
+            return False
+
+    def get_crawl_yields(self) -> Dict[str, Dict[str, float]]:
+        """Requisições, reclamações gravadas e rendimento de cada site (contagens com decaimento)"""
+        try:
+            conn = self._connect()
+            yields = CRAWL_BUDGET.site_yields(conn.cursor())
+            self._release(conn)
+
+            return {
+                site: {'fetches': round(fetches, 2), 'stored': round(stored, 2),
+                       'yield': round(stored / fetches, 3) if fetches else None}
+                for site, (fetches, stored) in yields.items()
+            }
+
+        except Exception as e:
+            logger.error(f"Erro ao buscar rendimento dos sites: {e}")
+            return {}
+
+    def rebuild_complaint_stats(self) -> bool:
+        """Recalcula a tabela de resumo usada por get_stats"""
+        try:
+            conn = self._connect()
+            COMPLAINT_STATS.rebuild(conn.cursor())
+            conn.commit()
+            self._release(conn)
+            return True
+
+        except Exception as e:
+            logger.error(f"Erro ao recalcular estatísticas: {e}")
+            return False
@@ -0,0 +1,171 @@
+"""
+Gravação assíncrona no SQLite: uma thread dona da conexão consome uma fila limitada
+"""
+
+import atexit
+import logging
+import queue
+import signal
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Marcador de encerramento da fila
+_STOP = object()
+
+
+class _FlushRequest:
+    """Pedido de flush: liberado depois que tudo o que veio antes foi gravado"""
+
+    __slots__ = ('done',)
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class DatabaseWriter:
+    """Thread única de gravação alimentada por uma fila limitada.
+
+    A conexão é aberta por connect() dentro da própria thread, então os
+    produtores (threads de scraping) nunca tocam no SQLite. Os itens
+    submetidos são agrupados e entregues a write_batch(conn, itens), que
+    grava o bloco em uma transação e retorna quantos eram novos: o commit
+    acontece a cada batch_size itens ou a cada flush_interval segundos, o
+    que vier primeiro. Com a fila cheia, submit() bloqueia o produtor.
+    """
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection],
+                 write_batch: Callable[[sqlite3.Connection, List[Any]], int],
+                 queue_size: int = 1000, batch_size: int = 500, flush_interval: float = 1.0,
+                 on_close: Optional[Callable[[sqlite3.Connection], None]] = None,
+                 name: str = 'db-writer'):
+        self.connect = connect
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_close = on_close
+
+        self.saved_count = 0
+        self.error_count = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._closed = False
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+        atexit.register(self.close)
+
+    def submit(self, item: Any):
+        """Enfileira um item para gravação, bloqueando enquanto a fila estiver cheia"""
+        if self._closed:
+            raise RuntimeError('DatabaseWriter já foi fechado')
+        self._put(item)
+
+    def submit_many(self, items: List[Any]):
+        for item in items:
+            self.submit(item)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Grava tudo o que foi submetido até agora; retorna False se o tempo esgotar"""
+        if self._closed:
+            return True
+
+        request = _FlushRequest()
+        self._put(request)
+        return request.done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """Grava os itens pendentes, fecha a conexão e encerra a thread"""
+        if self._closed:
+            return
+
+        self._closed = True
+        if self._thread.is_alive():
+            self._put(_STOP)
+            self._thread.join(timeout)
+
+        atexit.unregister(self.close)
+
+    def _put(self, item: Any):
+        # put com timeout para não bloquear para sempre se a thread morrer
+        while True:
+            if not self._thread.is_alive():
+                raise RuntimeError('Thread de gravação não está em execução')
+            try:
+                self._queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _run(self):
+        try:
+            conn = self.connect()
+        except Exception as e:
+            logger.error(f"Erro ao abrir conexão de gravação: {e}")
+            self._ready.set()
+            return
+
+        self._ready.set()
+        pending: List[Any] = []
+        waiting: List[_FlushRequest] = []
+        deadline = None
+
+        try:
+            while True:
+                timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+
+                stop = item is _STOP
+                if isinstance(item, _FlushRequest):
+                    waiting.append(item)
+                elif item is not None and not stop:
+                    pending.append(item)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+
+                expired = deadline is not None and time.monotonic() >= deadline
+                if pending and (stop or waiting or expired or len(pending) >= self.batch_size):
+                    self._write(conn, pending)
+                    pending = []
+                    deadline = None
+
+                for request in waiting:
+                    request.done.set()
+                waiting = []
+
+                if stop:
+                    break
+        finally:
+            if pending:
+                self._write(conn, pending)
+            try:
+                if self.on_close:
+                    self.on_close(conn)
+            finally:
+                conn.close()
+
+    def _write(self, conn: sqlite3.Connection, items: List[Any]):
+        try:
+            self.saved_count += self.write_batch(conn, items)
+        except Exception as e:
+            self.error_count += len(items)
+            logger.error(f"Erro na gravação de {len(items)} itens: {e}")
+
+
+def install_shutdown_handler():
+    """Converte SIGTERM em SystemExit, para que os blocos finally fechem
+    (e gravem) os writers abertos antes de o processo terminar"""
+    if threading.current_thread() is not threading.main_thread():
+        return
+
+    def _handle(signum, frame):
+        raise SystemExit(128 + signum)
+
+    signal.signal(signal.SIGTERM, _handle)
@@ -0,0 +1,135 @@
+"""
+Gazetteer de empresas: encontra nomes conhecidos no texto em uma única passada
+"""
+
+import os
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from keyword_matcher import TokenMatcher, fold_accents
+
+# Só o banco do scraper principal: as empresas do scraper organizado saem
+# dos padrões de frase ("Sistema não funciona" -> "Sistema") e, lidas de
+# volta, fariam o erro se repetir a cada coleta
+DEFAULT_SOURCES = ('ti_complaints.db',)
+
+# Sites em que a empresa vem da página da empresa, não do texto da reclamação
+CURATED_SITES = ('reclame_aqui', 'trustpilot')
+
+# Empresas de outros sites entram só depois de vistas em tantas reclamações
+MIN_MENTIONS = 3
+
+# Nomes mais curtos que isso ("Oi", "C6") geram falsos positivos em texto livre
+MIN_NAME_LENGTH = 3
+
+# Palavras comuns em reclamações que os extratores às vezes tomam por empresa
+COMMON_WORDS = frozenset((
+    'empresa', 'sistema', 'problema', 'servico', 'atendimento', 'cliente', 'produto', 'pedido',
+    'site', 'app', 'aplicativo', 'loja', 'banco', 'suporte', 'reclamacao', 'reclame aqui',
+    'company', 'service', 'customer', 'support', 'review', 'reviews', 'trustpilot',
+))
+
+
+class CompanyGazetteer:
+    """Lista de empresas conhecidas compilada em um TokenMatcher.
+
+    A busca é por palavra inteira, sem diferenciar maiúsculas e acentos, e
+    percorre o texto uma vez só, independente da quantidade de empresas.
+    Variações (apelidos) apontam para o nome canônico. Variações que são
+    palavras comuns ou palavras-chave de TI (exclude) são ignoradas.
+    """
+
+    def __init__(self, names: Iterable[Tuple[str, str]] = (), exclude: Iterable[str] = ()):
+        # variação normalizada -> nome canônico
+        self._names: Dict[str, str] = {}
+        self._matcher: Optional[TokenMatcher] = None
+        self._excluded = COMMON_WORDS | {' '.join(fold_accents(word).split()) for word in exclude}
+        self.add(names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, names: Iterable[Tuple[str, str]]):
+        """Adiciona pares (variação, nome canônico)"""
+        for variant, name in names:
+            variant = ' '.join(fold_accents(variant or '').split())
+            if len(variant) >= MIN_NAME_LENGTH and name and variant not in self._excluded:
+                self._names.setdefault(variant, name)
+        self._matcher = None
+
+    def _compiled(self) -> TokenMatcher:
+        # Recompilado só quando a lista muda
+        if self._matcher is None:
+            self._matcher = TokenMatcher(self._names.keys())
+        return self._matcher
+
+    def find_all(self, text: str) -> List[str]:
+        """Empresas mencionadas no texto, na ordem em que aparecem"""
+        if not text or not self._names:
+            return []
+
+        matcher = self._compiled()
+        found = []
+        for _, index in matcher.find_all(text):
+            name = self._names[matcher.keywords[index]]
+            if name not in found:
+                found.append(name)
+        return found
+
+    def find(self, text: str) -> Optional[str]:
+        """Primeira empresa mencionada (a mais longa, se várias começam no mesmo ponto)"""
+        if not text or not self._names:
+            return None
+
+        matcher = self._compiled()
+        matches = matcher.find_all(text)
+        if not matches:
+            return None
+
+        first_position = matches[0][0]
+        keywords = matcher.keywords
+        best = max((index for position, index in matches if position == first_position),
+                   key=lambda index: len(keywords[index]))
+        return self._names[keywords[best]]
+
+    @classmethod
+    def from_databases(cls, paths: Iterable[str] = DEFAULT_SOURCES, exclude: Iterable[str] = (),
+                       min_mentions: int = MIN_MENTIONS) -> 'CompanyGazetteer':
+        """Carrega as empresas (e seus apelidos) dos bancos existentes"""
+        gazetteer = cls(exclude=exclude)
+        for path in paths:
+            if os.path.exists(path):
+                gazetteer.add(load_company_names(path, min_mentions))
+        return gazetteer
+
+
+def load_company_names(db_path: str, min_mentions: int = MIN_MENTIONS) -> List[Tuple[str, str]]:
+    """Pares (variação, nome canônico) das tabelas companies/company_aliases do banco.
+
+    Só empresas de reclamações dos CURATED_SITES ou vistas em pelo menos
+    min_mentions reclamações.
+    """
+    try:
+        conn = sqlite3.connect(db_path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('companies', 'company_aliases')")
+            if len(cursor.fetchall()) < 2:
+                return []
+
+            cursor.execute(f'''
+                SELECT c.id, c.name FROM complaints x JOIN companies c ON c.id = x.company_id
+                GROUP BY c.id
+                HAVING COUNT(*) >= ? OR SUM(x.site_source IN ({', '.join('?' * len(CURATED_SITES))})) > 0
+            ''', (min_mentions, *CURATED_SITES))
+            companies = dict(cursor.fetchall())
+
+            cursor.execute('SELECT alias, company_id FROM company_aliases')
+            aliases = [(alias, companies[company_id]) for alias, company_id in cursor.fetchall()
+                       if company_id in companies]
+            return [(name, name) for name in companies.values()] + aliases
+        finally:
+            conn.close()
+
+    except sqlite3.Error:
+        return []
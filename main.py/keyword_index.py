@@ -0,0 +1,129 @@
+"""
+Índice invertido de palavras-chave: dicionário de palavras e (reclamação, palavra, ocorrências)
+"""
+
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class KeywordIndex:
+    """Tabelas keywords (id, keyword) e complaint_keywords (complaint_id,
+    keyword_id, count), substituindo a busca com LIKE na lista de
+    palavras-chave separada por vírgulas.
+
+    date_expression é a data (AAAA-MM-DD) da reclamação usada nas
+    consultas por período, escrita sobre o alias c da tabela de origem.
+    """
+
+    def __init__(self, source: str = 'complaints', date_expression: str = 'date(c.scraped_at)',
+                 company_column: str = 'company_name'):
+        self.source = source
+        self.date_expression = date_expression
+        self.company_column = company_column
+
+    def install(self, cursor: sqlite3.Cursor) -> bool:
+        """Cria as tabelas; retorna True se foram criadas agora (e precisam de backfill)"""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'complaint_keywords'")
+        created = cursor.fetchone() is None
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS keywords (
+                id INTEGER PRIMARY KEY,
+                keyword TEXT NOT NULL UNIQUE
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS complaint_keywords (
+                keyword_id INTEGER NOT NULL REFERENCES keywords(id),
+                complaint_id INTEGER NOT NULL,
+                count INTEGER NOT NULL DEFAULT 1,
+                PRIMARY KEY (keyword_id, complaint_id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_complaint_keywords_complaint ON complaint_keywords(complaint_id)')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS complaint_keywords_ad AFTER DELETE ON {self.source} BEGIN
+                DELETE FROM complaint_keywords WHERE complaint_id = old.id;
+            END
+        ''')
+
+        return created
+
+    def add(self, cursor: sqlite3.Cursor, entries: Iterable[Tuple[int, Dict[str, int]]], replace: bool = False):
+        """Indexa (id da reclamação, {palavra-chave: ocorrências}).
+
+        Com replace as entradas anteriores dessas reclamações são removidas
+        antes (palavras-chave recalculadas).
+        """
+        entries = list(entries)
+        if replace:
+            cursor.executemany('DELETE FROM complaint_keywords WHERE complaint_id = ?',
+                               [(complaint_id,) for complaint_id, _ in entries])
+
+        keywords = {keyword.lower() for _, counts in entries for keyword in counts}
+        if not keywords:
+            return
+
+        keyword_ids = self._keyword_ids(cursor, keywords)
+        cursor.executemany('INSERT OR REPLACE INTO complaint_keywords (keyword_id, complaint_id, count) VALUES (?, ?, ?)', [
+            (keyword_ids[keyword.lower()], complaint_id, count)
+            for complaint_id, counts in entries
+            for keyword, count in counts.items()
+        ])
+
+    @staticmethod
+    def _keyword_ids(cursor: sqlite3.Cursor, keywords: Iterable[str]) -> Dict[str, int]:
+        keywords = list(keywords)
+        cursor.executemany('INSERT OR IGNORE INTO keywords (keyword) VALUES (?)', [(keyword,) for keyword in keywords])
+        cursor.execute(f"SELECT keyword, id FROM keywords WHERE keyword IN ({', '.join('?' * len(keywords))})", keywords)
+        return dict(cursor.fetchall())
+
+    def _matching(self, keyword: str, since: Optional[str]) -> Tuple[str, List]:
+        """FROM/WHERE comuns: reclamações com a palavra-chave, a partir de since"""
+        clause = f'''
+            FROM keywords k
+            JOIN complaint_keywords ck ON ck.keyword_id = k.id
+            JOIN {self.source} c ON c.id = ck.complaint_id
+            WHERE k.keyword = ?
+        '''
+        params: List = [keyword.lower()]
+        if since:
+            clause += f' AND {self.date_expression} >= ?'
+            params.append(since)
+        return clause, params
+
+    def complaint_ids(self, cursor: sqlite3.Cursor, keyword: str, since: Optional[str] = None,
+                      limit: Optional[int] = None) -> List[int]:
+        """Ids das reclamações com a palavra-chave (mais recentes primeiro)"""
+        clause, params = self._matching(keyword, since)
+        query = f'SELECT c.id {clause} ORDER BY c.id DESC'
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+
+        cursor.execute(query, params)
+        return [row[0] for row in cursor.fetchall()]
+
+    def trend(self, cursor: sqlite3.Cursor, keyword: str, since: Optional[str] = None,
+              period: str = 'day') -> List[Tuple[str, int, int]]:
+        """(período, reclamações, ocorrências) da palavra-chave por dia ou mês"""
+        bucket = self.date_expression if period == 'day' else f'substr({self.date_expression}, 1, 7)'
+        clause, params = self._matching(keyword, since)
+        cursor.execute(f'''
+            SELECT {bucket} AS period, COUNT(*), SUM(ck.count) {clause}
+            GROUP BY period
+            ORDER BY period
+        ''', params)
+        return cursor.fetchall()
+
+    def by_company(self, cursor: sqlite3.Cursor, keyword: str, since: Optional[str] = None,
+                   limit: int = 10) -> Dict[Optional[str], int]:
+        """Empresas com mais reclamações com a palavra-chave"""
+        clause, params = self._matching(keyword, since)
+        cursor.execute(f'''
+            SELECT c.{self.company_column}, COUNT(*) AS total {clause}
+            GROUP BY c.{self.company_column}
+            ORDER BY total DESC
+            LIMIT ?
+        ''', params + [limit])
+        return dict(cursor.fetchall())
@@ -0,0 +1,217 @@
+"""
+Busca de múltiplas palavras-chave em uma única passada sobre o texto
+"""
+
+import re
+import unicodedata
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from stemming import stem
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def fold_accents(text: str) -> str:
+    """Converte para minúsculas e remove acentos (decomposição NFKD)"""
+    lowered = text.lower()
+    if lowered.isascii():
+        return lowered
+
+    decomposed = unicodedata.normalize('NFKD', lowered)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: str, language: Optional[str] = None) -> List[str]:
+    """Divide o texto em tokens normalizados (minúsculos e sem acentos).
+
+    Com language ('pt' ou 'en') cada token é reduzido ao seu radical.
+    """
+    if not text:
+        return []
+
+    tokens = TOKEN_PATTERN.findall(fold_accents(text))
+    if language:
+        return [stem(token, language) for token in tokens]
+    return tokens
+
+
+class TokenIndex:
+    """Índice de tokens normalizados de um documento (token -> posições)"""
+
+    def __init__(self, text: str, language: Optional[str] = None):
+        self._index(tokenize(text, language))
+
+    @classmethod
+    def from_tokens(cls, tokens: List[str]) -> 'TokenIndex':
+        """Índice de tokens já normalizados (e, se for o caso, reduzidos a radicais)"""
+        token_index = cls.__new__(cls)
+        token_index._index(tokens)
+        return token_index
+
+    def _index(self, tokens: List[str]):
+        self.tokens = tokens
+        self.positions: Dict[str, List[int]] = {}
+        for position, token in enumerate(self.tokens):
+            self.positions.setdefault(token, []).append(position)
+
+
+class KeywordMatcher:
+    """Autômato Aho-Corasick compilado uma vez por conjunto de palavras-chave.
+
+    O texto é convertido para minúsculas antes da busca; as palavras-chave
+    são usadas como foram informadas. O custo da busca é linear no tamanho
+    do texto, independente da quantidade de palavras-chave.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = list(dict.fromkeys(keyword for keyword in keywords if keyword))
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+
+        for index, keyword in enumerate(self.keywords):
+            self._add_keyword(keyword, index)
+
+        self._build_failure_links()
+
+    def _add_keyword(self, keyword: str, index: int):
+        node = 0
+        for char in keyword:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            node = next_node
+
+        self._output[node] = self._output[node] + (index,)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find_all(self, text: str) -> List[Tuple[int, int]]:
+        """Retorna (posição inicial, índice da palavra-chave) de cada ocorrência"""
+        if not text:
+            return []
+
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        keywords = self.keywords
+        matches = []
+        node = 0
+
+        for position, char in enumerate(text.lower()):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+
+            for index in output[node]:
+                matches.append((position - len(keywords[index]) + 1, index))
+
+        return matches
+
+    def count(self, text: str) -> Dict[str, int]:
+        """Retorna a quantidade de ocorrências de cada palavra-chave encontrada"""
+        counts: Dict[str, int] = {}
+        for _, index in self.find_all(text):
+            keyword = self.keywords[index]
+            counts[keyword] = counts.get(keyword, 0) + 1
+        return counts
+
+    def find_keywords(self, text: str) -> List[str]:
+        """Retorna as palavras-chave encontradas, na ordem da lista original"""
+        found = {index for _, index in self.find_all(text)}
+        return [self.keywords[index] for index in sorted(found)]
+
+
+class TokenMatcher:
+    """Busca de palavras-chave por palavra inteira, sem diferenciar acentos.
+
+    Palavras-chave e documentos passam pela mesma normalização (minúsculas,
+    sem acentos) e são divididos em tokens. Cada busca é uma consulta em
+    hash no índice de tokens do documento; palavras-chave com mais de uma
+    palavra ("banco de dados") são comparadas como sequência de tokens.
+    As posições retornadas são posições de token no documento.
+
+    Com language ('pt' ou 'en'), palavras-chave e documentos são reduzidos
+    a radicais, e o índice passa a ser radical -> palavras-chave: "travou",
+    "travamento", "falhas" e "servidores" encontram "travando", "falha" e
+    "servidor" sem precisar listar cada variação. Palavras-chave com o mesmo radical
+    contam uma vez só, pela primeira da lista: um token não soma duas.
+    """
+
+    def __init__(self, keywords: Iterable[str], language: Optional[str] = None):
+        self.keywords = list(dict.fromkeys(keyword for keyword in keywords if keyword))
+        self.language = language
+        self._by_first_token: Dict[str, List[Tuple[int, List[str]]]] = {}
+
+        seen = set()
+        for index, keyword in enumerate(self.keywords):
+            tokens = tokenize(keyword, language)
+            if tokens and tuple(tokens) not in seen:
+                seen.add(tuple(tokens))
+                self._by_first_token.setdefault(tokens[0], []).append((index, tokens[1:]))
+
+    def find_in_index(self, token_index: TokenIndex) -> List[Tuple[int, int]]:
+        """Retorna (posição do token, índice da palavra-chave) usando um índice já construído"""
+        tokens = token_index.tokens
+        matches = []
+
+        for token in token_index.positions.keys() & self._by_first_token.keys():
+            for index, rest in self._by_first_token[token]:
+                for position in token_index.positions[token]:
+                    if not rest or tokens[position + 1:position + 1 + len(rest)] == rest:
+                        matches.append((position, index))
+
+        matches.sort()
+        return matches
+
+    def find_all(self, text: str) -> List[Tuple[int, int]]:
+        """Retorna (posição do token, índice da palavra-chave) de cada ocorrência"""
+        if not text:
+            return []
+        return self.find_in_index(TokenIndex(text, self.language))
+
+    def count(self, text: str) -> Dict[str, int]:
+        """Retorna a quantidade de ocorrências de cada palavra-chave encontrada"""
+        counts: Dict[str, int] = {}
+        for _, index in self.find_all(text):
+            keyword = self.keywords[index]
+            counts[keyword] = counts.get(keyword, 0) + 1
+        return counts
+
+    def find_keywords(self, text: str) -> List[str]:
+        """Retorna as palavras-chave encontradas, na ordem da lista original"""
+        found = {index for _, index in self.find_all(text)}
+        return [self.keywords[index] for index in sorted(found)]
+
+
+@lru_cache(maxsize=32)
+def get_matcher(keywords: Tuple[str, ...], word_boundary: bool = True, language: Optional[str] = None):
+    """Retorna o matcher compilado para o conjunto de palavras-chave (com cache).
+
+    Por padrão a busca é por palavra inteira e sem acentos (TokenMatcher),
+    com radicais quando language é informado; com word_boundary=False usa
+    busca por substring (KeywordMatcher).
+    """
+    if word_boundary:
+        return TokenMatcher(keywords, language)
+    return KeywordMatcher(keywords)
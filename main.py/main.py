@@ -4,15 +4,15 @@ Script principal do scraper de reclamações de TI
 
 import logging
 import time
-from typing import List, Dict
+from itertools import islice
+from typing import Iterable, Iterator, List, Dict, Optional
 from datetime import datetime
 
-from config import SITES_CONFIG, SCRAPING_CONFIG, LOGGING_CONFIG
+from config import SITES_CONFIG, SCRAPING_CONFIG, LOGGING_CONFIG, DATABASE_CONFIG, TI_KEYWORDS
 from database import DatabaseManager
-from utils import setup_logging
-from scrapers.reclame_aqui_scraper import ReclameAquiScraper
-from scrapers.trustpilot_scraper import TrustpilotScraper
-from scrapers.generic_scraper import GenericScraper
+from db_writer import install_shutdown_handler
+from models import Complaint
+from utils import setup_logging, TextProcessor
 
 # Configurar logging
 setup_logging(LOGGING_CONFIG['level'], LOGGING_CONFIG['file'])
@@ -21,95 +21,197 @@ logger = logging.getLogger(__name__)
 class ComplaintsScraper:
     """Classe principal do scraper de reclamações"""
     
-    def __init__(self):
+    def __init__(self, sites: Optional[Iterable[str]] = None):
         self.db_manager = DatabaseManager()
         self.scrapers = {}
-        self.setup_scrapers()
+        # No modo agendado os scrapers (navegador, sessão HTTP) ficam abertos entre coletas
+        self.keep_scrapers_open = False
+        self.setup_scrapers(sites)
     
-    def setup_scrapers(self):
-        """Configura os scrapers para cada site"""
+    def setup_scrapers(self, sites: Optional[Iterable[str]] = None):
+        """Configura os scrapers para cada site (todos os habilitados, ou só os de sites)"""
+        sites = set(sites) if sites else None
         for site_name, config in SITES_CONFIG.items():
-            if not config['enabled']:
+            if not config['enabled'] or (sites is not None and site_name not in sites):
                 continue
+            self.create_scraper(site_name)
+    
+    def create_scraper(self, site_name: str) -> bool:
+        """Cria (ou recria) o scraper do site; retorna False se não foi possível"""
+        config = SITES_CONFIG[site_name]
+        try:
+            # Cada scraper (e o Selenium, quando usado) só é importado se o site for coletado
+            if site_name == 'reclame_aqui':
+                from scrapers.reclame_aqui_scraper import ReclameAquiScraper
+                self.scrapers[site_name] = ReclameAquiScraper()
+            elif site_name == 'trustpilot':
+                from scrapers.trustpilot_scraper import TrustpilotScraper
+                self.scrapers[site_name] = TrustpilotScraper()
+            else:
+                # Usa scraper genérico para outros sites
+                from scrapers.generic_scraper import GenericScraper
+                self.scrapers[site_name] = GenericScraper(
+                    site_name=site_name,
+                    base_url=config['base_url'],
+                    search_url=config.get('search_url')
+                )
+            
+            # Scorer compartilha as estatísticas do corpus mantidas pelo banco
+            self.scrapers[site_name].text_processor = TextProcessor(
+                corpus_stats=self.db_manager.corpus_stats, language=config.get('language', 'pt')
+            )
             
+            logger.info(f"Scraper configurado para {site_name}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Erro ao configurar scraper para {site_name}: {e}")
+            return False
+    
+    def reset_scraper(self, site_name: str) -> bool:
+        """Fecha o scraper do site (navegador, sessão HTTP) e cria outro.
+        
+        Usado no modo agendado quando uma coleta falha ou volta vazia: um
+        Chrome que caiu ou uma sessão expirada não se recuperam sozinhos.
+        """
+        scraper = self.scrapers.pop(site_name, None)
+        if scraper is not None:
             try:
-                if site_name == 'reclame_aqui':
-                    self.scrapers[site_name] = ReclameAquiScraper()
-                elif site_name == 'trustpilot':
-                    self.scrapers[site_name] = TrustpilotScraper()
-                else:
-                    # Usa scraper genérico para outros sites
-                    self.scrapers[site_name] = GenericScraper(
-                        site_name=site_name,
-                        base_url=config['base_url'],
-                        search_url=config.get('search_url')
-                    )
-                
-                logger.info(f"Scraper configurado para {site_name}")
-                
+                scraper.close()
             except Exception as e:
-                logger.error(f"Erro ao configurar scraper para {site_name}: {e}")
+                logger.warning(f"Erro ao fechar o scraper de {site_name}: {e}")
+        return self.create_scraper(site_name)
     
-    def scrape_site(self, site_name: str, max_pages: int = None) -> List[Dict]:
-        """Executa scraping de um site específico"""
+    def stream_site(self, site_name: str, max_pages: int = None,
+                    search_terms: Optional[List[str]] = None) -> Iterator[Complaint]:
+        """Executa scraping de um site em streaming, gerando reclamações de TI já normalizadas
+        
+        Sem search_terms os termos de busca são escolhidos por plan_terms.
+        """
         if site_name not in self.scrapers:
             logger.error(f"Scraper não encontrado para {site_name}")
-            return []
+            return
         
         scraper = self.scrapers[site_name]
         max_pages = max_pages or SCRAPING_CONFIG['max_pages_per_site']
+        search_terms = search_terms or self.plan_terms(site_name)
         
         try:
             logger.info(f"Iniciando scraping de {site_name}")
             start_time = time.time()
+            count = 0
             
-            # Executa scraping
-            raw_complaints = scraper.scrape_complaints(max_pages)
-            
-            # Filtra reclamações relacionadas a TI
-            ti_complaints = scraper.filter_ti_complaints(raw_complaints)
-            
-            # Normaliza dados
-            normalized_complaints = []
-            for complaint in ti_complaints:
-                normalized = scraper.normalize_complaint_data(complaint)
-                normalized_complaints.append(normalized)
+            # Coleta, filtro de TI e normalização encadeados como geradores
+            for complaint in scraper.stream_complaints(max_pages, search_terms):
+                count += 1
+                yield complaint
             
             end_time = time.time()
             duration = end_time - start_time
             
-            logger.info(f"Scraping de {site_name} concluído em {duration:.2f}s - {len(normalized_complaints)} reclamações de TI")
-            
-            return normalized_complaints
+            logger.info(f"Scraping de {site_name} concluído em {duration:.2f}s - {count} reclamações de TI")
             
         except Exception as e:
             logger.error(f"Erro no scraping de {site_name}: {e}")
-            return []
         
         finally:
             # Limpar recursos
-            try:
-                scraper.close()
-            except:
-                pass
+            if not self.keep_scrapers_open:
+                try:
+                    scraper.close()
+                except:
+                    pass
     
-    def scrape_all_sites(self) -> Dict[str, List[Dict]]:
-        """Executa scraping de todos os sites configurados"""
+    def scrape_site(self, site_name: str, max_pages: int = None) -> List[Complaint]:
+        """Executa scraping de um site específico"""
+        return list(self.stream_site(site_name, max_pages))
+    
+    def plan_pages(self) -> Dict[str, int]:
+        """Páginas de cada site nesta coleta, ou max_pages_per_site se o orçamento estiver desativado
+        
+        O orçamento é de requisições (por padrão as mesmas de max_pages_per_site
+        em cada site), dividido pelo rendimento observado e convertido em
+        páginas pelo custo de cada scraper (REQUESTS_PER_PAGE).
+        """
+        budget = SCRAPING_CONFIG['crawl_budget']
+        max_pages = SCRAPING_CONFIG['max_pages_per_site']
+        if not budget['enabled']:
+            return {site_name: max_pages for site_name in self.scrapers}
+        
+        costs = {site_name: scraper.REQUESTS_PER_PAGE for site_name, scraper in self.scrapers.items()}
+        total = budget['total_requests'] or sum(max_pages * cost for cost in costs.values())
+        requests = self.db_manager.allocate_crawl_budget(
+            self.scrapers, total, {site_name: budget['min_pages'] * cost for site_name, cost in costs.items()}
+        )
+        pages = {site_name: max(round(requests[site_name] / costs[site_name]), budget['min_pages'])
+                 for site_name in requests}
+        logger.info(f"Páginas por site: {pages}")
+        return pages
+    
+    def plan_terms(self, site_name: str) -> List[str]:
+        """Termos de busca do site nesta coleta: os de maior rendimento no site
+        (com exploração), ou os primeiros de TI_KEYWORDS se o orçamento estiver desativado"""
+        count = SCRAPING_CONFIG['search_terms_per_site']
+        if not SCRAPING_CONFIG['crawl_budget']['enabled']:
+            return TI_KEYWORDS[:count]
+        return self.db_manager.choose_crawl_terms(site_name, TI_KEYWORDS, count)
+    
+    def request_count(self, site_name: str) -> int:
+        """Requisições feitas pelo scraper do site desde que foi criado"""
+        return self.scrapers[site_name].request_handler.request_count
+    
+    def success_count(self, site_name: str) -> int:
+        """Requisições do scraper do site que trouxeram a página"""
+        return self.scrapers[site_name].request_handler.success_count
+    
+    def record_yield(self, site_name: str, requests_before: int, saved_count: int):
+        """Registra o rendimento da coleta do site (requisições x reclamações novas)
+        
+        Nos sites com busca as requisições são as de cada termo, e as
+        reclamações novas são divididas pelos termos na proporção das
+        reclamações de TI que cada um trouxe.
+        """
+        term_yields = self.scrapers[site_name].take_term_yields()
+        found = term_yields['found']
+        total_found = sum(found.values())
+        self.db_manager.record_crawl_yield(
+            site_name, self.request_count(site_name) - requests_before, saved_count,
+            {term: (requests, saved_count * found[term] / total_found if total_found else 0)
+             for term, requests in term_yields['requests'].items()},
+        )
+    
+    def save_batch(self, complaints: List[Complaint]) -> int:
+        """Salva um bloco de reclamações e retorna quantas eram novas"""
+        return self.db_manager.save_complaints_batch(complaints)
+    
+    def scrape_all_sites(self) -> Dict[str, int]:
+        """Executa scraping de todos os sites configurados, salvando em blocos conforme coleta
+        
+        Retorna a quantidade de reclamações salvas por site.
+        """
+        if DATABASE_CONFIG['background_writer']:
+            return self.scrape_all_sites_async()
+        
         results = {}
+        batch_size = SCRAPING_CONFIG['stream_batch_size']
+        pages = self.plan_pages()
         
         for site_name in self.scrapers.keys():
             try:
                 logger.info(f"Iniciando scraping de {site_name}")
                 
-                complaints = self.scrape_site(site_name)
-                results[site_name] = complaints
-                
-                # Salva no banco de dados
+                # Salva no banco de dados em blocos, sem manter o site inteiro em memória
                 saved_count = 0
-                for complaint in complaints:
-                    if self.db_manager.save_complaint(complaint):
-                        saved_count += 1
+                requests_before = self.request_count(site_name)
+                complaints = self.stream_site(site_name, pages.get(site_name))
+                while True:
+                    batch = list(islice(complaints, batch_size))
+                    if not batch:
+                        break
+                    saved_count += self.save_batch(batch)
                 
+                results[site_name] = saved_count
+                self.record_yield(site_name, requests_before, saved_count)
                 logger.info(f"{site_name}: {saved_count} reclamações salvas no banco")
                 
                 # Pausa entre sites
@@ -117,7 +219,44 @@ class ComplaintsScraper:
                 
             except Exception as e:
                 logger.error(f"Erro no scraping de {site_name}: {e}")
-                results[site_name] = []
+                results[site_name] = 0
+        
+        return results
+    
+    def scrape_all_sites_async(self) -> Dict[str, int]:
+        """Como scrape_all_sites, mas entrega as reclamações à thread de gravação
+        
+        O scraping segue enquanto o disco grava; ao fim de cada site a fila é
+        esvaziada para contar as reclamações salvas.
+        """
+        results = {}
+        pages = self.plan_pages()
+        writer = self.db_manager.create_writer()
+        
+        try:
+            for site_name in self.scrapers.keys():
+                try:
+                    logger.info(f"Iniciando scraping de {site_name}")
+                    
+                    saved_before = writer.saved_count
+                    requests_before = self.request_count(site_name)
+                    for complaint in self.stream_site(site_name, pages.get(site_name)):
+                        writer.submit(complaint)
+                    writer.flush()
+                    
+                    results[site_name] = writer.saved_count - saved_before
+                    self.record_yield(site_name, requests_before, results[site_name])
+                    logger.info(f"{site_name}: {results[site_name]} reclamações salvas no banco")
+                    
+                    # Pausa entre sites
+                    time.sleep(SCRAPING_CONFIG['delay_between_sites'])
+                    
+                except Exception as e:
+                    logger.error(f"Erro no scraping de {site_name}: {e}")
+                    results[site_name] = 0
+        finally:
+            # Grava o que ainda estiver na fila (inclusive em interrupção ou SIGTERM)
+            writer.close()
         
         return results
     
@@ -129,9 +268,14 @@ class ComplaintsScraper:
         stats['scraping_date'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
         # Exporta para CSV
-        if self.db_manager.export_to_csv():
+        if self.db_manager.export_to_csv(incremental=DATABASE_CONFIG['csv_incremental']):
             stats['csv_exported'] = True
         
+        # Exporta partições colunares novas para as análises
+        if DATABASE_CONFIG['columnar']['enabled']:
+            from columnar_export import ColumnarExporter
+            stats['columnar_exported'] = ColumnarExporter(self.db_manager).export()
+        
         return stats
     
     def cleanup(self):
@@ -141,10 +285,13 @@ class ComplaintsScraper:
                 scraper.close()
             except:
                 pass
+        
+        self.db_manager.close()
 
-def main():
-    """Função principal"""
-    scraper = ComplaintsScraper()
+def main(sites: Optional[Iterable[str]] = None):
+    """Função principal (sites: coleta só esses sites habilitados)"""
+    install_shutdown_handler()
+    scraper = ComplaintsScraper(sites)
     
     try:
         logger.info("=== INICIANDO SCRAPER DE RECLAMAÇÕES DE TI ===")
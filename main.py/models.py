@@ -0,0 +1,114 @@
+"""
+Registro compacto de reclamação usado em todo o pipeline de scraping
+"""
+
+import hashlib
+import sqlite3
+import sys
+from typing import Any, Dict, Optional, Tuple, Union
+
+from companies import PLACEHOLDER_KEYS, company_key
+
+# Versão do cálculo de content_hash, guardada em PRAGMA user_version do banco
+FINGERPRINT_VERSION = 2
+
+
+def content_fingerprint(site_source: Optional[str], title: Optional[str],
+                        company_name: Optional[str], description: Optional[str]) -> str:
+    """Hash do conteúdo normalizado (espaços colapsados, sem diferenciar
+    maiúsculas) usado como chave de deduplicação das reclamações.
+
+    A empresa entra pela chave canônica (company_key), então "Vivo" e
+    "VIVO S.A." dão o mesmo hash, e os valores genéricos ("Empresa não
+    identificada") valem o mesmo que empresa vazia.
+    """
+    company = company_key(company_name)
+    canonical = '\x1f'.join(
+        ' '.join((value or '').split()).casefold()
+        for value in (site_source, title, '' if company in PLACEHOLDER_KEYS else company, description)
+    )
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+def reset_outdated_fingerprints(cursor: sqlite3.Cursor) -> bool:
+    """Apaga os content_hash calculados por uma versão anterior de
+    content_fingerprint, para que o preenchimento os recalcule (as
+    duplicatas que aparecerem ficam com NULL); retorna True se apagou"""
+    cursor.execute('PRAGMA user_version')
+    if cursor.fetchone()[0] >= FINGERPRINT_VERSION:
+        return False
+    cursor.execute('UPDATE complaints SET content_hash = NULL')
+    cursor.execute(f'PRAGMA user_version = {FINGERPRINT_VERSION}')
+    return True
+
+
+class Complaint:
+    """Reclamação com __slots__ (sem __dict__ por instância).
+
+    Percorre extração, filtro, normalização e gravação sem ser copiada.
+    Aceita o mesmo acesso de um dict (complaint['title'], complaint.get(...))
+    para que os extratores continuem preenchendo campo a campo; campos não
+    preenchidos valem None. Strings curtas e repetidas (site_source,
+    category, status) são internadas.
+    """
+
+    __slots__ = (
+        'site_source', 'company_name', 'complaint_date', 'complaint_date_raw', 'title', 'description',
+        'category', 'rating', 'status', 'company_response', 'url', 'ti_keywords',
+        'relevance_score', 'ti_probability', 'severity_level', 'content_hash', 'company_id',
+    )
+
+    # Colunas da tabela complaints, na ordem usada por to_row()
+    DB_COLUMNS = __slots__
+
+    INTERNED_FIELDS = frozenset(('site_source', 'category', 'status'))
+
+    def __init__(self, **fields: Any):
+        for name in self.__slots__:
+            value = fields.get(name)
+            if name in self.INTERNED_FIELDS and isinstance(value, str):
+                value = sys.intern(value)
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def coerce(cls, data: Union['Complaint', Dict]) -> 'Complaint':
+        """Retorna o próprio registro ou converte um dict (ignorando chaves desconhecidas)"""
+        if isinstance(data, cls):
+            return data
+        return cls(**{name: data.get(name) for name in cls.__slots__})
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self.__slots__:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __setitem__(self, name: str, value: Any):
+        if name not in self.__slots__:
+            raise KeyError(name)
+        if name in self.INTERNED_FIELDS and isinstance(value, str):
+            value = sys.intern(value)
+        object.__setattr__(self, name, value)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__slots__ and getattr(self, name) is not None
+
+    def get(self, name: str, default: Any = None) -> Any:
+        value = getattr(self, name, None)
+        return default if value is None else value
+
+    def fingerprint(self) -> str:
+        """Chave de deduplicação do conteúdo (calculada uma vez)"""
+        if self.content_hash is None:
+            self.content_hash = content_fingerprint(self.site_source, self.title, self.company_name, self.description)
+        return self.content_hash
+
+    def to_row(self) -> Tuple:
+        """Tupla de valores na ordem de DB_COLUMNS, pronta para o INSERT"""
+        self.fingerprint()
+        return tuple(getattr(self, name) for name in self.DB_COLUMNS)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"Complaint(site_source={self.site_source!r}, title={self.title!r})"
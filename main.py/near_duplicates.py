@@ -0,0 +1,178 @@
+"""
+Detecção de reclamações quase duplicadas com MinHash e LSH
+"""
+
+import hashlib
+import sqlite3
+import zlib
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple
+
+from keyword_matcher import tokenize
+
+if TYPE_CHECKING:
+    import numpy as np
+
+MAX_HASH = 0xFFFFFFFF
+
+
+class NearDuplicateIndex:
+    """Índice de quase duplicatas persistido no SQLite.
+
+    Cada texto vira um conjunto de shingles (sequências de shingle_size
+    palavras normalizadas, com hash crc32) e uma assinatura MinHash de
+    num_perm valores. A assinatura é dividida em bands faixas; textos com
+    alguma faixa idêntica caem no mesmo bucket e viram candidatos, então a
+    busca consulta só os buckets do texto novo, sem comparar com todo o
+    banco. Candidatos com Jaccard estimado >= threshold são ligados em
+    duplicate_links (nenhuma reclamação é descartada).
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 16, shingle_size: int = 3,
+                 threshold: float = 0.7, seed: int = 1, source: str = 'complaints'):
+        if num_perm % bands:
+            raise ValueError('num_perm precisa ser múltiplo de bands')
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+        self.source = source
+        self.seed = seed
+        self._permutations = None
+
+    def _hash_parameters(self) -> Tuple['np.ndarray', 'np.ndarray']:
+        # Permutações aproximadas: h(x) = (a * x + b) mod 2^32. O numpy só é
+        # importado no primeiro uso, para não pesar em quem apenas consulta o banco.
+        if self._permutations is None:
+            import numpy as np
+
+            generator = np.random.RandomState(self.seed)
+            a = generator.randint(1, 2 ** 32, size=self.num_perm, dtype=np.uint64) | np.uint64(1)
+            b = generator.randint(0, 2 ** 32, size=self.num_perm, dtype=np.uint64)
+            self._permutations = (a, b)
+        return self._permutations
+
+    def install(self, cursor: sqlite3.Cursor) -> bool:
+        """Cria as tabelas; retorna True se foram criadas agora (e precisam de backfill)"""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'minhash_signatures'")
+        created = cursor.fetchone() is None
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS minhash_signatures (
+                complaint_id INTEGER PRIMARY KEY,
+                signature BLOB NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS minhash_buckets (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                complaint_id INTEGER NOT NULL,
+                PRIMARY KEY (band, bucket, complaint_id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS duplicate_links (
+                complaint_id INTEGER NOT NULL,
+                duplicate_of INTEGER NOT NULL,
+                similarity REAL NOT NULL,
+                PRIMARY KEY (complaint_id, duplicate_of)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_duplicate_links_original ON duplicate_links(duplicate_of)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_minhash_buckets_complaint ON minhash_buckets(complaint_id)')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS minhash_ad AFTER DELETE ON {self.source} BEGIN
+                DELETE FROM minhash_signatures WHERE complaint_id = old.id;
+                DELETE FROM minhash_buckets WHERE complaint_id = old.id;
+                DELETE FROM duplicate_links WHERE complaint_id = old.id OR duplicate_of = old.id;
+            END
+        ''')
+
+        return created
+
+    def shingles(self, text: str) -> 'np.ndarray':
+        """Hashes (crc32) das sequências de shingle_size palavras do texto"""
+        import numpy as np
+
+        tokens = tokenize(text)
+        if not tokens:
+            return np.empty(0, dtype=np.uint64)
+
+        size = min(self.shingle_size, len(tokens))
+        hashes = {zlib.crc32(' '.join(tokens[i:i + size]).encode('utf-8'))
+                  for i in range(len(tokens) - size + 1)}
+        return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+    def signature(self, text: str) -> Optional['np.ndarray']:
+        """Assinatura MinHash (num_perm valores uint32); None para texto vazio"""
+        import numpy as np
+
+        shingles = self.shingles(text)
+        if not len(shingles):
+            return None
+
+        a, b = self._hash_parameters()
+        hashed = (a[:, None] * shingles[None, :] + b[:, None]) & np.uint64(MAX_HASH)
+        return hashed.min(axis=1).astype(np.uint32)
+
+    def buckets(self, signature: 'np.ndarray') -> List[Tuple[int, int]]:
+        """(faixa, bucket) de cada faixa da assinatura"""
+        return [
+            (band, int.from_bytes(hashlib.blake2b(
+                signature[band * self.rows:(band + 1) * self.rows].tobytes(), digest_size=8
+            ).digest(), 'big', signed=True))
+            for band in range(self.bands)
+        ]
+
+    def add(self, cursor: sqlite3.Cursor, complaint_id: int, text: str) -> List[Tuple[int, float]]:
+        """Indexa a reclamação e liga as quase duplicatas já indexadas.
+
+        Retorna (id da duplicata, similaridade estimada).
+        """
+        import numpy as np
+
+        signature = self.signature(text)
+        if signature is None:
+            return []
+
+        buckets = self.buckets(signature)
+        duplicates = []
+
+        # OR de igualdades (e não IN (VALUES ...)) para o SQLite buscar pela chave primária
+        cursor.execute(f'''
+            SELECT DISTINCT b.complaint_id, s.signature
+            FROM minhash_buckets b JOIN minhash_signatures s ON s.complaint_id = b.complaint_id
+            WHERE ({' OR '.join(['(b.band = ? AND b.bucket = ?)'] * len(buckets))})
+              AND b.complaint_id != ?
+        ''', [value for bucket in buckets for value in bucket] + [complaint_id])
+
+        for candidate_id, candidate_signature in cursor.fetchall():
+            similarity = float(np.mean(np.frombuffer(candidate_signature, dtype=np.uint32) == signature))
+            if similarity >= self.threshold:
+                duplicates.append((candidate_id, similarity))
+
+        cursor.executemany('INSERT OR REPLACE INTO duplicate_links (complaint_id, duplicate_of, similarity) VALUES (?, ?, ?)',
+                           [(complaint_id, duplicate_id, similarity) for duplicate_id, similarity in duplicates])
+        cursor.execute('INSERT OR REPLACE INTO minhash_signatures (complaint_id, signature) VALUES (?, ?)',
+                       (complaint_id, signature.tobytes()))
+        cursor.executemany('INSERT OR IGNORE INTO minhash_buckets (band, bucket, complaint_id) VALUES (?, ?, ?)',
+                           [(band, bucket, complaint_id) for band, bucket in buckets])
+
+        return duplicates
+
+    def add_many(self, cursor: sqlite3.Cursor, entries: Iterable[Tuple[int, str]]) -> int:
+        """Indexa várias reclamações (id, texto) e retorna quantas tinham quase duplicatas"""
+        return sum(1 for complaint_id, text in entries if self.add(cursor, complaint_id, text))
+
+    @staticmethod
+    def linked(cursor: sqlite3.Cursor, complaint_id: int) -> List[Tuple[int, float]]:
+        """(id, similaridade) das reclamações ligadas, nos dois sentidos"""
+        cursor.execute('''
+            SELECT duplicate_of, similarity FROM duplicate_links WHERE complaint_id = ?
+            UNION
+            SELECT complaint_id, similarity FROM duplicate_links WHERE duplicate_of = ?
+            ORDER BY 2 DESC
+        ''', (complaint_id, complaint_id))
+        return cursor.fetchall()
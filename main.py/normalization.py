@@ -0,0 +1,195 @@
+"""
+Normalização de datas e notas extraídas das páginas (padrões pré-compilados)
+"""
+
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple, Union
+
+from keyword_matcher import fold_accents
+
+# Meses por extenso e abreviados (português e inglês), já sem acentos
+MONTHS = {
+    'janeiro': 1, 'fevereiro': 2, 'marco': 3, 'abril': 4, 'maio': 5, 'junho': 6,
+    'julho': 7, 'agosto': 8, 'setembro': 9, 'outubro': 10, 'novembro': 11, 'dezembro': 12,
+    'january': 1, 'february': 2, 'march': 3, 'april': 4, 'may': 5, 'june': 6,
+    'july': 7, 'august': 8, 'september': 9, 'october': 10, 'november': 11, 'december': 12,
+    'jan': 1, 'fev': 2, 'feb': 2, 'mar': 3, 'abr': 4, 'apr': 4, 'mai': 5, 'jun': 6,
+    'jul': 7, 'ago': 8, 'aug': 8, 'set': 9, 'sep': 9, 'sept': 9, 'out': 10, 'oct': 10,
+    'nov': 11, 'dez': 12, 'dec': 12,
+}
+
+# Unidades das datas relativas ("há 3 dias", "2 weeks ago")
+UNITS = {
+    'segundo': 'seconds', 'segundos': 'seconds', 'second': 'seconds', 'seconds': 'seconds',
+    'minuto': 'minutes', 'minutos': 'minutes', 'min': 'minutes', 'minute': 'minutes', 'minutes': 'minutes',
+    'hora': 'hours', 'horas': 'hours', 'h': 'hours', 'hour': 'hours', 'hours': 'hours',
+    'dia': 'days', 'dias': 'days', 'day': 'days', 'days': 'days',
+    'semana': 'weeks', 'semanas': 'weeks', 'week': 'weeks', 'weeks': 'weeks',
+    'mes': 'months', 'meses': 'months', 'month': 'months', 'months': 'months',
+    'ano': 'years', 'anos': 'years', 'year': 'years', 'years': 'years',
+}
+
+# Dias relativos à data da coleta
+RELATIVE_DAYS = {'hoje': 0, 'today': 0, 'ontem': 1, 'yesterday': 1, 'anteontem': 2}
+
+_MONTH_NAMES = '|'.join(sorted(MONTHS, key=len, reverse=True))
+_UNIT_NAMES = '|'.join(sorted(UNITS, key=len, reverse=True))
+
+ISO_PATTERN = re.compile(r'(\d{4})-(\d{2})-(\d{2})(?:[Tt ](\d{2}):(\d{2})(?::(\d{2}))?)?')
+NUMERIC_PATTERN = re.compile(r'\b(\d{1,4})[/.-](\d{1,2})[/.-](\d{2,4})\b')
+# "15 de março de 2024", "15 mar. 2024", "5 March 2024"
+DAY_MONTH_PATTERN = re.compile(rf'\b(\d{{1,2}})(?:\s+de)?\s+({_MONTH_NAMES})\.?(?:\s+de|,)?\s+(\d{{4}})\b')
+# "March 5, 2024", "mar 5 2024"
+MONTH_DAY_PATTERN = re.compile(rf'\b({_MONTH_NAMES})\.?\s+(\d{{1,2}}),?\s+(\d{{4}})\b')
+# "há 3 dias", "3 dias atrás", "2 hours ago", "há um mês"
+RELATIVE_PATTERN = re.compile(rf'\b(\d+|um|uma|an?)\s+({_UNIT_NAMES})\b')
+RELATIVE_DAY_PATTERN = re.compile(rf"\b({'|'.join(RELATIVE_DAYS)})\b")
+TIME_PATTERN = re.compile(r'\b(\d{1,2})[:h](\d{2})\b')
+
+RATING_PATTERN = re.compile(r'(\d+(?:[.,]\d+)?)\s*(?:/\s*(5|10)\b|★)?')
+
+# Resultado intermediário (independente da data de referência), guardado em cache:
+# ('absolute', datetime) ou ('relative', unidade, quantidade para trás, hora do dia)
+_Parsed = Optional[Tuple]
+
+
+def _valid_datetime(year: int, month: int, day: int, hour: int = 0, minute: int = 0, second: int = 0) -> Optional[datetime]:
+    if year < 100:
+        year += 2000
+    try:
+        return datetime(year, month, day, hour, minute, second)
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=65536)
+def _parse(text: str) -> _Parsed:
+    # Caminho rápido: ISO-8601 de <time datetime> e de valores já normalizados
+    match = ISO_PATTERN.match(text)
+    if match:
+        year, month, day, hour, minute, second = (int(value) if value else 0 for value in match.groups())
+        parsed = _valid_datetime(year, month, day, hour, minute, second)
+        return ('absolute', parsed) if parsed else None
+
+    folded = fold_accents(text)
+
+    match = NUMERIC_PATTERN.search(folded)
+    if match:
+        first, month, last = (int(value) for value in match.groups())
+        # AAAA/MM/DD ou DD/MM/AAAA
+        parsed = _valid_datetime(first, month, last) if first > 31 else _valid_datetime(last, month, first)
+        if parsed:
+            return 'absolute', parsed
+
+    match = DAY_MONTH_PATTERN.search(folded)
+    if match:
+        parsed = _valid_datetime(int(match.group(3)), MONTHS[match.group(2)], int(match.group(1)))
+        if parsed:
+            return 'absolute', parsed
+
+    match = MONTH_DAY_PATTERN.search(folded)
+    if match:
+        parsed = _valid_datetime(int(match.group(3)), MONTHS[match.group(1)], int(match.group(2)))
+        if parsed:
+            return 'absolute', parsed
+
+    time_match = TIME_PATTERN.search(folded)
+    time_of_day = (int(time_match.group(1)), int(time_match.group(2))) if time_match else None
+
+    match = RELATIVE_DAY_PATTERN.search(folded)
+    if match:
+        return 'relative', 'days', RELATIVE_DAYS[match.group(1)], time_of_day
+
+    match = RELATIVE_PATTERN.search(folded)
+    if match:
+        amount = int(match.group(1)) if match.group(1).isdigit() else 1
+        return 'relative', UNITS[match.group(2)], amount, None
+
+    return None
+
+
+def _shift_months(reference: datetime, months: int) -> datetime:
+    month_index = reference.year * 12 + reference.month - 1 - months
+    year, month = divmod(month_index, 12)
+    # Dia 31 em mês de 30 dias: usa o último dia do mês
+    for day in range(reference.day, 27, -1):
+        shifted = _valid_datetime(year, month + 1, day, reference.hour, reference.minute, reference.second)
+        if shifted:
+            return shifted
+    return reference.replace(year=year, month=month + 1, day=min(reference.day, 28))
+
+
+def parse_date(text: Optional[str], reference: Optional[datetime] = None) -> Optional[datetime]:
+    """Converte a data da página em datetime.
+
+    Aceita ISO-8601, DD/MM/AAAA, "15 de março de 2024", "March 5, 2024" e
+    datas relativas ("há 3 dias", "Ontem às 14:32", "2 weeks ago"),
+    calculadas a partir de reference (momento da coleta; padrão: agora).
+    """
+    if not text:
+        return None
+
+    parsed = _parse(text.strip().lower())
+    if parsed is None:
+        return None
+    if parsed[0] == 'absolute':
+        return parsed[1]
+
+    _, unit, amount, time_of_day = parsed
+    reference = reference or datetime.now()
+    if unit == 'months':
+        return _shift_months(reference, amount)
+    if unit == 'years':
+        return _shift_months(reference, amount * 12)
+
+    result = reference - timedelta(**{unit: amount})
+    if time_of_day:
+        hour, minute = time_of_day
+        if hour < 24 and minute < 60:
+            result = result.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    return result
+
+
+def _as_datetime(value: Union[str, datetime, None]) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    parsed = _parse(value.strip().lower())
+    return parsed[1] if parsed and parsed[0] == 'absolute' else None
+
+
+def normalize_date(text: Optional[str], reference: Union[str, datetime, None] = None) -> Optional[str]:
+    """Data no formato AAAA-MM-DD (a usada na coluna complaint_date)"""
+    parsed = parse_date(text, _as_datetime(reference))
+    return parsed.date().isoformat() if parsed else None
+
+
+def normalize_dates(texts: Iterable[Optional[str]],
+                    references: Optional[Iterable[Union[str, datetime, None]]] = None) -> List[Optional[str]]:
+    """normalize_date para uma coluna inteira (references: um momento de coleta por valor)"""
+    if references is None:
+        now = datetime.now()
+        return [normalize_date(text, now) for text in texts]
+    return [normalize_date(text, reference) for text, reference in zip(texts, references)]
+
+
+@lru_cache(maxsize=4096)
+def parse_rating(text: Optional[str]) -> Optional[float]:
+    """Nota na escala 0-5 ("4,5/5", "8/10", "4★", "3")"""
+    if not text:
+        return None
+
+    match = RATING_PATTERN.search(text)
+    if not match:
+        return None
+
+    rating = float(match.group(1).replace(',', '.'))
+    if match.group(2) == '10' or (match.group(2) is None and rating > 5):
+        rating /= 2
+    return min(rating, 5.0)
+
+
+def parse_ratings(texts: Iterable[Optional[str]]) -> List[Optional[float]]:
+    """parse_rating para uma coluna inteira"""
+    return [parse_rating(text) for text in texts]
@@ -14,10 +14,77 @@ import sqlite3
 from datetime import datetime
 from html.parser import HTMLParser
 import ssl
+from collections import Counter
+
+from keyword_index import KeywordIndex
+from gazetteer import CompanyGazetteer
+from keyword_matcher import get_matcher
+from severity import ProblemClassifier
+from aggregates import StatsTable
+from crawl_budget import CrawlBudget
+from companies import CompanyResolver
+from db_writer import DatabaseWriter, install_shutdown_handler
+from models import content_fingerprint, reset_outdated_fingerprints
 
 # Configuração SSL
 ssl._create_default_https_context = ssl._create_unverified_context
 
+# Padrões de frase para empresas fora do gazetteer (compilados uma vez)
+COMPANY_PATTERNS = [
+    re.compile(r'empresa\s+([A-Z][a-zA-Z\s]+)'),
+    re.compile(r'([A-Z][a-zA-Z]+)\s+não\s+funciona'),
+    re.compile(r'problema\s+com\s+([A-Z][a-zA-Z\s]+)'),
+    re.compile(r'([A-Z][a-zA-Z]+)\s+tem\s+bug'),
+    re.compile(r'sistema\s+da\s+([A-Z][a-zA-Z\s]+)'),
+]
+
+DB_PATH = 'organized_complaints.db'
+
+INSERT_COMPLAINT_SQL = '''
+    INSERT OR IGNORE INTO complaints (
+        site_source, company_name, title, description, 
+        problem_category, severity_level, url, relevance_score, keywords_found, content_hash, company_id
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Contagens do relatório final por site, severidade, empresa e dia
+COMPLAINT_STATS = StatsTable(
+    'complaint_stats', 'complaints',
+    dimensions={
+        'total': "'all'",
+        'site': '{row}.site_source',
+        'severity': '{row}.severity_level',
+        'company': '{row}.company_id',
+        'day': 'date({row}.scraped_at)',
+    },
+    columns=('site_source', 'severity_level', 'company_id', 'scraped_at'),
+    score_column='relevance_score',
+)
+
+# Termos buscados por site, escolhidos pelo rendimento de cada termo (com exploração)
+CRAWL_BUDGET = CrawlBudget()
+TERMS_PER_SITE = 8
+
+# Palavras-chave por reclamação (substitui LIKE em keywords_found)
+KEYWORD_INDEX = KeywordIndex()
+
+def complaint_row(complaint, company_id):
+    """Valores da reclamação na ordem de INSERT_COMPLAINT_SQL"""
+    return (
+        complaint['site_source'], complaint['company_name'], complaint['title'],
+        complaint['description'], complaint['problem_category'], complaint['severity_level'],
+        complaint['url'], complaint['relevance_score'], complaint['keywords_found'],
+        content_fingerprint(complaint['site_source'], complaint['title'],
+                            complaint['company_name'], complaint['description']),
+        company_id
+    )
+
+def complaint_keyword_counts(complaint):
+    """Ocorrências de cada palavra-chave (uma, se a contagem não veio com a reclamação)"""
+    if complaint.get('keyword_counts'):
+        return complaint['keyword_counts']
+    return {keyword: 1 for keyword in (complaint.get('keywords_found') or '').split(', ') if keyword}
+
 class OrganizedScraper:
     """Scraper organizado com sistema de pastas"""
     
@@ -34,10 +101,19 @@ class OrganizedScraper:
             'técnico', 'suporte', 'helpdesk', 'TI', 'informática', 'crash',
             'timeout', 'loading', 'carregamento', 'freeze', 'trava'
         ]
+        self.matcher = get_matcher(tuple(self.ti_keywords), language='pt')
+        # Relevância, palavras-chave e severidade em uma passada (regras em severity_rules.txt)
+        self.classifier = ProblemClassifier(self.ti_keywords)
+        self.company_resolver = CompanyResolver()
+        # Requisições por termo no site atual e reclamações novas por (site, termo)
+        self.term_fetches = Counter()
+        self.term_stored = Counter()
         
         self.setup_directories()
         self.setup_database()
         self.sites_config = self.load_sites_config()
+        # Empresas confirmadas pelo scraper principal (nunca as dos padrões de frase)
+        self.gazetteer = CompanyGazetteer.from_databases(exclude=self.ti_keywords)
     
     def setup_directories(self):
         """Cria estrutura de pastas organizadas"""
@@ -97,7 +173,7 @@ class OrganizedScraper:
     
     def setup_database(self):
         """Configura banco de dados"""
-        self.conn = sqlite3.connect('organized_complaints.db')
+        self.conn = sqlite3.connect(DB_PATH)
         cursor = self.conn.cursor()
         
         cursor.execute('''
@@ -112,10 +188,49 @@ class OrganizedScraper:
                 url TEXT,
                 scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 relevance_score INTEGER,
-                keywords_found TEXT
+                keywords_found TEXT,
+                content_hash TEXT,
+                company_id INTEGER REFERENCES companies(id)
             )
         ''')
         
+        # Bancos criados antes da chave de deduplicação por conteúdo e da tabela de empresas
+        cursor.execute('PRAGMA table_info(complaints)')
+        existing_columns = {column[1] for column in cursor.fetchall()}
+        if 'content_hash' not in existing_columns:
+            cursor.execute('ALTER TABLE complaints ADD COLUMN content_hash TEXT')
+        if 'company_id' not in existing_columns:
+            cursor.execute('ALTER TABLE complaints ADD COLUMN company_id INTEGER REFERENCES companies(id)')
+        
+        reset_outdated_fingerprints(cursor)
+        # Índice antes do preenchimento: reclamações repetidas ficam com content_hash NULL
+        cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_content_hash ON complaints(content_hash)')
+        cursor.execute('SELECT id, site_source, title, company_name, description FROM complaints WHERE content_hash IS NULL')
+        cursor.executemany('UPDATE OR IGNORE complaints SET content_hash = ? WHERE id = ?', [
+            (content_fingerprint(site_source, title, company_name, description), complaint_id)
+            for complaint_id, site_source, title, company_name, description in cursor.fetchall()
+        ])
+        
+        # Empresas com nome canônico ("Empresa não identificada" fica sem empresa)
+        self.company_resolver.install(cursor)
+        self.company_resolver.load(cursor)
+        if 'company_id' not in existing_columns:
+            self.company_resolver.backfill(cursor)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_company_id ON complaints(company_id)')
+        
+        if COMPLAINT_STATS.install(cursor):
+            COMPLAINT_STATS.rebuild(cursor)
+        
+        CRAWL_BUDGET.install(cursor)
+        
+        # Índice de palavras-chave das reclamações já salvas
+        if KEYWORD_INDEX.install(cursor):
+            cursor.execute('SELECT id, description, keywords_found FROM complaints')
+            KEYWORD_INDEX.add(cursor, [
+                (complaint_id, self.count_keywords(description, keywords_found))
+                for complaint_id, description, keywords_found in cursor.fetchall()
+            ])
+        
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS scraping_stats (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -146,47 +261,19 @@ class OrganizedScraper:
             print(f"Erro ao acessar {url}: {e}")
             return None
     
-    def categorize_problem(self, text, keywords_found):
-        """Categoriza o problema encontrado"""
-        text_lower = text.lower()
-        
-        # Problemas críticos
-        critical_keywords = ['fora do ar', 'indisponível', 'crash', 'perda de dados', 'hack', 'vírus', 'malware']
-        if any(keyword in text_lower for keyword in critical_keywords):
-            return 'critical'
-        
-        # Problemas altos
-        high_keywords = ['bug', 'falha', 'erro', 'não funciona', 'travando', 'freeze']
-        if any(keyword in text_lower for keyword in high_keywords):
-            return 'high'
-        
-        # Problemas médios
-        medium_keywords = ['lentidão', 'lento', 'demora', 'timeout', 'loading']
-        if any(keyword in text_lower for keyword in medium_keywords):
-            return 'medium'
-        
-        # Problemas baixos
-        return 'low'
+    def categorize_problem(self, text, keywords_found=None):
+        """Categoriza o problema encontrado (nível de severity_rules.txt)"""
+        return self.classifier.classify(text).severity
     
     def calculate_relevance(self, text):
         """Calcula relevância e encontra palavras-chave"""
-        if not text:
-            return 0, []
-        
-        text_lower = text.lower()
-        score = 0
-        keywords_found = []
-        
-        for keyword in self.ti_keywords:
-            if keyword in text_lower:
-                score += 10
-                keywords_found.append(keyword)
-                
-                # Bonus para palavras críticas
-                if keyword in ['bug', 'falha', 'erro', 'crash', 'fora do ar']:
-                    score += 15
-        
-        return min(score, 100), keywords_found
+        classification = self.classifier.classify(text)
+        return classification.score, classification.keywords
+    
+    def count_keywords(self, text, keywords_found):
+        """Ocorrências no texto de cada palavra-chave de keywords_found (texto separado por vírgulas)"""
+        counts = self.matcher.count(text or '')
+        return {keyword: counts.get(keyword, 1) for keyword in (keywords_found or '').split(', ') if keyword}
     
     def extract_text_content(self, html_content):
         """Extrai texto do HTML"""
@@ -289,8 +376,8 @@ class OrganizedScraper:
         complaints = []
         
         try:
-            # Testa diferentes termos de busca
-            search_terms = self.ti_keywords[:8]  # Primeiros 8 termos
+            # Termos com melhor rendimento neste site, e alguns ainda pouco testados
+            search_terms = CRAWL_BUDGET.choose_terms(self.conn.cursor(), site_name, self.ti_keywords, TERMS_PER_SITE)
             
             for term in search_terms:
                 try:
@@ -302,6 +389,7 @@ class OrganizedScraper:
                     
                     print(f"  Buscando: {term}")
                     
+                    self.term_fetches[term] += 1
                     content = self.get_page_content(search_url)
                     if not content:
                         continue
@@ -309,10 +397,11 @@ class OrganizedScraper:
                     texts = self.extract_text_content(content)
                     
                     for text in texts:
-                        relevance_score, keywords_found = self.calculate_relevance(text)
+                        classification = self.classifier.classify(text)
+                        relevance_score, keywords_found = classification.score, classification.keywords
                         
                         if relevance_score >= 20:
-                            problem_category = self.categorize_problem(text, keywords_found)
+                            problem_category = classification.severity
                             
                             complaint = {
                                 'site_source': site_name,
@@ -323,7 +412,9 @@ class OrganizedScraper:
                                 'severity_level': problem_category,
                                 'url': search_url,
                                 'relevance_score': relevance_score,
-                                'keywords_found': ', '.join(keywords_found)
+                                'keywords_found': ', '.join(keywords_found),
+                                'keyword_counts': classification.keyword_counts,
+                                'search_term': term
                             }
                             
                             complaints.append(complaint)
@@ -359,16 +450,13 @@ class OrganizedScraper:
     
     def extract_company_name(self, text):
         """Extrai nome da empresa"""
-        patterns = [
-            r'empresa\s+([A-Z][a-zA-Z\s]+)',
-            r'([A-Z][a-zA-Z]+)\s+não\s+funciona',
-            r'problema\s+com\s+([A-Z][a-zA-Z\s]+)',
-            r'([A-Z][a-zA-Z]+)\s+tem\s+bug',
-            r'sistema\s+da\s+([A-Z][a-zA-Z\s]+)',
-        ]
+        # Empresas conhecidas em uma passada; padrões de frase só se nenhuma aparecer
+        company = self.gazetteer.find(text)
+        if company:
+            return company
         
-        for pattern in patterns:
-            match = re.search(pattern, text)
+        for pattern in COMPANY_PATTERNS:
+            match = pattern.search(text)
             if match:
                 return match.group(1).strip()
         
@@ -379,45 +467,63 @@ class OrganizedScraper:
         try:
             cursor = self.conn.cursor()
             
-            cursor.execute('''
-                SELECT id FROM complaints 
-                WHERE site_source = ? AND title = ? AND description = ?
-            ''', (complaint['site_source'], complaint['title'], complaint['description']))
-            
-            if cursor.fetchone():
-                return False
-            
-            cursor.execute('''
-                INSERT INTO complaints (
-                    site_source, company_name, title, description, 
-                    problem_category, severity_level, url, relevance_score, keywords_found
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                complaint['site_source'], complaint['company_name'], complaint['title'],
-                complaint['description'], complaint['problem_category'], complaint['severity_level'],
-                complaint['url'], complaint['relevance_score'], complaint['keywords_found']
-            ))
+            # A chave única (content_hash) descarta reclamações já salvas
+            company_id = self.company_resolver.resolve(cursor, complaint['company_name'])
+            cursor.execute(INSERT_COMPLAINT_SQL, complaint_row(complaint, company_id))
+            saved = cursor.rowcount == 1
+            if saved:
+                KEYWORD_INDEX.add(cursor, [(cursor.lastrowid, complaint_keyword_counts(complaint))])
             
             self.conn.commit()
-            return True
+            return saved
             
         except Exception as e:
+            self.conn.rollback()
+            self.company_resolver.clear()
             print(f"Erro ao salvar no banco: {e}")
             return False
     
+    def write_complaints(self, conn, complaints):
+        """Grava um bloco de reclamações em uma transação (usado pela thread de gravação)"""
+        cursor = conn.cursor()
+        saved = []
+        stored = Counter()
+        try:
+            for complaint in complaints:
+                company_id = self.company_resolver.resolve(cursor, complaint['company_name'])
+                cursor.execute(INSERT_COMPLAINT_SQL, complaint_row(complaint, company_id))
+                if cursor.rowcount == 1:
+                    saved.append((cursor.lastrowid, complaint_keyword_counts(complaint)))
+                    stored[complaint['site_source'], complaint.get('search_term', '')] += 1
+            
+            KEYWORD_INDEX.add(cursor, saved)
+            conn.commit()
+        except Exception:
+            # O writer conta as reclamações do bloco como perdidas
+            conn.rollback()
+            self.company_resolver.clear()
+            raise
+        self.term_stored.update(stored)
+        return len(saved)
+    
+    def record_term_yields(self, site_name):
+        """Grava o rendimento de cada termo buscado no site (depois que a fila foi gravada)"""
+        cursor = self.conn.cursor()
+        CRAWL_BUDGET.record(cursor, [
+            (site_name, term, fetches, self.term_stored.pop((site_name, term), 0))
+            for term, fetches in self.term_fetches.items()
+        ])
+        self.conn.commit()
+        self.term_fetches.clear()
+    
     def generate_final_report(self):
         """Gera relatório final"""
         cursor = self.conn.cursor()
         
-        # Estatísticas gerais
-        cursor.execute('SELECT COUNT(*) FROM complaints')
-        total_complaints = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT site_source, COUNT(*) FROM complaints GROUP BY site_source')
-        by_site = cursor.fetchall()
-        
-        cursor.execute('SELECT severity_level, COUNT(*) FROM complaints GROUP BY severity_level')
-        by_severity = cursor.fetchall()
+        # Estatísticas gerais (tabela de resumo mantida por triggers)
+        total_complaints, _ = COMPLAINT_STATS.total(cursor)
+        by_site = COMPLAINT_STATS.counts(cursor, 'site').items()
+        by_severity = COMPLAINT_STATS.counts(cursor, 'severity').items()
         
         # Gera relatório
         report_file = f'reports/final_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.txt'
@@ -449,19 +555,26 @@ class OrganizedScraper:
         
         all_complaints = []
         
-        for site_name, site_config in self.sites_config.items():
-            complaints = self.scrape_site(site_name, site_config)
-            
-            # Salva no banco
-            saved_count = 0
-            for complaint in complaints:
-                if self.save_complaint_to_db(complaint):
-                    saved_count += 1
-            
-            all_complaints.extend(complaints)
-            print(f"💾 {site_name}: {saved_count} problemas salvos no banco")
-            
-            time.sleep(3)  # Pausa entre sites
+        # Gravação em thread própria, que grava durante a pausa entre sites
+        writer = DatabaseWriter(connect=lambda: sqlite3.connect(DB_PATH), write_batch=self.write_complaints)
+        
+        try:
+            for site_name, site_config in self.sites_config.items():
+                complaints = self.scrape_site(site_name, site_config)
+                
+                # Salva no banco
+                saved_before = writer.saved_count
+                writer.submit_many(complaints)
+                all_complaints.extend(complaints)
+                
+                time.sleep(3)  # Pausa entre sites
+                
+                writer.flush()
+                saved_count = writer.saved_count - saved_before
+                self.record_term_yields(site_name)
+                print(f"💾 {site_name}: {saved_count} problemas salvos no banco")
+        finally:
+            writer.close()
         
         # Organiza problemas por severidade
         if all_complaints:
@@ -486,6 +599,7 @@ class OrganizedScraper:
 
 def main():
     """Função principal"""
+    install_shutdown_handler()
     scraper = OrganizedScraper()
     
     try:
@@ -0,0 +1,119 @@
+"""
+Scorers de relevância para TI (contagem de palavras-chave e BM25)
+"""
+
+import math
+import threading
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+# numpy só é importado pelos scorers: o banco usa apenas CorpusStats
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class CorpusStats:
+    """Estatísticas do corpus usadas pelo BM25: documentos, tamanho total e
+    quantidade de documentos que contêm cada palavra-chave.
+
+    A thread de gravação soma documentos enquanto os scrapers calculam
+    scores: as atualizações e as leituras do BM25 passam pelo mesmo lock.
+    """
+
+    def __init__(self, doc_count: int = 0, total_length: int = 0, doc_freq: Optional[Dict[str, int]] = None):
+        self.doc_count = doc_count
+        self.total_length = total_length
+        self.doc_freq = doc_freq or {}
+        self._lock = threading.Lock()
+
+    @property
+    def avg_length(self) -> float:
+        return self.total_length / self.doc_count if self.doc_count else 0.0
+
+    def add_document(self, keywords: Iterable[str], length: int):
+        """Atualiza as estatísticas com um novo documento"""
+        self.add_documents([(keywords, length)])
+
+    def add_documents(self, entries: Iterable[Tuple[Iterable[str], int]]):
+        """Atualiza as estatísticas com vários documentos (palavras-chave, tamanho)"""
+        with self._lock:
+            for keywords, length in entries:
+                self.doc_count += 1
+                self.total_length += length
+                for keyword in set(keywords):
+                    self.doc_freq[keyword] = self.doc_freq.get(keyword, 0) + 1
+
+    def replace(self, other: 'CorpusStats'):
+        """Substitui as estatísticas pelas de other (recálculo completo)"""
+        with self._lock:
+            self.doc_count = other.doc_count
+            self.total_length = other.total_length
+            self.doc_freq = dict(other.doc_freq)
+
+    def snapshot(self, keywords: Iterable[str]) -> Tuple[List[float], float]:
+        """IDF de cada palavra-chave e tamanho médio, lidos de forma consistente"""
+        with self._lock:
+            return [self.idf(keyword) for keyword in keywords], self.avg_length
+
+    def idf(self, keyword: str) -> float:
+        """IDF do BM25 (sempre positivo)"""
+        doc_freq = self.doc_freq.get(keyword, 0)
+        return math.log(1 + (self.doc_count - doc_freq + 0.5) / (doc_freq + 0.5))
+
+
+class KeywordScorer:
+    """Score original: 10 pontos por palavra-chave encontrada, 5 de bonus
+    para as de alta prioridade, limitado a 100"""
+
+    def __init__(self, keywords: List[str], high_priority_keywords: Iterable[str] = ()):
+        import numpy as np
+
+        high_priority = set(high_priority_keywords)
+        self.high_priority_mask = np.array([keyword in high_priority for keyword in keywords], dtype=bool)
+
+    def score_matrix(self, hits: 'np.ndarray', lengths: 'np.ndarray') -> 'np.ndarray':
+        import numpy as np
+
+        present = hits > 0
+        scores = present.sum(axis=1) * 10 + present[:, self.high_priority_mask].sum(axis=1) * 5
+        return np.minimum(scores, 100)
+
+
+class BM25Scorer:
+    """Score BM25 das palavras-chave de TI, considerando frequência do termo,
+    tamanho do documento e raridade do termo no corpus.
+
+    O valor bruto é mapeado para 0-100 com saturação, para manter a mesma
+    escala (e os mesmos limiares) do score por contagem.
+    """
+
+    def __init__(self, keywords: List[str], corpus_stats: CorpusStats,
+                 k1: float = 1.2, b: float = 0.75, saturation: float = 6.0):
+        self.keywords = keywords
+        self.corpus_stats = corpus_stats
+        self.k1 = k1
+        self.b = b
+        self.saturation = saturation
+
+    def score_matrix(self, hits: 'np.ndarray', lengths: 'np.ndarray') -> 'np.ndarray':
+        import numpy as np
+
+        idf, avg_length = self.corpus_stats.snapshot(self.keywords)
+        idf = np.array(idf)
+        avg_length = avg_length or max(float(lengths.mean()) if len(lengths) else 1.0, 1.0)
+
+        tf = hits.astype(np.float64)
+        norm = self.k1 * (1 - self.b + self.b * lengths[:, None] / avg_length)
+        raw = ((tf * (self.k1 + 1)) / (tf + norm) * idf).sum(axis=1)
+
+        return np.rint(100 * raw / (raw + self.saturation)).astype(np.int64)
+
+
+def create_scorer(name: str, keywords: List[str], high_priority_keywords: Iterable[str] = (),
+                  corpus_stats: Optional[CorpusStats] = None, **options):
+    """Cria o scorer configurado ('keyword' ou 'bm25')"""
+    if name == 'keyword':
+        return KeywordScorer(keywords, high_priority_keywords)
+    if name == 'bm25':
+        return BM25Scorer(keywords, corpus_stats or CorpusStats(), **options)
+
+    raise ValueError(f'Scorer de relevância desconhecido: {name}')
@@ -0,0 +1,253 @@
+"""
+Modo agendado: coleta contínua com intervalo por site, sem reiniciar o processo
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from config import SCHEDULER_CONFIG, SITES_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerLock:
+    """Arquivo de lock com heartbeat.
+
+    Criado de forma exclusiva (O_EXCL); enquanto o agendador roda, uma
+    thread atualiza a data de modificação do arquivo. Um lock sem
+    atualização há mais de stale_after segundos é de um processo que
+    morreu e pode ser tomado.
+    """
+
+    def __init__(self, path: str = SCHEDULER_CONFIG['lock_path'],
+                 stale_after: float = SCHEDULER_CONFIG['lock_stale_after']):
+        self.path = path
+        self.stale_after = stale_after
+        self._stop = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def acquire(self) -> bool:
+        try:
+            fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return self._take_over_stale()
+
+        return self._hold(fd)
+
+    def _hold(self, fd: int) -> bool:
+        with os.fdopen(fd, 'w') as f:
+            f.write(str(os.getpid()))
+
+        self._stop.clear()
+        self._heartbeat = threading.Thread(target=self._beat, name='scheduler-lock', daemon=True)
+        self._heartbeat.start()
+        return True
+
+    def _age(self, path: str) -> Optional[float]:
+        try:
+            return time.time() - os.path.getmtime(path)
+        except OSError:
+            return None
+
+    def _take_over_stale(self) -> bool:
+        age = self._age(self.path)
+        if age is not None and age < self.stale_after:
+            return False
+
+        if age is not None:
+            # Renomear é atômico: de dois agendadores que viram o lock abandonado, só um o move
+            stale_path = f'{self.path}.{os.getpid()}.stale'
+            try:
+                os.rename(self.path, stale_path)
+            except OSError:
+                return self._retry()
+
+            # Entre a verificação e o rename outro agendador pode ter assumido e
+            # criado um lock novo: nesse caso ele é devolvido intacto
+            stale_age = self._age(stale_path)
+            if stale_age is not None and stale_age < self.stale_after:
+                try:
+                    os.link(stale_path, self.path)
+                except OSError:
+                    pass
+                os.remove(stale_path)
+                return False
+
+            logger.warning(f"Lock abandonado há {age:.0f}s, assumindo: {self.path}")
+            os.remove(stale_path)
+
+        return self._retry()
+
+    def _retry(self) -> bool:
+        # Nova tentativa com O_EXCL: se outro agendador criou o lock antes, falha
+        try:
+            fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        return self._hold(fd)
+
+    def _beat(self):
+        while not self._stop.wait(self.stale_after / 3):
+            try:
+                os.utime(self.path)
+            except OSError as e:
+                logger.error(f"Erro ao renovar o lock {self.path}: {e}")
+
+    def release(self):
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+            self._heartbeat = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class CrawlScheduler:
+    """Coleta cada site quando vence o seu crawl_interval (com jitter).
+
+    O ComplaintsScraper é criado uma vez e mantido entre as coletas: os
+    navegadores do Selenium, as sessões HTTP e os matchers compilados são
+    reaproveitados, e a thread de gravação fica aberta. Um site só é coletado
+    de novo depois que a coleta anterior termina (o próximo horário conta a
+    partir do fim). O estado (próxima execução e resultado da última) fica em
+    state_path, então reiniciar o agendador não recoleta o que não venceu.
+    """
+
+    def __init__(self, sites: Optional[List[str]] = None,
+                 state_path: str = SCHEDULER_CONFIG['state_path'],
+                 jitter: float = SCHEDULER_CONFIG['jitter'],
+                 tick: float = SCHEDULER_CONFIG['tick'],
+                 max_pages: int = SCHEDULER_CONFIG['max_pages']):
+        self.sites = sites or [name for name, config in SITES_CONFIG.items() if config['enabled']]
+        self.state_path = state_path
+        self.jitter = jitter
+        self.tick = tick
+        self.max_pages = max_pages
+        self.state: Dict[str, Dict] = self.load_state()
+        self.scraper = None
+        self.writer = None
+
+    def load_state(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Estado do agendador inválido ({self.state_path}), recomeçando: {e}")
+            return {}
+
+    def save_state(self):
+        # Arquivo temporário + os.replace: uma interrupção não deixa o estado pela metade
+        tmp_path = f'{self.state_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def interval(self, site_name: str) -> float:
+        return SITES_CONFIG.get(site_name, {}).get('crawl_interval', SCHEDULER_CONFIG['default_interval'])
+
+    def next_run(self, site_name: str) -> float:
+        """Horário (epoch) da próxima coleta; 0 para sites nunca coletados"""
+        return self.state.get(site_name, {}).get('next_run', 0)
+
+    def due_sites(self, now: Optional[float] = None) -> List[str]:
+        """Sites com coleta vencida, os mais atrasados primeiro"""
+        now = time.time() if now is None else now
+        return sorted((site for site in self.sites if self.next_run(site) <= now), key=self.next_run)
+
+    def _start(self):
+        # Importado aqui: o módulo (e o CLI) carregam sem requests/Selenium
+        from main import ComplaintsScraper
+
+        self.scraper = ComplaintsScraper(self.sites)
+        self.scraper.keep_scrapers_open = True
+        self.writer = self.scraper.db_manager.create_writer()
+
+    def run_site(self, site_name: str) -> int:
+        """Coleta um site e agenda a próxima execução; retorna as reclamações salvas"""
+        started = time.time()
+        saved_before = self.writer.saved_count
+        error = None
+        found = 0
+
+        if site_name not in self.scraper.scrapers:
+            self.scraper.create_scraper(site_name)
+
+        successes_before = self.scraper.success_count(site_name)
+        try:
+            requests_before = self.scraper.request_count(site_name)
+            for complaint in self.scraper.stream_site(site_name, self.max_pages):
+                found += 1
+                self.writer.submit(complaint)
+            self.writer.flush()
+            self.scraper.record_yield(site_name, requests_before, self.writer.saved_count - saved_before)
+        except Exception as e:
+            error = str(e)
+            logger.error(f"Erro na coleta agendada de {site_name}: {e}")
+
+        # Navegador ou sessão podem ter morrido (erro ou nenhuma página obtida):
+        # a próxima coleta usa um scraper novo. Uma coleta sem reclamações de TI
+        # novas é normal e mantém o navegador aberto.
+        if error or self.scraper.success_count(site_name) == successes_before:
+            logger.warning(f"{site_name}: coleta {'com erro' if error else 'sem nenhuma página obtida'}, "
+                           f"recriando o scraper")
+            self.scraper.reset_scraper(site_name)
+
+        finished = time.time()
+        saved = self.writer.saved_count - saved_before
+        interval = self.interval(site_name)
+        next_run = finished + interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+        self.state[site_name] = {
+            'last_run': datetime.fromtimestamp(started).isoformat(timespec='seconds'),
+            'last_duration': round(finished - started, 1),
+            'last_saved': saved,
+            'last_found': found,
+            'last_error': error,
+            'runs': self.state.get(site_name, {}).get('runs', 0) + 1,
+            'next_run': next_run,
+            'next_run_at': datetime.fromtimestamp(next_run).isoformat(timespec='seconds'),
+        }
+        self.save_state()
+
+        logger.info(f"{site_name}: {saved} reclamações novas; próxima coleta às "
+                    f"{self.state[site_name]['next_run_at']}")
+        return saved
+
+    def run_pending(self) -> Dict[str, int]:
+        """Coleta os sites vencidos (um tick)"""
+        if self.scraper is None:
+            self._start()
+        return {site_name: self.run_site(site_name) for site_name in self.due_sites()
+                if site_name in SITES_CONFIG}
+
+    def run(self, once: bool = False):
+        """Executa ticks até ser interrompido (ou um só, com once)"""
+        try:
+            while True:
+                self.run_pending()
+                if once:
+                    break
+
+                pending = [self.next_run(site) for site in self.sites if site in SITES_CONFIG]
+                wait = min(pending) - time.time() if pending else self.tick
+                time.sleep(min(max(wait, 1), self.tick))
+        finally:
+            self.close()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        if self.scraper is not None:
+            self.scraper.cleanup()
+            self.scraper = None
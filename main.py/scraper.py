@@ -9,9 +9,18 @@ import sqlite3
 from datetime import datetime
 from html.parser import HTMLParser
 import ssl
+from collections import Counter
+
+from crawl_budget import CrawlBudget
+from severity import ProblemClassifier
+from models import content_fingerprint, reset_outdated_fingerprints
 
 ssl._create_default_https_context = ssl._create_unverified_context
 
+# Search terms per site, chosen by each term's yield (with exploration)
+CRAWL_BUDGET = CrawlBudget()
+TERMS_PER_SITE = 8
+
 class ITComplaintsScraper:
     def __init__(self):
         self.ti_keywords = [
@@ -26,6 +35,10 @@ class ITComplaintsScraper:
             'técnico', 'suporte', 'helpdesk', 'TI', 'informática', 'crash',
             'timeout', 'loading', 'carregamento', 'freeze', 'trava'
         ]
+        # Relevance, keywords and severity in a single pass (rules in severity_rules.txt)
+        self.classifier = ProblemClassifier(self.ti_keywords)
+        # Requests per term on the current site
+        self.term_fetches = Counter()
         
         self.setup_directories()
         self.setup_database()
@@ -101,10 +114,27 @@ class ITComplaintsScraper:
                 url TEXT,
                 scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 relevance_score INTEGER,
-                keywords_found TEXT
+                keywords_found TEXT,
+                content_hash TEXT
             )
         ''')
         
+        # Databases created before the content dedup key
+        cursor.execute('PRAGMA table_info(complaints)')
+        if 'content_hash' not in {column[1] for column in cursor.fetchall()}:
+            cursor.execute('ALTER TABLE complaints ADD COLUMN content_hash TEXT')
+        
+        reset_outdated_fingerprints(cursor)
+        # Índice antes do preenchimento: reclamações repetidas ficam com content_hash NULL
+        cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_content_hash ON complaints(content_hash)')
+        cursor.execute('SELECT id, site_source, title, company_name, description FROM complaints WHERE content_hash IS NULL')
+        cursor.executemany('UPDATE OR IGNORE complaints SET content_hash = ? WHERE id = ?', [
+            (content_fingerprint(site_source, title, company_name, description), complaint_id)
+            for complaint_id, site_source, title, company_name, description in cursor.fetchall()
+        ])
+        
+        CRAWL_BUDGET.install(cursor)
+        
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS scraping_stats (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -134,40 +164,12 @@ class ITComplaintsScraper:
             print(f"Error accessing {url}: {e}")
             return None
     
-    def categorize_problem(self, text, keywords_found):
-        text_lower = text.lower()
-        
-        critical_keywords = ['fora do ar', 'indisponível', 'crash', 'perda de dados', 'hack', 'vírus', 'malware']
-        if any(keyword in text_lower for keyword in critical_keywords):
-            return 'critical'
-        
-        high_keywords = ['bug', 'falha', 'erro', 'não funciona', 'travando', 'freeze']
-        if any(keyword in text_lower for keyword in high_keywords):
-            return 'high'
-        
-        medium_keywords = ['lentidão', 'lento', 'demora', 'timeout', 'loading']
-        if any(keyword in text_lower for keyword in medium_keywords):
-            return 'medium'
-        
-        return 'low'
+    def categorize_problem(self, text, keywords_found=None):
+        return self.classifier.classify(text).severity
     
     def calculate_relevance(self, text):
-        if not text:
-            return 0, []
-        
-        text_lower = text.lower()
-        score = 0
-        keywords_found = []
-        
-        for keyword in self.ti_keywords:
-            if keyword in text_lower:
-                score += 10
-                keywords_found.append(keyword)
-                
-                if keyword in ['bug', 'falha', 'erro', 'crash', 'fora do ar']:
-                    score += 15
-        
-        return min(score, 100), keywords_found
+        classification = self.classifier.classify(text)
+        return classification.score, classification.keywords
     
     def extract_text_content(self, html_content):
         if not html_content:
@@ -260,7 +262,8 @@ class ITComplaintsScraper:
         complaints = []
         
         try:
-            search_terms = self.ti_keywords[:8]
+            # Best-yielding terms on this site, plus a few still under-tested
+            search_terms = CRAWL_BUDGET.choose_terms(self.conn.cursor(), site_name, self.ti_keywords, TERMS_PER_SITE)
             
             for term in search_terms:
                 try:
@@ -271,6 +274,7 @@ class ITComplaintsScraper:
                     
                     print(f"  Searching: {term}")
                     
+                    self.term_fetches[term] += 1
                     content = self.get_page_content(search_url)
                     if not content:
                         continue
@@ -278,10 +282,11 @@ class ITComplaintsScraper:
                     texts = self.extract_text_content(content)
                     
                     for text in texts:
-                        relevance_score, keywords_found = self.calculate_relevance(text)
+                        classification = self.classifier.classify(text)
+                        relevance_score, keywords_found = classification.score, classification.keywords
                         
                         if relevance_score >= 20:
-                            problem_category = self.categorize_problem(text, keywords_found)
+                            problem_category = classification.severity
                             
                             complaint = {
                                 'site_source': site_name,
@@ -292,7 +297,8 @@ class ITComplaintsScraper:
                                 'severity_level': problem_category,
                                 'url': search_url,
                                 'relevance_score': relevance_score,
-                                'keywords_found': ', '.join(keywords_found)
+                                'keywords_found': ', '.join(keywords_found),
+                                'search_term': term
                             }
                             
                             complaints.append(complaint)
@@ -345,31 +351,33 @@ class ITComplaintsScraper:
             cursor = self.conn.cursor()
             
             cursor.execute('''
-                SELECT id FROM complaints 
-                WHERE site_source = ? AND title = ? AND description = ?
-            ''', (complaint['site_source'], complaint['title'], complaint['description']))
-            
-            if cursor.fetchone():
-                return False
-            
-            cursor.execute('''
-                INSERT INTO complaints (
+                INSERT OR IGNORE INTO complaints (
                     site_source, company_name, title, description, 
-                    problem_category, severity_level, url, relevance_score, keywords_found
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    problem_category, severity_level, url, relevance_score, keywords_found, content_hash
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 complaint['site_source'], complaint['company_name'], complaint['title'],
                 complaint['description'], complaint['problem_category'], complaint['severity_level'],
-                complaint['url'], complaint['relevance_score'], complaint['keywords_found']
+                complaint['url'], complaint['relevance_score'], complaint['keywords_found'],
+                content_fingerprint(complaint['site_source'], complaint['title'],
+                                    complaint['company_name'], complaint['description'])
             ))
             
             self.conn.commit()
-            return True
+            return cursor.rowcount == 1
             
         except Exception as e:
             print(f"Error saving to database: {e}")
             return False
     
+    def record_term_yields(self, site_name, stored):
+        """Records each searched term's requests and new complaints on the site"""
+        CRAWL_BUDGET.record(self.conn.cursor(), [
+            (site_name, term, fetches, stored[term]) for term, fetches in self.term_fetches.items()
+        ])
+        self.conn.commit()
+        self.term_fetches.clear()
+    
     def generate_final_report(self):
         cursor = self.conn.cursor()
         
@@ -413,9 +421,12 @@ class ITComplaintsScraper:
             complaints = self.scrape_site(site_name, site_config)
             
             saved_count = 0
+            stored = Counter()
             for complaint in complaints:
                 if self.save_complaint_to_db(complaint):
                     saved_count += 1
+                    stored[complaint['search_term']] += 1
+            self.record_term_yields(site_name, stored)
             
             all_complaints.extend(complaints)
             print(f"{site_name}: {saved_count} problems saved to database")
@@ -1,43 +1,113 @@
 
 
 import time
+import json
 import logging
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.service import Service
+from collections import Counter
+from itertools import islice
+from typing import Iterable, Iterator, List, Dict, Optional, Union
+import numpy as np
 import requests
 from bs4 import BeautifulSoup
 
 from utils import TextProcessor, RequestHandler, ScrapingHelper
-from config import SCRAPING_CONFIG
+from config import SCRAPING_CONFIG, SITES_CONFIG, TI_CLASSIFIER_CONFIG, TI_KEYWORDS
+from models import Complaint
+from severity import classify_severity
+from ti_classifier import load_ti_classifier
 
 logger = logging.getLogger(__name__)
 
+# Script executado dentro do navegador: aplica os seletores de cada campo e
+# devolve só os valores necessários em JSON, evitando transferir o page_source.
+# Um seletor no formato "css@atributo" lê o atributo em vez do texto.
+IN_BROWSER_EXTRACTION_SCRIPT = """
+const fieldSelectors = arguments[0];
+const cardSelectors = arguments[1];
+const maxCards = arguments[2];
+
+function pick(root, selectors) {
+    for (const selector of selectors) {
+        const at = selector.lastIndexOf('@');
+        const css = at > 0 ? selector.slice(0, at) : selector;
+        const attr = at > 0 ? selector.slice(at + 1) : null;
+        let element = null;
+        try {
+            element = root.querySelector(css);
+        } catch (e) {
+            continue;
+        }
+        if (!element) {
+            continue;
+        }
+        const value = attr ? element.getAttribute(attr) : element.textContent;
+        if (value && value.trim()) {
+            return value.trim();
+        }
+    }
+    return '';
+}
+
+function extract(root) {
+    const record = {};
+    for (const field of Object.keys(fieldSelectors)) {
+        record[field] = pick(root, fieldSelectors[field]);
+    }
+    return record;
+}
+
+if (!cardSelectors) {
+    return JSON.stringify(extract(document));
+}
+
+let cards = [];
+for (const selector of cardSelectors) {
+    cards = document.querySelectorAll(selector);
+    if (cards.length) {
+        break;
+    }
+}
+return JSON.stringify(Array.from(cards).slice(0, maxCards).map(extract));
+"""
+
 class BaseScraper(ABC):
     """Classe base para todos os scrapers de sites"""
 
+    # Requisições feitas por "página" de max_pages (o orçamento de coleta é dividido em requisições)
+    REQUESTS_PER_PAGE = 1
+
     def __init__(self, site_name: str, base_url: str, use_selenium: bool = False):
         self.site_name = site_name
         self.base_url = base_url
         self.use_selenium = use_selenium
-        self.text_processor = TextProcessor()
+        self.language = SITES_CONFIG.get(site_name, {}).get('language', 'pt')
+        self.text_processor = TextProcessor(language=self.language)
+        # Segunda etapa do filtro de TI (None se desativada ou sem modelo treinado)
+        self.ti_classifier = (load_ti_classifier(TI_CLASSIFIER_CONFIG['model_path'])
+                              if TI_CLASSIFIER_CONFIG['enabled'] else None)
         self.request_handler = RequestHandler(
             delay=SCRAPING_CONFIG['delay_between_requests'],
             max_retries=SCRAPING_CONFIG['max_retries']
         )
         self.driver = None
         self.session = requests.Session()
+        self.in_browser_extraction = use_selenium and SCRAPING_CONFIG.get('in_browser_extraction', False)
+        # Rendimento por termo de busca (sites com busca): requisições feitas
+        # por termo, termo que trouxe cada URL e reclamações de TI por termo
+        self.term_requests = Counter()
+        self.url_terms: Dict[str, str] = {}
+        self.term_found = Counter()
 
         if use_selenium:
             self.setup_selenium()
 
     def setup_selenium(self):
+        # Selenium e webdriver_manager só são importados pelos sites que usam navegador
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+        from webdriver_manager.chrome import ChromeDriverManager
 
         try:
             chrome_options = Options()
@@ -58,6 +128,22 @@ class BaseScraper(ABC):
             logger.error(f"Erro ao configurar Selenium para {self.site_name}: {e}")
             raise
 
+    def load_in_browser(self, url: str):
+        """Carrega a URL no Selenium e aguarda o body da página"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        self.driver.get(url)
+        time.sleep(2)
+
+        try:
+            WebDriverWait(self.driver, 10).until(
+                EC.presence_of_element_located((By.TAG_NAME, "body"))
+            )
+        except:
+            pass
+
     def get_page_content(self, url: str, use_selenium: bool = None) -> Optional[BeautifulSoup]:
 
         if use_selenium is None:
@@ -67,18 +153,10 @@ class BaseScraper(ABC):
             self.request_handler.wait_rate_limit()
 
             if use_selenium and self.driver:
-                self.driver.get(url)
-                time.sleep(2)
-
-
-                try:
-                    WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_element_located((By.TAG_NAME, "body"))
-                    )
-                except:
-                    pass
+                self.load_in_browser(url)
 
                 html_content = self.driver.page_source
+                self.request_handler.success_count += 1
                 return BeautifulSoup(html_content, 'html.parser')
 
             else:
@@ -86,12 +164,40 @@ class BaseScraper(ABC):
                 response = self.session.get(url, headers=headers, timeout=SCRAPING_CONFIG['timeout'])
                 response.raise_for_status()
 
+                self.request_handler.success_count += 1
                 return BeautifulSoup(response.content, 'html.parser')
 
         except Exception as e:
             logger.error(f"Erro ao obter conteúdo de {url}: {e}")
             return None
 
+    def extract_in_browser(self, url: str, field_selectors: Dict[str, List[str]],
+                           card_selectors: Optional[List[str]] = None,
+                           max_cards: int = 50) -> Union[Dict, List[Dict], None]:
+        """Extrai os campos da página com um único execute_script.
+
+        Sem card_selectors retorna um dict com os campos da página; com
+        card_selectors retorna uma lista de dicts, um por card encontrado.
+        Retorna None se não for possível extrair no navegador; com None, uma
+        lista vazia ou campos vazios o chamador usa o caminho via BeautifulSoup.
+        """
+        if not self.driver:
+            return None
+
+        try:
+            self.request_handler.wait_rate_limit()
+            self.load_in_browser(url)
+
+            payload = self.driver.execute_script(
+                IN_BROWSER_EXTRACTION_SCRIPT, field_selectors, card_selectors, max_cards
+            )
+            self.request_handler.success_count += 1
+            return json.loads(payload) if payload else None
+
+        except Exception as e:
+            logger.error(f"Erro na extração via navegador de {url}: {e}")
+            return None
+
     def close(self):
         """Fecha recursos utilizados"""
         if self.driver:
@@ -99,7 +205,7 @@ class BaseScraper(ABC):
         self.session.close()
 
     @abstractmethod
-    def extract_complaint_data(self, complaint_element) -> Dict:
+    def extract_complaint_data(self, complaint_element) -> Complaint:
 
         pass
 
@@ -109,42 +215,99 @@ class BaseScraper(ABC):
         pass
 
     @abstractmethod
-    def scrape_complaints(self, max_pages: int = 5) -> List[Dict]:
+    def iter_complaints(self, max_pages: int = 5, search_terms: Optional[List[str]] = None) -> Iterator[Complaint]:
 
         pass
 
-    def filter_ti_complaints(self, complaints: List[Dict]) -> List[Dict]:
+    @staticmethod
+    def default_search_terms() -> List[str]:
+        """Termos usados quando a coleta não recebe os escolhidos pelo orçamento"""
+        return TI_KEYWORDS[:SCRAPING_CONFIG['search_terms_per_site']]
+
+    def take_term_yields(self) -> Dict[str, Counter]:
+        """Requisições e reclamações de TI por termo desde a última chamada (zera as contagens)"""
+        yields = {'requests': self.term_requests, 'found': self.term_found}
+        self.term_requests = Counter()
+        self.term_found = Counter()
+        self.url_terms = {}
+        return yields
+
+    def scrape_complaints(self, max_pages: int = 5, search_terms: Optional[List[str]] = None) -> List[Complaint]:
+        """Coleta todas as reclamações do site em uma lista"""
+        return list(self.iter_complaints(max_pages, search_terms))
+
+    def iter_ti_complaints(self, complaints: Iterable[Complaint],
+                           chunk_size: int = SCRAPING_CONFIG['stream_batch_size']) -> Iterator[Complaint]:
+        """Filtra reclamações de TI de forma preguiçosa, pontuando em blocos de chunk_size"""
+        total = 0
+        passed = 0
+        complaints = iter(complaints)
+
+        while True:
+            chunk = list(islice(complaints, chunk_size))
+            if not chunk:
+                break
+
+            texts = [f"{complaint.get('title', '')} {complaint.get('description', '')}" for complaint in chunk]
+            batch = self.text_processor.score_batch(texts)
+            total += len(chunk)
+
+            selected = np.flatnonzero(batch['mask'])
+            probabilities = None
+            if self.ti_classifier is not None and len(selected):
+                probabilities = self.ti_classifier.predict_proba([texts[index] for index in selected])
+
+            for position, index in enumerate(selected):
+                complaint = chunk[index]
+                if probabilities is not None:
+                    if probabilities[position] < TI_CLASSIFIER_CONFIG['threshold']:
+                        continue
+                    complaint.ti_probability = float(probabilities[position])
+                complaint['ti_keywords'] = ','.join(self.text_processor.keywords_from_hits(batch['hits'][index]))
+                complaint['relevance_score'] = int(batch['scores'][index])
+                complaint['site_source'] = self.site_name
+                term = self.url_terms.get(complaint.url)
+                if term is not None:
+                    self.term_found[term] += 1
 
-        filtered_complaints = []
+                passed += 1
+                yield complaint
 
-        for complaint in complaints:
+        logger.info(f"{self.site_name}: {passed} reclamações de TI encontradas de {total} total")
 
-            text_to_analyze = f"{complaint.get('title', '')} {complaint.get('description', '')}"
+    def filter_ti_complaints(self, complaints: List[Complaint]) -> List[Complaint]:
 
-            if self.text_processor.is_ti_related(text_to_analyze):
-                relevance = self.text_processor.calculate_ti_relevance(text_to_analyze)
-                complaint['ti_keywords'] = ','.join(relevance['keywords_found'])
-                complaint['relevance_score'] = relevance['score']
-                complaint['site_source'] = self.site_name
+        return list(self.iter_ti_complaints(complaints, chunk_size=max(len(complaints), 1)))
 
-                filtered_complaints.append(complaint)
-
-        logger.info(f"{self.site_name}: {len(filtered_complaints)} reclamações de TI encontradas de {len(complaints)} total")
-        return filtered_complaints
-
-    def normalize_complaint_data(self, complaint: Dict) -> Dict:
-       
-        return {
-            'site_source': self.site_name,
-            'company_name': self.text_processor.clean_text(complaint.get('company_name', '')),
-            'complaint_date': self.text_processor.extract_date(complaint.get('complaint_date', '')),
-            'title': self.text_processor.clean_text(complaint.get('title', '')),
-            'description': self.text_processor.clean_text(complaint.get('description', '')),
-            'category': self.text_processor.clean_text(complaint.get('category', '')),
-            'rating': self.text_processor.extract_rating(complaint.get('rating', '')),
-            'status': self.text_processor.clean_text(complaint.get('status', '')),
-            'company_response': self.text_processor.clean_text(complaint.get('company_response', '')),
-            'url': complaint.get('url', ''),
-            'ti_keywords': complaint.get('ti_keywords', ''),
-            'relevance_score': complaint.get('relevance_score', 0)
-        }
+    def iter_normalized(self, complaints: Iterable[Complaint]) -> Iterator[Complaint]:
+        """Normaliza reclamações de forma preguiçosa"""
+        for complaint in complaints:
+            yield self.normalize_complaint_data(complaint)
+
+    def stream_complaints(self, max_pages: int = 5, search_terms: Optional[List[str]] = None) -> Iterator[Complaint]:
+        """Pipeline completo em streaming: coleta -> filtro de TI -> normalização"""
+        return self.iter_normalized(self.iter_ti_complaints(self.iter_complaints(max_pages, search_terms)))
+
+    def normalize_complaint_data(self, complaint: Union[Complaint, Dict]) -> Complaint:
+        """Normaliza os campos no próprio registro (sem copiar a reclamação)"""
+        complaint = Complaint.coerce(complaint)
+        text_processor = self.text_processor
+
+        complaint['site_source'] = self.site_name
+        complaint.company_name = text_processor.clean_text(complaint.get('company_name', ''))
+        # Texto original guardado para renormalizar depois (datas relativas dependem da coleta)
+        complaint.complaint_date_raw = str(complaint.get('complaint_date', '')).strip() or None
+        complaint_date = text_processor.extract_date(complaint.complaint_date_raw)
+        complaint.complaint_date = complaint_date.date().isoformat() if complaint_date else None
+        complaint.title = text_processor.clean_text(complaint.get('title', ''))
+        complaint.description = text_processor.clean_text(complaint.get('description', ''))
+        complaint['category'] = text_processor.clean_text(complaint.get('category', ''))
+        complaint.rating = text_processor.extract_rating(complaint.get('rating', ''))
+        complaint['status'] = text_processor.clean_text(complaint.get('status', ''))
+        complaint.company_response = text_processor.clean_text(complaint.get('company_response', ''))
+        complaint.url = complaint.get('url', '')
+        complaint.ti_keywords = complaint.get('ti_keywords', '')
+        complaint.relevance_score = complaint.get('relevance_score', 0)
+        complaint.severity_level = classify_severity(f'{complaint.title} {complaint.description}')
+
+        return complaint
@@ -2,18 +2,20 @@
 
 import time
 import logging
-from typing import List, Dict
+from typing import Iterator, List, Dict, Optional
 from urllib.parse import urljoin, urlparse
 import requests
 from bs4 import BeautifulSoup
 
 from scrapers.base_scraper import BaseScraper
-from config import TI_KEYWORDS
+from models import Complaint
 
 logger = logging.getLogger(__name__)
 
 class GenericScraper(BaseScraper):
 
+    # Cada página equivale a 5 reclamações abertas
+    REQUESTS_PER_PAGE = 5
 
     def __init__(self, site_name: str, base_url: str, search_url: str = None):
         super().__init__(
@@ -161,9 +163,9 @@ class GenericScraper(BaseScraper):
 
         return urls
 
-    def extract_complaint_data(self, soup) -> Dict:
+    def extract_complaint_data(self, soup) -> Complaint:
         """Extrai dados de forma genérica"""
-        complaint_data = {}
+        complaint_data = Complaint()
 
         try:
 
@@ -250,17 +252,17 @@ class GenericScraper(BaseScraper):
 
         return complaint_data
 
-    def scrape_complaints(self, max_pages: int = 5) -> List[Dict]:
-        """Scraping principal genérico"""
-        complaints = []
+    def iter_complaints(self, max_pages: int = 5, search_terms: Optional[List[str]] = None) -> Iterator[Complaint]:
+        """Scraping principal genérico (gera as reclamações conforme são coletadas)"""
+        collected = 0
 
         try:
             # Obtém URLs de reclamações
-            complaint_urls = self.get_complaint_urls(TI_KEYWORDS[:5])
+            complaint_urls = self.get_complaint_urls(search_terms or self.default_search_terms())
 
             logger.info(f"Encontradas {len(complaint_urls)} URLs em {self.site_name}")
 
-            for i, url in enumerate(complaint_urls[:max_pages * 5]):
+            for i, url in enumerate(complaint_urls[:max_pages * self.REQUESTS_PER_PAGE]):
                 try:
                     logger.info(f"Processando {i+1}/{len(complaint_urls)}: {url}")
 
@@ -271,7 +273,8 @@ class GenericScraper(BaseScraper):
                     complaint_data = self.extract_complaint_data(soup)
                     if complaint_data.get('title') or complaint_data.get('description'):
                         complaint_data['url'] = url
-                        complaints.append(complaint_data)
+                        yield complaint_data
+                        collected += 1
 
                     time.sleep(1)
 
@@ -279,9 +282,7 @@ class GenericScraper(BaseScraper):
                     logger.error(f"Erro ao processar {url}: {e}")
                     continue
 
-            logger.info(f"{self.site_name}: {len(complaints)} reclamações coletadas")
+            logger.info(f"{self.site_name}: {collected} reclamações coletadas")
 
         except Exception as e:
             logger.error(f"Erro no scraping de {self.site_name}: {e}")
-
-        return complaints
@@ -1,8 +1,9 @@
 
 
+import math
 import time
 import logging
-from typing import List, Dict
+from typing import Iterator, List, Dict, Optional
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
@@ -10,13 +11,31 @@ from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from datetime import datetime
 
 from scrapers.base_scraper import BaseScraper
-from config import TI_KEYWORDS
+from models import Complaint
 
 logger = logging.getLogger(__name__)
 
 class ReclameAquiScraper(BaseScraper):
     """Scraper para o site Reclame Aqui"""
 
+    # Cada página equivale a 10 reclamações abertas
+    REQUESTS_PER_PAGE = 10
+
+    # Seletores usados na extração dentro do navegador (mesma ordem de
+    # prioridade de extract_complaint_data)
+    FIELD_SELECTORS = {
+        'title': ['h1.complaint-title', 'h1[data-testid="complaint-title"]', 'h1'],
+        'company_name': ['span.company-name', 'a.company-link', 'span[data-testid="company-name"]'],
+        'complaint_date': ['time', 'span.complaint-date'],
+        'description': ['div.complaint-text', 'div[data-testid="complaint-description"]',
+                        'div.complaint-description'],
+        'status': ['span.status', 'div.complaint-status'],
+        'category': ['span.category', 'div.complaint-category'],
+        'rating': ['span.rating', 'div.stars'],
+        'company_response': ['div.company-response ~ div.response-text', 'div.company-response',
+                             'div[data-testid="company-response"]'],
+    }
+
     def __init__(self):
         super().__init__(
             site_name='reclame_aqui',
@@ -24,16 +43,18 @@ class ReclameAquiScraper(BaseScraper):
             use_selenium=True
         )
 
-    def get_complaint_urls(self, search_terms: List[str]) -> List[str]:
-        """Obtém URLs de reclamações do Reclame Aqui"""
+    def get_complaint_urls(self, search_terms: List[str], per_term: int = 10) -> List[str]:
+        """Obtém até per_term URLs de reclamações de cada termo de busca"""
         complaint_urls = []
 
-        for term in search_terms[:5]:  # Limita termos de busca
+        for term in search_terms:
             try:
                 search_url = f"{self.base_url}/busca?q={term}"
                 logger.info(f"Buscando no Reclame Aqui: {term}")
 
+                requests_before = self.request_handler.request_count
                 soup = self.get_page_content(search_url)
+                self.term_requests[term] += self.request_handler.request_count - requests_before
                 if not soup:
                     continue
 
@@ -43,12 +64,13 @@ class ReclameAquiScraper(BaseScraper):
                     # Tenta seletores alternativos
                     complaint_links = soup.find_all('a', href=lambda x: x and '/reclamacao/' in x)
 
-                for link in complaint_links[:10]:  # Limita por termo
+                for link in complaint_links[:per_term]:
                     href = link.get('href')
                     if href:
                         if not href.startswith('http'):
                             href = self.base_url + href
                         complaint_urls.append(href)
+                        self.url_terms.setdefault(href, term)
 
                 time.sleep(2)
 
@@ -58,9 +80,9 @@ class ReclameAquiScraper(BaseScraper):
 
         return list(set(complaint_urls))  # Remove duplicatas
 
-    def extract_complaint_data(self, soup) -> Dict:
+    def extract_complaint_data(self, soup) -> Complaint:
 
-        complaint_data = {}
+        complaint_data = Complaint()
 
         try:
 
@@ -128,28 +150,45 @@ class ReclameAquiScraper(BaseScraper):
 
         return complaint_data
 
-    def scrape_complaints(self, max_pages: int = 5) -> List[Dict]:
-        """Scraping principal do Reclame Aqui"""
-        complaints = []
+    def fetch_complaint(self, url: str) -> Optional[Complaint]:
+        """Obtém os dados de uma reclamação, extraindo no navegador quando possível"""
+        if self.in_browser_extraction:
+            fields = self.extract_in_browser(url, self.FIELD_SELECTORS)
+            if fields and (fields.get('title') or fields.get('description')):
+                return Complaint(**fields)
+
+        soup = self.get_page_content(url)
+        if not soup:
+            return None
+
+        return self.extract_complaint_data(soup)
+
+    def iter_complaints(self, max_pages: int = 5, search_terms: Optional[List[str]] = None) -> Iterator[Complaint]:
+        """Scraping principal do Reclame Aqui (gera as reclamações conforme são coletadas)
+
+        search_terms são os termos escolhidos pelo orçamento de coleta; as
+        max_pages * REQUESTS_PER_PAGE reclamações abertas são divididas entre eles.
+        """
+        collected = 0
 
         try:
-            # Obtém URLs de reclamações usando palavras-chave de TI
-            complaint_urls = self.get_complaint_urls(TI_KEYWORDS[:10])
+            search_terms = search_terms or self.default_search_terms()
+            max_complaints = max_pages * self.REQUESTS_PER_PAGE
+            complaint_urls = self.get_complaint_urls(search_terms, math.ceil(max_complaints / len(search_terms)))
 
             logger.info(f"Encontradas {len(complaint_urls)} URLs de reclamações no Reclame Aqui")
 
-            for i, url in enumerate(complaint_urls[:max_pages * 10]):  # Limita total de páginas
+            for i, url in enumerate(complaint_urls[:max_complaints]):
                 try:
                     logger.info(f"Processando reclamação {i+1}/{len(complaint_urls)}: {url}")
 
-                    soup = self.get_page_content(url)
-                    if not soup:
-                        continue
-
-                    complaint_data = self.extract_complaint_data(soup)
-                    if complaint_data.get('title'):
+                    requests_before = self.request_handler.request_count
+                    complaint_data = self.fetch_complaint(url)
+                    self.term_requests[self.url_terms[url]] += self.request_handler.request_count - requests_before
+                    if complaint_data and complaint_data.get('title'):
                         complaint_data['url'] = url
-                        complaints.append(complaint_data)
+                        yield complaint_data
+                        collected += 1
 
                     # Pausa entre requisições
                     time.sleep(1)
@@ -158,14 +197,12 @@ class ReclameAquiScraper(BaseScraper):
                     logger.error(f"Erro ao processar reclamação {url}: {e}")
                     continue
 
-            logger.info(f"Reclame Aqui: {len(complaints)} reclamações coletadas")
+            logger.info(f"Reclame Aqui: {collected} reclamações coletadas")
 
         except Exception as e:
             logger.error(f"Erro no scraping do Reclame Aqui: {e}")
 
-        return complaints
-
-    def search_by_category(self, category: str = 'tecnologia') -> List[Dict]:
+    def search_by_category(self, category: str = 'tecnologia') -> List[Complaint]:
         """Busca reclamações por categoria específica"""
         complaints = []
 
@@ -189,12 +226,10 @@ class ReclameAquiScraper(BaseScraper):
                             complaint_url = self.base_url + complaint_url
 
                         # Extrai dados da reclamação
-                        complaint_soup = self.get_page_content(complaint_url)
-                        if complaint_soup:
-                            complaint_data = self.extract_complaint_data(complaint_soup)
-                            if complaint_data.get('title'):
-                                complaint_data['url'] = complaint_url
-                                complaints.append(complaint_data)
+                        complaint_data = self.fetch_complaint(complaint_url)
+                        if complaint_data and complaint_data.get('title'):
+                            complaint_data['url'] = complaint_url
+                            complaints.append(complaint_data)
 
                         time.sleep(1)
 
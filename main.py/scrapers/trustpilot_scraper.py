@@ -2,20 +2,36 @@
 
 import time
 import logging
-from typing import List, Dict
+from typing import Iterator, List, Dict, Optional
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
 from scrapers.base_scraper import BaseScraper
-from config import TI_KEYWORDS
+from models import Complaint
 
 logger = logging.getLogger(__name__)
 
 class TrustpilotScraper(BaseScraper):
     """Scraper para o site Trustpilot"""
 
+    # Cada página é uma empresa (uma requisição)
+    REQUESTS_PER_PAGE = 1
+
+    # Seletores usados na extração dentro do navegador
+    REVIEW_CARD_SELECTORS = ['div.review-card', 'article.review', 'div[data-service-review-card-paper="true"]']
+    REVIEW_FIELD_SELECTORS = {
+        'title': ['h2.review-title', 'h2[data-service-review-title-typography="true"]', 'h2'],
+        'company_name': ['span.company-name', 'a.company-link', 'h1'],
+        'complaint_date': ['time@datetime', 'time', 'span.review-date', 'div.review-date'],
+        'description': ['div.review-content', 'p[data-service-review-text-typography="true"]',
+                        'div.review-text'],
+        'rating': ['div[data-service-review-rating]@data-service-review-rating',
+                   'div.star-rating', 'div.stars', 'span.rating'],
+        'company_response': ['div.company-response', 'div.business-response'],
+    }
+
     def __init__(self):
         super().__init__(
             site_name='trustpilot',
@@ -51,9 +67,9 @@ class TrustpilotScraper(BaseScraper):
 
         return list(set(review_urls))
 
-    def extract_complaint_data(self, soup) -> Dict:
+    def extract_complaint_data(self, soup) -> Complaint:
         """Extrai dados de uma review do Trustpilot"""
-        complaint_data = {}
+        complaint_data = Complaint()
 
         try:
 
@@ -118,11 +134,35 @@ class TrustpilotScraper(BaseScraper):
 
         return complaint_data
 
-    def scrape_company_reviews(self, company_url: str, max_reviews: int = 10) -> List[Dict]:
+    def scrape_company_reviews(self, company_url: str, max_reviews: int = 10) -> List[Complaint]:
         """Scraping de reviews de uma empresa específica"""
         reviews = []
 
         try:
+            review_records = None
+            if self.in_browser_extraction:
+                review_records = self.extract_in_browser(
+                    company_url, self.REVIEW_FIELD_SELECTORS,
+                    card_selectors=self.REVIEW_CARD_SELECTORS, max_cards=max_reviews
+                )
+
+            # Nenhum card no navegador (seletores desatualizados ou página ainda
+            # renderizando): segue para a extração via BeautifulSoup
+            if review_records:
+                for fields in review_records:
+                    complaint_data = Complaint(**fields)
+                    rating = complaint_data.get('rating', '')
+                    if rating.isdigit():
+                        complaint_data['rating'] = f"{rating}/5"
+                    complaint_data['status'] = 'Publicada'
+                    complaint_data['category'] = 'Tecnologia'
+                    if complaint_data.get('title') or complaint_data.get('description'):
+                        complaint_data['url'] = company_url
+                        reviews.append(complaint_data)
+
+                if reviews:
+                    return reviews
+
             soup = self.get_page_content(company_url)
             if not soup:
                 return reviews
@@ -148,13 +188,13 @@ class TrustpilotScraper(BaseScraper):
 
         return reviews
 
-    def scrape_complaints(self, max_pages: int = 5) -> List[Dict]:
-        """Scraping principal do Trustpilot"""
-        complaints = []
+    def iter_complaints(self, max_pages: int = 5, search_terms: Optional[List[str]] = None) -> Iterator[Complaint]:
+        """Scraping principal do Trustpilot (gera as reclamações conforme são coletadas)"""
+        collected = 0
 
         try:
             # Obtém URLs de empresas
-            company_urls = self.get_complaint_urls(TI_KEYWORDS[:5])
+            company_urls = self.get_complaint_urls(search_terms or self.default_search_terms())
 
             logger.info(f"Encontradas {len(company_urls)} empresas no Trustpilot")
 
@@ -164,7 +204,8 @@ class TrustpilotScraper(BaseScraper):
 
                     # Coleta reviews da empresa
                     company_reviews = self.scrape_company_reviews(url, max_reviews=5)
-                    complaints.extend(company_reviews)
+                    yield from company_reviews
+                    collected += len(company_reviews)
 
                     # Pausa entre empresas
                     time.sleep(2)
@@ -173,14 +214,12 @@ class TrustpilotScraper(BaseScraper):
                     logger.error(f"Erro ao processar empresa {url}: {e}")
                     continue
 
-            logger.info(f"Trustpilot: {len(complaints)} reviews coletadas")
+            logger.info(f"Trustpilot: {collected} reviews coletadas")
 
         except Exception as e:
             logger.error(f"Erro no scraping do Trustpilot: {e}")
 
-        return complaints
-
-    def search_by_keywords(self, keywords: List[str]) -> List[Dict]:
+    def search_by_keywords(self, keywords: List[str]) -> List[Complaint]:
         """Busca reviews por palavras-chave específicas"""
         complaints = []
 
@@ -0,0 +1,123 @@
+"""
+Classificação de problemas em uma passada: relevância, palavras-chave e severidade
+"""
+
+import os
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from keyword_matcher import TokenIndex, TokenMatcher, tokenize
+from stemming import stem
+
+SEVERITY_RULES_PATH = 'severity_rules.txt'
+
+# Usadas quando o arquivo de regras não existe (em ordem de prioridade)
+DEFAULT_RULES = [
+    ('critical', ['fora do ar', 'indisponível', 'crash', 'crashes', 'perda de dados', 'hack', 'hackeado',
+                  'vírus', 'malware']),
+    ('high', ['bug', 'bugs', 'falha', 'falhas', 'falhou', 'erro', 'erros', 'não funciona', 'trava', 'travou',
+              'travando', 'travamento', 'freeze']),
+    ('medium', ['lentidão', 'lento', 'demora', 'timeout', 'loading']),
+]
+
+# Severidade quando nenhuma regra casa
+DEFAULT_SEVERITY = 'low'
+
+# Palavras-chave de TI que valem bônus na relevância
+BONUS_KEYWORDS = ('bug', 'falha', 'erro', 'crash', 'fora do ar')
+
+
+class Classification(NamedTuple):
+    score: int
+    keywords: List[str]
+    keyword_counts: Dict[str, int]
+    severity: str
+
+
+def load_severity_rules(path: str = SEVERITY_RULES_PATH) -> List[Tuple[str, List[str]]]:
+    """Lê as regras "nivel|palavra, palavra, ..." (uma linha por nível, da maior
+    para a menor severidade); sem o arquivo, usa DEFAULT_RULES"""
+    if not os.path.exists(path):
+        return DEFAULT_RULES
+
+    rules: Dict[str, List[str]] = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#') or '|' not in line:
+                continue
+            level, keywords = line.split('|', 1)
+            rules.setdefault(level.strip(), []).extend(
+                keyword.strip() for keyword in keywords.split(',') if keyword.strip()
+            )
+    return list(rules.items())
+
+
+class ProblemClassifier:
+    """Relevância, palavras-chave (com contagem) e severidade a partir de uma
+    única tokenização do texto.
+
+    As palavras-chave de TI são comparadas por radical (language); as das
+    regras de severidade, por palavra inteira, sem radical: cada variação
+    aceita fica listada nas regras, para que palavras comuns parecidas
+    ("errada", "seguro") não tornem grave um texto que não é de TI. A
+    severidade é o primeiro nível das regras com alguma ocorrência.
+    """
+
+    def __init__(self, ti_keywords: Iterable[str], rules: Optional[List[Tuple[str, List[str]]]] = None,
+                 bonus_keywords: Iterable[str] = BONUS_KEYWORDS, language: Optional[str] = 'pt'):
+        self.ti_keywords = list(dict.fromkeys(ti_keywords))
+        self.rules = load_severity_rules() if rules is None else rules
+        self.bonus_keywords = frozenset(bonus_keywords)
+        self.language = language
+
+        self.matcher = TokenMatcher(self.ti_keywords, language)
+
+        # Palavra-chave -> prioridade do nível (0 = mais grave)
+        priorities: Dict[str, int] = {}
+        for priority, (_, keywords) in enumerate(self.rules):
+            for keyword in keywords:
+                priorities.setdefault(keyword, priority)
+        self.severity_matcher = TokenMatcher(priorities.keys())
+        self._priority = [priorities[keyword] for keyword in self.severity_matcher.keywords]
+
+    def severity(self, text: str) -> str:
+        """Só o nível de severidade do texto (sem a relevância)"""
+        if not text:
+            return DEFAULT_SEVERITY
+        priority = min((self._priority[index] for _, index in self.severity_matcher.find_all(text)),
+                       default=len(self.rules))
+        return self.rules[priority][0] if priority < len(self.rules) else DEFAULT_SEVERITY
+
+    def classify(self, text: str) -> Classification:
+        """Relevância (0-100), palavras-chave de TI, ocorrências e severidade do texto"""
+        if not text:
+            return Classification(0, [], {}, DEFAULT_SEVERITY)
+
+        tokens = tokenize(text)
+        words = TokenIndex.from_tokens(tokens)
+        stems = TokenIndex.from_tokens([stem(token, self.language) for token in tokens]) if self.language else words
+
+        counts: Dict[int, int] = {}
+        for _, index in self.matcher.find_in_index(stems):
+            counts[index] = counts.get(index, 0) + 1
+
+        best_priority = min((self._priority[index] for _, index in self.severity_matcher.find_in_index(words)),
+                            default=len(self.rules))
+
+        keywords = [self.matcher.keywords[index] for index in sorted(counts)]
+        score = sum(25 if keyword in self.bonus_keywords else 10 for keyword in keywords)
+        severity = self.rules[best_priority][0] if best_priority < len(self.rules) else DEFAULT_SEVERITY
+
+        return Classification(min(score, 100), keywords,
+                              {self.matcher.keywords[index]: count for index, count in counts.items()}, severity)
+
+
+_severity_classifier: Optional[ProblemClassifier] = None
+
+
+def classify_severity(text: str) -> str:
+    """Severidade pelas regras de severity_rules.txt (carregadas uma vez por processo)"""
+    global _severity_classifier
+    if _severity_classifier is None:
+        _severity_classifier = ProblemClassifier(())
+    return _severity_classifier.severity(text)
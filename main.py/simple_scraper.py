@@ -13,10 +13,28 @@ import sqlite3
 from datetime import datetime
 from html.parser import HTMLParser
 import ssl
+from collections import Counter
+
+from crawl_budget import CrawlBudget
+from gazetteer import CompanyGazetteer
+from keyword_matcher import get_matcher
+from models import content_fingerprint, reset_outdated_fingerprints
 
 # Configuração para ignorar certificados SSL (apenas para testes)
 ssl._create_default_https_context = ssl._create_unverified_context
 
+# Termos buscados por site, escolhidos pelo rendimento de cada termo (com exploração)
+CRAWL_BUDGET = CrawlBudget()
+TERMS_PER_SITE = 5
+
+# Padrões de frase para empresas fora do gazetteer (compilados uma vez)
+COMPANY_PATTERNS = [
+    re.compile(r'empresa\s+([A-Z][a-zA-Z\s]+)'),
+    re.compile(r'([A-Z][a-zA-Z]+)\s+não\s+resolve'),
+    re.compile(r'problema\s+com\s+([A-Z][a-zA-Z\s]+)'),
+    re.compile(r'([A-Z][a-zA-Z]+)\s+tem\s+falha'),
+]
+
 class SimpleHTMLParser(HTMLParser):
     """Parser HTML simples para extrair dados"""
     
@@ -62,6 +80,11 @@ class SimpleScraper:
             'lento', 'travando', 'fora do ar', 'indisponível', 'manutenção',
             'técnico', 'suporte', 'helpdesk', 'TI', 'informática'
         ]
+        self.matcher = get_matcher(tuple(self.ti_keywords), language='pt')
+        # Empresas confirmadas pelo scraper principal (nunca as dos padrões de frase)
+        self.gazetteer = CompanyGazetteer.from_databases(exclude=self.ti_keywords)
+        # Requisições por termo no site atual
+        self.term_fetches = Counter()
         self.setup_database()
     
     def setup_database(self):
@@ -78,10 +101,27 @@ class SimpleScraper:
                 description TEXT,
                 url TEXT,
                 scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                relevance_score INTEGER
+                relevance_score INTEGER,
+                content_hash TEXT
             )
         ''')
         
+        # Bancos criados antes da chave de deduplicação por conteúdo
+        cursor.execute('PRAGMA table_info(complaints)')
+        if 'content_hash' not in {column[1] for column in cursor.fetchall()}:
+            cursor.execute('ALTER TABLE complaints ADD COLUMN content_hash TEXT')
+        
+        reset_outdated_fingerprints(cursor)
+        # Índice antes do preenchimento: reclamações repetidas ficam com content_hash NULL
+        cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_content_hash ON complaints(content_hash)')
+        cursor.execute('SELECT id, site_source, title, company_name, description FROM complaints WHERE content_hash IS NULL')
+        cursor.executemany('UPDATE OR IGNORE complaints SET content_hash = ? WHERE id = ?', [
+            (content_fingerprint(site_source, title, company_name, description), complaint_id)
+            for complaint_id, site_source, title, company_name, description in cursor.fetchall()
+        ])
+        
+        CRAWL_BUDGET.install(cursor)
+        
         self.conn.commit()
         print("Banco de dados configurado com sucesso!")
     
@@ -106,14 +146,8 @@ class SimpleScraper:
         if not text:
             return 0
         
-        text_lower = text.lower()
-        score = 0
-        keywords_found = []
-        
-        for keyword in self.ti_keywords:
-            if keyword in text_lower:
-                score += 10
-                keywords_found.append(keyword)
+        keywords_found = self.matcher.find_keywords(text)
+        score = len(keywords_found) * 10
         
         return min(score, 100), keywords_found
     
@@ -150,7 +184,8 @@ class SimpleScraper:
         complaints = []
         
         if not search_terms:
-            search_terms = self.ti_keywords[:5]  # Usa primeiras 5 palavras-chave
+            # Termos com melhor rendimento neste site, e alguns ainda pouco testados
+            search_terms = CRAWL_BUDGET.choose_terms(self.conn.cursor(), site_name, self.ti_keywords, TERMS_PER_SITE)
         
         print(f"\nIniciando scraping de {site_name}...")
         
@@ -167,6 +202,7 @@ class SimpleScraper:
                 for search_url in search_urls:
                     print(f"Tentando: {search_url}")
                     
+                    self.term_fetches[term] += 1
                     content = self.get_page_content(search_url)
                     if not content:
                         continue
@@ -184,7 +220,8 @@ class SimpleScraper:
                                 'title': text[:100] + '...' if len(text) > 100 else text,
                                 'description': text,
                                 'url': search_url,
-                                'relevance_score': relevance_score
+                                'relevance_score': relevance_score,
+                                'search_term': term
                             }
                             
                             complaints.append(complaint)
@@ -201,16 +238,13 @@ class SimpleScraper:
     
     def extract_company_name(self, text):
         """Tenta extrair nome da empresa do texto"""
-        # Padrões simples para identificar nomes de empresas
-        patterns = [
-            r'empresa\s+([A-Z][a-zA-Z\s]+)',
-            r'([A-Z][a-zA-Z]+)\s+não\s+resolve',
-            r'problema\s+com\s+([A-Z][a-zA-Z\s]+)',
-            r'([A-Z][a-zA-Z]+)\s+tem\s+falha',
-        ]
+        # Empresas conhecidas em uma passada; padrões de frase só se nenhuma aparecer
+        company = self.gazetteer.find(text)
+        if company:
+            return company
         
-        for pattern in patterns:
-            match = re.search(pattern, text)
+        for pattern in COMPANY_PATTERNS:
+            match = pattern.search(text)
             if match:
                 return match.group(1).strip()
         
@@ -221,36 +255,37 @@ class SimpleScraper:
         try:
             cursor = self.conn.cursor()
             
-            # Verifica se já existe
-            cursor.execute('''
-                SELECT id FROM complaints 
-                WHERE site_source = ? AND title = ? AND description = ?
-            ''', (complaint['site_source'], complaint['title'], complaint['description']))
-            
-            if cursor.fetchone():
-                return False  # Já existe
-            
-            # Insere nova reclamação
+            # Insere apenas se o content_hash ainda não existe
             cursor.execute('''
-                INSERT INTO complaints (
-                    site_source, company_name, title, description, url, relevance_score
-                ) VALUES (?, ?, ?, ?, ?, ?)
+                INSERT OR IGNORE INTO complaints (
+                    site_source, company_name, title, description, url, relevance_score, content_hash
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
             ''', (
                 complaint['site_source'],
                 complaint['company_name'],
                 complaint['title'],
                 complaint['description'],
                 complaint['url'],
-                complaint['relevance_score']
+                complaint['relevance_score'],
+                content_fingerprint(complaint['site_source'], complaint['title'],
+                                    complaint['company_name'], complaint['description'])
             ))
             
             self.conn.commit()
-            return True
+            return cursor.rowcount == 1
             
         except Exception as e:
             print(f"Erro ao salvar reclamação: {e}")
             return False
     
+    def record_term_yields(self, site_name, stored):
+        """Grava o rendimento (requisições e reclamações novas) de cada termo buscado no site"""
+        CRAWL_BUDGET.record(self.conn.cursor(), [
+            (site_name, term, fetches, stored[term]) for term, fetches in self.term_fetches.items()
+        ])
+        self.conn.commit()
+        self.term_fetches.clear()
+    
     def export_to_csv(self, filename='ti_complaints_simple.csv'):
         """Exporta dados para CSV"""
         try:
@@ -295,9 +330,12 @@ class SimpleScraper:
                 complaints = self.scrape_generic_site(base_url, site_name)
                 
                 saved_count = 0
+                stored = Counter()
                 for complaint in complaints:
                     if self.save_complaint(complaint):
                         saved_count += 1
+                        stored[complaint['search_term']] += 1
+                self.record_term_yields(site_name, stored)
                 
                 print(f"{site_name}: {saved_count} reclamações salvas")
                 total_complaints += saved_count
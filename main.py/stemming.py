@@ -0,0 +1,73 @@
+"""
+Stemmer leve para português e inglês, usado na busca de palavras-chave
+"""
+
+from functools import lru_cache
+
+# Tokens (já normalizados: minúsculos e sem acentos) que não passam pelo
+# stemmer: o singular teria outro sentido ("dado o atraso") ou o "s" final
+# não é de plural ("vírus", "status")
+PROTECTED = frozenset(('dados', 'virus', 'antivirus', 'status', 'mais', 'menos', 'pois', 'depois'))
+
+# Plurais (terminação -> substituta), testados na ordem; o "s" simples é
+# removido depois, por _singular
+PLURALS = {
+    'pt': [('oes', 'ao'), ('aes', 'ao'), ('ais', 'al'), ('eis', 'el'), ('res', 'r'), ('zes', 'z'), ('ses', 's')],
+    'en': [('ies', 'y'), ('sses', 'ss'), ('ches', 'ch'), ('shes', 'sh'), ('xes', 'x')],
+}
+
+# Sufixos (terminação -> substituta) aplicados depois do singular. Vale o
+# mais longo que mantenha um radical de pelo menos MIN_STEM_LENGTH letras.
+# Em português as formas verbais comuns viram a 3ª pessoa do presente, que
+# coincide com o substantivo: "travou", "travando", "travava" e "travamento"
+# viram "trava", e "falhou" vira "falha". Os derivacionais são removidos:
+# "instalação" e "instalações" viram "instal". Infinitivo, particípio e a
+# vogal final ficam como estão ("instalar", "errada", "seguro", "lenta"):
+# juntariam palavras comuns às palavras-chave de TI.
+SUFFIXES = {
+    'pt': {
+        'amentos': 'a', 'amento': 'a', 'ando': 'a', 'avam': 'a', 'ava': 'a', 'ou': 'a',
+        'imentos': '', 'imento': '', 'amente': '', 'mente': '', 'idades': '', 'idade': '',
+        'iveis': '', 'aveis': '', 'acoes': '', 'icoes': '', 'ancas': '', 'ivel': '', 'avel': '',
+        'acao': '', 'icao': '', 'idao': '', 'anca': '',
+    },
+    'en': {
+        'ations': '', 'ation': '', 'ingly': '', 'ments': '', 'ment': '', 'ness': '', 'ings': '',
+        'ing': '', 'ed': '',
+    },
+}
+
+MIN_STEM_LENGTH = 4
+
+# Tamanho mínimo do token para tirar o plural ("os", "mas", "tes" ficam)
+MIN_PLURAL_LENGTH = 4
+
+_ORDERED_SUFFIXES = {
+    language: sorted(suffixes.items(), key=lambda item: len(item[0]), reverse=True)
+    for language, suffixes in SUFFIXES.items()
+}
+
+
+def _singular(token: str, language: str) -> str:
+    if len(token) < MIN_PLURAL_LENGTH or not token.endswith('s'):
+        return token
+    for ending, replacement in PLURALS.get(language, ()):
+        if token.endswith(ending):
+            return token[:-len(ending)] + replacement
+    # "erros", "bugs", "sites"; não "ss" nem "us"
+    if token[-2] not in 'su':
+        return token[:-1]
+    return token
+
+
+@lru_cache(maxsize=100000)
+def stem(token: str, language: str = 'pt') -> str:
+    """Reduz um token normalizado ao seu radical"""
+    if language not in SUFFIXES or token in PROTECTED:
+        return token
+
+    token = _singular(token, language)
+    for suffix, replacement in _ORDERED_SUFFIXES[language]:
+        if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM_LENGTH:
+            return token[:-len(suffix)] + replacement
+    return token
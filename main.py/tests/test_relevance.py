@@ -0,0 +1,65 @@
+import pytest
+
+from keyword_matcher import TokenMatcher
+from stemming import stem
+from utils import TextProcessor
+
+NON_TI_TEXTS = [
+    "o seguro do carro não pagou",
+    "dado o atraso, quero reembolso",
+    "vou instalar o armário",
+    "veio a cor errada",
+    "a entrega foi lenta",
+]
+
+
+@pytest.fixture(scope='module')
+def processor():
+    return TextProcessor(scorer='keyword')
+
+
+@pytest.mark.parametrize('text', NON_TI_TEXTS)
+def test_non_ti_texts_are_not_related(processor, text):
+    assert not processor.is_ti_related(text)
+    assert processor.calculate_ti_relevance(text)['keywords_found'] == []
+
+
+def test_ti_text_is_related(processor):
+    assert processor.is_ti_related("O sistema está fora do ar e o aplicativo mostra erro")
+
+
+@pytest.mark.parametrize('word,keyword', [
+    ('travou', 'trava'),
+    ('travamento', 'trava'),
+    ('travamento', 'travando'),
+    ('falhou', 'falha'),
+    ('falhas', 'falha'),
+    ('erros', 'erro'),
+    ('bugs', 'bug'),
+    ('servidores', 'servidor'),
+    ('aplicativos', 'aplicativo'),
+    ('sites', 'site'),
+    ('conexões', 'conexão'),
+    ('instalações', 'instalação'),
+])
+def test_variants_match_their_keyword(word, keyword):
+    assert TokenMatcher([keyword], language='pt').find_keywords(f'o {word} de ontem') == [keyword]
+
+
+def test_ti_keyword_plurals_are_found(processor):
+    keywords = processor.calculate_ti_relevance('erros nos servidores e aplicativos dos sites')['keywords_found']
+    assert {'erro', 'servidor', 'aplicativo', 'site'} <= set(keywords)
+
+
+def test_stem_keeps_short_and_verbal_forms():
+    assert stem('seguro') == 'seguro'
+    assert stem('dado') == 'dado'
+    assert stem('dados') == 'dados'
+    assert stem('errada') == 'errada'
+    assert stem('instalar') == 'instalar'
+    assert stem('instalacoes') == stem('instalacao') == 'instal'
+
+
+def test_keywords_sharing_a_stem_count_once():
+    matcher = TokenMatcher(['travando', 'trava', 'erro'], language='pt')
+    assert matcher.count('o app travou') == {'travando': 1}
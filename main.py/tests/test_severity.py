@@ -0,0 +1,25 @@
+from severity import DEFAULT_RULES, ProblemClassifier
+
+TI_KEYWORDS = ['sistema', 'erro', 'falha', 'aplicativo', 'fora do ar', 'lento', 'instalação']
+
+
+def classifier():
+    return ProblemClassifier(TI_KEYWORDS, rules=DEFAULT_RULES)
+
+
+def test_similar_common_words_do_not_set_severity():
+    result = classifier().classify('veio a cor errada')
+    assert result.severity == 'low'
+    assert result.keywords == []
+    assert result.score == 0
+
+
+def test_listed_variants_set_severity():
+    assert classifier().classify('o aplicativo travou de novo').severity == 'high'
+    assert classifier().classify('várias falhas no sistema').severity == 'high'
+    assert classifier().classify('o site está fora do ar').severity == 'critical'
+
+
+def test_ti_keywords_still_use_stems():
+    result = classifier().classify('problemas nas instalações do sistema')
+    assert result.keywords == ['sistema', 'instalação']
@@ -0,0 +1,230 @@
+"""
+Classificador leve (CPU) de reclamações de TI: n-gramas com hash e regressão logística
+"""
+
+import logging
+import os
+import zlib
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from keyword_matcher import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Com menos exemplos rotulados não há como separar a parte de calibração:
+# o modelo fica sem Platt e sua saída não é comparável com o limiar
+MIN_CALIBRATION_LABELS = 50
+
+
+def hashed_ngrams(texts: Iterable[str], n_features: int, ngram_range: Tuple[int, int] = (1, 2),
+                  language: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Matriz esparsa (CSR sem valores) das features de cada texto.
+
+    Retorna (indptr, indices): as features do texto i são
+    indices[indptr[i]:indptr[i + 1]], cada uma o crc32 de um n-grama de
+    tokens normalizados módulo n_features (valor implícito 1, sem repetição).
+    """
+    min_n, max_n = ngram_range
+    indptr = [0]
+    indices: List[int] = []
+
+    for text in texts:
+        tokens = tokenize(text or '', language)
+        features = {
+            zlib.crc32(' '.join(tokens[start:start + n]).encode('utf-8')) % n_features
+            for n in range(min_n, max_n + 1)
+            for start in range(len(tokens) - n + 1)
+        }
+        indices.extend(features)
+        indptr.append(len(indices))
+
+    return np.array(indptr, dtype=np.int64), np.array(indices, dtype=np.int64)
+
+
+class TIClassifier:
+    """Regressão logística sobre n-gramas com hash, treinada com numpy.
+
+    As features são binárias e normalizadas pelo tamanho (1 / sqrt(n)), e os
+    produtos com os pesos são feitos por np.add.reduceat/np.bincount sobre a
+    matriz esparsa, sem montar a matriz densa. A saída é calibrada com Platt
+    scaling em uma parte separada dos exemplos, então predict_proba pode ser
+    gravada e comparada com um limiar fixo. calibrated indica se a calibração
+    foi feita (exige MIN_CALIBRATION_LABELS exemplos, das duas classes).
+    """
+
+    def __init__(self, n_features: int = 2 ** 18, ngram_range: Tuple[int, int] = (1, 2),
+                 language: Optional[str] = 'pt'):
+        self.n_features = n_features
+        self.ngram_range = tuple(ngram_range)
+        self.language = language
+        self.weights = np.zeros(n_features)
+        self.bias = 0.0
+        # Platt: p = sigmoid(platt_a * logit + platt_b)
+        self.platt_a = 1.0
+        self.platt_b = 0.0
+        self.calibrated = False
+
+    def _features(self, texts: Iterable[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        indptr, indices = hashed_ngrams(texts, self.n_features, self.ngram_range, self.language)
+        lengths = np.diff(indptr)
+        scale = 1.0 / np.sqrt(np.maximum(lengths, 1))
+        rows = np.repeat(np.arange(len(lengths)), lengths)
+        return indptr, indices, rows, scale
+
+    def _logits(self, indptr: np.ndarray, indices: np.ndarray, scale: np.ndarray) -> np.ndarray:
+        contributions = self.weights[indices]
+        sums = np.zeros(len(scale))
+        nonempty = np.diff(indptr) > 0
+        if len(indices):
+            sums[nonempty] = np.add.reduceat(contributions, indptr[:-1][nonempty])
+        return sums * scale + self.bias
+
+    def decision_function(self, texts: Sequence[str]) -> np.ndarray:
+        indptr, indices, _, scale = self._features(texts)
+        return self._logits(indptr, indices, scale)
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """Probabilidade calibrada de cada texto ser de TI"""
+        if not len(texts):
+            return np.empty(0)
+        return _sigmoid(self.platt_a * self.decision_function(texts) + self.platt_b)
+
+    def fit(self, texts: Sequence[str], labels: Sequence[int], epochs: int = 30, learning_rate: float = 0.5,
+            l2: float = 1e-4, calibration_fraction: float = 0.2, seed: int = 1) -> 'TIClassifier':
+        """Treina com gradiente descendente (lote inteiro) e calibra na fração separada"""
+        labels = np.asarray(labels, dtype=np.float64)
+        order = np.random.RandomState(seed).permutation(len(labels))
+        holdout = int(len(labels) * calibration_fraction) if len(labels) >= MIN_CALIBRATION_LABELS else 0
+        calibration, training = order[:holdout], order[holdout:]
+
+        texts = list(texts)
+        indptr, indices, rows, scale = self._features([texts[i] for i in training])
+        y = labels[training]
+        values = scale[rows]
+
+        self.weights = np.zeros(self.n_features)
+        positive_rate = np.clip(y.mean(), 1e-3, 1 - 1e-3) if len(y) else 0.5
+        self.bias = float(np.log(positive_rate / (1 - positive_rate)))
+
+        for _ in range(epochs):
+            error = _sigmoid(self._logits(indptr, indices, scale)) - y
+            gradient = np.bincount(indices, weights=error[rows] * values, minlength=self.n_features) / len(y)
+            self.weights -= learning_rate * (gradient + l2 * self.weights)
+            self.bias -= learning_rate * float(error.mean())
+
+        self.platt_a, self.platt_b = 1.0, 0.0
+        self.calibrated = bool(holdout and 0 < labels[calibration].sum() < holdout)
+        if self.calibrated:
+            self.platt_a, self.platt_b = _fit_platt(self.decision_function([texts[i] for i in calibration]),
+                                                    labels[calibration])
+        return self
+
+    def save(self, path: str):
+        """Grava o modelo em .npz (pesos em float32)"""
+        np.savez_compressed(
+            path, weights=self.weights.astype(np.float32),
+            params=np.array([self.bias, self.platt_a, self.platt_b]),
+            config=np.array([self.n_features, *self.ngram_range]),
+            language=np.array(self.language or ''),
+            calibrated=np.array(self.calibrated),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'TIClassifier':
+        with np.load(path) as data:
+            n_features, min_n, max_n = (int(value) for value in data['config'])
+            classifier = cls(n_features, (min_n, max_n), str(data['language']) or None)
+            classifier.weights = data['weights'].astype(np.float64)
+            classifier.bias, classifier.platt_a, classifier.platt_b = (float(value) for value in data['params'])
+            # Modelos gravados antes do campo: calibrados se o Platt foi ajustado
+            classifier.calibrated = (bool(data['calibrated']) if 'calibrated' in data.files
+                                     else (classifier.platt_a, classifier.platt_b) != (1.0, 0.0))
+        return classifier
+
+
+def _sigmoid(values: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(values, -30, 30)))
+
+
+def _fit_platt(logits: np.ndarray, labels: np.ndarray, iterations: int = 50) -> Tuple[float, float]:
+    """Ajusta (a, b) de sigmoid(a * logit + b) por Newton, com os alvos suavizados de Platt"""
+    positives = labels.sum()
+    negatives = len(labels) - positives
+    targets = np.where(labels > 0, (positives + 1) / (positives + 2), 1 / (negatives + 2))
+
+    a, b = 1.0, 0.0
+    for _ in range(iterations):
+        p = _sigmoid(a * logits + b)
+        error = p - targets
+        weight = np.maximum(p * (1 - p), 1e-12)
+        gradient = np.array([(error * logits).sum(), error.sum()])
+        hessian = np.array([
+            [(weight * logits * logits).sum() + 1e-9, (weight * logits).sum()],
+            [(weight * logits).sum(), weight.sum() + 1e-9],
+        ])
+        step = np.linalg.solve(hessian, gradient)
+        a, b = a - step[0], b - step[1]
+        if np.abs(step).max() < 1e-8:
+            break
+    return float(a), float(b)
+
+
+_loaded = {}
+
+
+def load_ti_classifier(path: str) -> Optional[TIClassifier]:
+    """Modelo carregado uma vez por processo.
+
+    None (estágio do classificador desligado) se o arquivo não existe ou se o
+    modelo não foi calibrado: a saída crua não é comparável com o limiar.
+    """
+    if path not in _loaded:
+        if not os.path.exists(path):
+            logger.warning(f"Modelo do classificador de TI não encontrado: {path}")
+            _loaded[path] = None
+        else:
+            classifier = TIClassifier.load(path)
+            if not classifier.calibrated:
+                logger.warning(f"Modelo do classificador de TI sem calibração, classificador desligado: {path} "
+                               f"(treine com pelo menos {MIN_CALIBRATION_LABELS} exemplos rotulados)")
+                classifier = None
+            _loaded[path] = classifier
+    return _loaded[path]
+
+
+def train_from_database(db_manager, model_path: str, **options) -> Optional[TIClassifier]:
+    """Treina com as reclamações rotuladas (ti_label) do banco e grava o modelo (só se calibrado)"""
+    texts, labels = db_manager.get_labeled_texts()
+    if len(set(labels)) < 2:
+        logger.error("São necessários exemplos rotulados das duas classes (ti_label 0 e 1) para treinar")
+        return None
+
+    classifier = TIClassifier(**options).fit(texts, labels)
+    if not classifier.calibrated:
+        logger.error(f"Modelo não gravado: {len(labels)} exemplos rotulados não bastam para calibrar "
+                     f"(mínimo de {MIN_CALIBRATION_LABELS}, com as duas classes na parte de calibração)")
+        return None
+
+    classifier.save(model_path)
+    _loaded.pop(model_path, None)
+
+    accuracy = float(np.mean((classifier.predict_proba(texts) >= 0.5) == np.asarray(labels)))
+    logger.info(f"Classificador de TI treinado com {len(labels)} exemplos (acurácia no treino: {accuracy:.1%})")
+    return classifier
+
+
+if __name__ == '__main__':
+    # Treina com os rótulos do banco principal e grava a probabilidade de todas as reclamações
+    from config import DATABASE_CONFIG, TI_CLASSIFIER_CONFIG
+    from database import DatabaseManager
+
+    logging.basicConfig(level=logging.INFO)
+    db_manager = DatabaseManager(DATABASE_CONFIG['db_path'])
+    trained = train_from_database(db_manager, TI_CLASSIFIER_CONFIG['model_path'],
+                                  n_features=TI_CLASSIFIER_CONFIG['n_features'],
+                                  ngram_range=TI_CLASSIFIER_CONFIG['ngram_range'])
+    if trained is not None:
+        db_manager.update_ti_probabilities(trained)
+    db_manager.close()
@@ -3,49 +3,94 @@ Utilitários para o scraper de reclamações
 """
 
 import re
+import os
+import json
 import time
 import random
 import logging
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional
 from datetime import datetime
-from fake_useragent import UserAgent
-from config import TI_KEYWORDS
+import numpy as np
+from config import TI_KEYWORDS, RELEVANCE_CONFIG, SCRAPING_CONFIG
+from keyword_matcher import get_matcher
+from normalization import parse_date, parse_rating
+from relevance import CorpusStats, create_scorer
 
 logger = logging.getLogger(__name__)
 
+# Usados se o fake_useragent falhar e ainda não houver pool em disco
+FALLBACK_USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+]
+
+_user_agents: Optional[List[str]] = None
+
+
+def get_user_agents(cache_path: str = SCRAPING_CONFIG['user_agent_cache'],
+                    max_age_days: float = SCRAPING_CONFIG['user_agent_cache_days'],
+                    pool_size: int = SCRAPING_CONFIG['user_agent_pool_size']) -> List[str]:
+    """Pool de user agents compartilhado pelo processo.
+
+    Lido do cache em disco enquanto tiver menos de max_age_days; senão é
+    gerado com o fake_useragent (importado só nesse caso) e salvo de novo.
+    """
+    global _user_agents
+    if _user_agents is not None:
+        return _user_agents
+
+    try:
+        if os.path.exists(cache_path) and time.time() - os.path.getmtime(cache_path) < max_age_days * 86400:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                _user_agents = json.load(f)
+            if _user_agents:
+                return _user_agents
+    except (OSError, ValueError) as e:
+        logger.warning(f"Cache de user agents inválido ({cache_path}): {e}")
+
+    try:
+        from fake_useragent import UserAgent
+
+        ua = UserAgent()
+        _user_agents = sorted({ua.random for _ in range(pool_size * 2)})[:pool_size]
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump(_user_agents, f)
+    except Exception as e:
+        logger.warning(f"Erro ao gerar user agents, usando a lista padrão: {e}")
+        _user_agents = FALLBACK_USER_AGENTS
+
+    return _user_agents
+
+
 class TextProcessor:
     """Classe para processamento de texto e filtragem de conteúdo"""
     
-    def __init__(self):
+    # Palavras-chave mais específicas recebem bonus no score
+    HIGH_PRIORITY_KEYWORDS = ['bug', 'falha', 'erro', 'sistema', 'suporte técnico', 'servidor']
+    
+    def __init__(self, scorer: str = RELEVANCE_CONFIG['scorer'], corpus_stats: Optional[CorpusStats] = None,
+                 language: str = 'pt'):
         self.ti_keywords = [keyword.lower() for keyword in TI_KEYWORDS]
+        self.matcher = get_matcher(
+            tuple(self.ti_keywords), language=language if RELEVANCE_CONFIG['stemming'] else None
+        )
+        self.scorer = create_scorer(
+            scorer, self.matcher.keywords, self.HIGH_PRIORITY_KEYWORDS, corpus_stats,
+            **(RELEVANCE_CONFIG['bm25'] if scorer == 'bm25' else {})
+        )
     
     def calculate_ti_relevance(self, text: str) -> Dict:
         """Calcula a relevância do texto para TI baseado nas palavras-chave"""
         if not text:
             return {'score': 0, 'keywords_found': []}
         
-        text_lower = text.lower()
-        keywords_found = []
-        
-        for keyword in self.ti_keywords:
-            if keyword in text_lower:
-                keywords_found.append(keyword)
-        
-        # Calcula score baseado na quantidade e frequência das palavras-chave
-        score = len(keywords_found) * 10
-        
-        # Bonus para palavras-chave mais específicas
-        high_priority_keywords = ['bug', 'falha', 'erro', 'sistema', 'suporte técnico', 'servidor']
-        for keyword in keywords_found:
-            if keyword in high_priority_keywords:
-                score += 5
-        
-        # Normaliza o score (máximo 100)
-        score = min(score, 100)
+        batch = self.score_batch([text])
         
         return {
-            'score': score,
-            'keywords_found': keywords_found
+            'score': int(batch['scores'][0]),
+            'keywords_found': self.keywords_from_hits(batch['hits'][0])
         }
     
     def is_ti_related(self, text: str, min_score: int = 10) -> bool:
@@ -53,6 +98,41 @@ class TextProcessor:
         relevance = self.calculate_ti_relevance(text)
         return relevance['score'] >= min_score
     
+    def score_batch(self, texts: Iterable[str], min_score: int = 10) -> Dict[str, np.ndarray]:
+        """Calcula a relevância de vários textos de uma vez (cada texto é lido uma única vez)
+        
+        Retorna 'scores' (n,), 'hits' (n, palavras-chave) com a contagem de cada
+        palavra-chave por texto e 'mask' (n,) com os textos que atingem min_score.
+        """
+        rows = []
+        columns = []
+        lengths = []
+        
+        for row, text in enumerate(texts):
+            lengths.append(len(text.split()) if text else 0)
+            for _, index in self.matcher.find_all(text):
+                rows.append(row)
+                columns.append(index)
+        
+        hits = np.zeros((len(lengths), len(self.matcher.keywords)), dtype=np.uint16)
+        np.add.at(hits, (np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)), 1)
+        
+        scores = self.scorer.score_matrix(hits, np.array(lengths, dtype=np.float64))
+        
+        return {
+            'scores': scores,
+            'hits': hits,
+            'mask': scores >= min_score
+        }
+    
+    def keywords_from_hits(self, hits_row: np.ndarray) -> List[str]:
+        """Converte uma linha da matriz de hits na lista de palavras-chave encontradas"""
+        return [self.matcher.keywords[index] for index in np.flatnonzero(hits_row)]
+    
+    def keyword_counts_from_hits(self, hits_row: np.ndarray) -> Dict[str, int]:
+        """Converte uma linha da matriz de hits em {palavra-chave: ocorrências}"""
+        return {self.matcher.keywords[index]: int(hits_row[index]) for index in np.flatnonzero(hits_row)}
+    
     def clean_text(self, text: str) -> str:
         """Limpa e normaliza o texto"""
         if not text:
@@ -67,60 +147,13 @@ class TextProcessor:
         
         return text
     
-    def extract_date(self, date_str: str) -> Optional[datetime]:
-        """Extrai data de strings em diferentes formatos"""
-        if not date_str:
-            return None
-        
-        date_patterns = [
-            r'(\d{1,2})/(\d{1,2})/(\d{4})',  # DD/MM/YYYY
-            r'(\d{4})-(\d{1,2})-(\d{1,2})',  # YYYY-MM-DD
-            r'(\d{1,2})-(\d{1,2})-(\d{4})',  # DD-MM-YYYY
-        ]
-        
-        for pattern in date_patterns:
-            match = re.search(pattern, date_str)
-            if match:
-                try:
-                    if pattern == date_patterns[1]:  # YYYY-MM-DD
-                        year, month, day = match.groups()
-                    else:  # DD/MM/YYYY or DD-MM-YYYY
-                        day, month, year = match.groups()
-                    
-                    return datetime(int(year), int(month), int(day))
-                except ValueError:
-                    continue
-        
-        return None
+    def extract_date(self, date_str: str, reference: Optional[datetime] = None) -> Optional[datetime]:
+        """Extrai data de strings em diferentes formatos (inclusive relativas, como "há 3 dias")"""
+        return parse_date(date_str, reference)
     
     def extract_rating(self, rating_str: str) -> Optional[float]:
         """Extrai rating numérico de strings"""
-        if not rating_str:
-            return None
-        
-        # Procura por padrões de rating
-        rating_patterns = [
-            r'(\d+(?:\.\d+)?)/5',  # X.X/5
-            r'(\d+(?:\.\d+)?)/10', # X.X/10
-            r'(\d+(?:\.\d+)?)★',   # X.X★
-            r'(\d+(?:\.\d+)?)',    # Só número
-        ]
-        
-        for pattern in rating_patterns:
-            match = re.search(pattern, rating_str)
-            if match:
-                try:
-                    rating = float(match.group(1))
-                    # Normaliza para escala 0-5
-                    if '/10' in rating_str:
-                        rating = rating / 2
-                    elif rating > 5:
-                        rating = rating / 2
-                    return min(rating, 5.0)
-                except ValueError:
-                    continue
-        
-        return None
+        return parse_rating(rating_str)
 
 class RequestHandler:
     """Classe para gerenciar requisições HTTP com rate limiting e user agents"""
@@ -128,13 +161,17 @@ class RequestHandler:
     def __init__(self, delay: int = 2, max_retries: int = 3):
         self.delay = delay
         self.max_retries = max_retries
-        self.ua = UserAgent()
+        self.user_agents = get_user_agents()
         self.last_request_time = 0
+        # Requisições feitas (rendimento por requisição do orçamento de coleta)
+        self.request_count = 0
+        # Requisições que trouxeram a página (o agendador recria o scraper se nenhuma trouxe)
+        self.success_count = 0
     
     def get_headers(self) -> Dict[str, str]:
         """Retorna headers aleatórios para evitar detecção"""
         return {
-            'User-Agent': self.ua.random,
+            'User-Agent': random.choice(self.user_agents),
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'pt-BR,pt;q=0.8,en;q=0.6',
             'Accept-Encoding': 'gzip, deflate',
@@ -152,6 +189,7 @@ class RequestHandler:
             time.sleep(sleep_time)
         
         self.last_request_time = time.time()
+        self.request_count += 1
     
     def random_delay(self, min_delay: int = 1, max_delay: int = 3):
         """Adiciona delay aleatório para parecer mais humano"""